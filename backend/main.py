@@ -1,13 +1,16 @@
-from fastapi import FastAPI, File, UploadFile, Query, HTTPException
+from fastapi import FastAPI, File, UploadFile, Query, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel
-import shutil
+import asyncio
+import hashlib
+import json
 import os
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 import sys
+from typing import List, Optional
 import uuid
-from typing import Optional
 
 # Add project root and module paths so we can import main pipeline
 docroot = Path(__file__).resolve().parent.parent
@@ -46,6 +49,14 @@ try:
 except Exception as e:
     raise RuntimeError(f"Failed to load pipeline from {pipeline_path}: {e}")
 
+from scripts.image_context import ImageContext
+from scripts.artifacts import ArtifactSink
+from scripts.pdf_ingest import DEFAULT_PDF_DPI, is_pdf, pdf_page_context
+from scripts.result_cache import ResultCache, cacheable_response, result_cache_key
+from scripts.pipeline_policy import PipelinePolicy
+from scripts.job_queue import JobQueue, QueueFull
+from scripts.cancel import Cancelled
+
 # Import database
 sys.path.insert(0, str(docroot / 'database'))
 from db_config import MarksheetDB
@@ -59,8 +70,17 @@ class SubmitData(BaseModel):
     user_email: str
     marksheets: list
 
-UPLOAD_DIR = docroot / 'backend' / 'uploads'
-UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
+# Uploads are decoded from the request body and processed in memory. API_ARTIFACTS lists the
+# artifact kinds still written to disk (comma separated, "all", or empty for none - the default)
+artifact_sink = ArtifactSink.from_spec(os.getenv("API_ARTIFACTS", ""))
+# Resolution PDF pages are rendered at (only the requested page is rendered)
+PDF_DPI = int(os.getenv("PDF_DPI", DEFAULT_PDF_DPI))
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+# Responses of recently processed uploads, keyed by upload hash + options + model versions/thresholds
+result_cache = ResultCache(
+    max_entries=int(os.getenv("RESULT_CACHE_MAX_ENTRIES", 256)),
+    ttl_seconds=float(os.getenv("RESULT_CACHE_TTL_SECONDS", 3600)),
+)
 
 app = FastAPI()
 
@@ -71,93 +91,523 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Cache"],
 )
 
-processor = MarksheetProcessor()
+# Detector backend: "torch" (default), "onnx" or "auto" (ONNX when exported graphs exist);
+# table model variant: "fp32" (default) or "int8"
+processor = MarksheetProcessor(
+    backend=os.getenv("DETECTOR_BACKEND", "torch"),
+    table_variant=os.getenv("TABLE_MODEL_VARIANT", "fp32"),
+    page_workers=int(os.getenv("PDF_PAGE_WORKERS", 2)),
+    pdf_dpi=PDF_DPI,
+    detection_cache_dir=os.getenv("DETECTION_CACHE_DIR") or None,
+    # Reject logo-less uploads before OCR; no annotated images are drawn for API responses
+    policy=PipelinePolicy.from_spec(os.getenv("PIPELINE_ABORT_ON", "invalid_logo"),
+                                    os.getenv("PIPELINE_SKIP_STAGES", "annotate")),
+)
 db = MarksheetDB()
+# Pipeline runs happen on this fixed pool, never on the event loop; past JOB_WORKERS running plus
+# JOB_QUEUE_SIZE waiting jobs, new uploads get 429
+jobs = JobQueue(
+    workers=int(os.getenv("JOB_WORKERS", 2)),
+    max_pending=int(os.getenv("JOB_QUEUE_SIZE", 16)),
+    ttl_seconds=float(os.getenv("JOB_TTL_SECONDS", 3600)),
+    max_finished=int(os.getenv("JOB_REGISTRY_SIZE", 256)),
+)
+JOB_RETRY_AFTER_SECONDS = 5
+# How often a waiting request checks whether its client is still connected
+DISCONNECT_POLL_SECONDS = 0.5
+# Files accepted by one POST /process_batch request
+MAX_BATCH_FILES = int(os.getenv("MAX_BATCH_FILES", 20))
+
+@app.on_event("startup")
+def load_models():
+    # Keep detection models resident so the first upload does not pay the load cost
+    for entry in processor.preload_models():
+        print(f"Loaded {entry['key']} in {entry['load_seconds']}s ({entry['memory_mb']} MB)")
+
+@app.get("/models")
+async def model_stats():
+    return {"models": processor.models.stats()}
+
+@app.get("/jobs")
+async def job_stats():
+    return jobs.stats()
+
+@app.get("/cache")
+async def cache_stats():
+    from scripts.ocr_cache import get_ocr_cache
+    return {"ocr": get_ocr_cache().stats(), "results": result_cache.stats()}
+
+# Normalized (cx, cy, w, h) boxes of the info and marks tables on the fixed college format
+COLLEGE_INFO_BOX = (0.395423, 0.163709, 0.653978, 0.128660)
+COLLEGE_MARKS_BOX = (0.492943, 0.472937, 0.849016, 0.492458)
+
+def process_college_page(image, cancel=None):
+    # Lazy import to avoid loading unless needed
+    from scripts.college_extractor import process_fixed_format as college_process
+    return college_process(image, COLLEGE_INFO_BOX, COLLEGE_MARKS_BOX, sink=artifact_sink, cancel=cancel)
+
+def school_payload(result):
+    """{board, data} response body for a process_single_marksheet result"""
+    # The result should contain an 'extraction' field with the final JSON path and/or data
+    data = None
+    if 'extraction' in result:
+        data = result['extraction'].get('data')
+        if not data and result['extraction'].get('final_json'):
+            final_json_path = Path(result['extraction']['final_json'])
+            if final_json_path.exists():
+                import json
+                with open(final_json_path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+    board_name = result.get("logo_detection", {}).get("board_name", "")
+    if "aborted" in result:
+        # Stopped early by the pipeline policy (e.g. no board logo); OCR was never run
+        return {
+            "board": board_name,
+            "data": {
+                "board": board_name,
+                "student_name": "Not processed",
+                "subjects": [],
+                "note": f"Upload rejected: {result['aborted']['reason']}"
+            }
+        }
+    if data is not None:
+        # Also allow board-name/type to frontend
+        return {"board": board_name, "data": data}
+    # Return partial results even if extraction failed
+    return {
+        "board": board_name,
+        "data": {
+            "board": board_name,
+            "student_name": "OCR not available",
+            "subjects": [],
+            "note": "OCR extraction failed - please check API key"
+        }
+    }
+
+def artifact_name(filename):
+    """Per-request name for an upload's artifacts, so uploads with the same file name never share files"""
+    return f"{uuid.uuid4().hex}{Path(filename).suffix}"
+
+async def read_upload(file: UploadFile):
+    """Read an upload in chunks, hashing it as it streams in; returns (bytes, sha256 hex digest)"""
+    digest = hashlib.sha256()
+    chunks = []
+    while True:
+        chunk = await file.read(UPLOAD_CHUNK_SIZE)
+        if not chunk:
+            break
+        digest.update(chunk)
+        chunks.append(chunk)
+    return b"".join(chunks), digest.hexdigest()
+
+def semester_mismatch(data, expected_sem):
+    """Error message when a college marksheet belongs to another semester than expected_sem, else None"""
+    try:
+        extracted_sem = (data.get("college", {}) or {}).get("semester")
+        if extracted_sem and str(extracted_sem).strip().upper() != str(expected_sem).strip().upper():
+            return f"Uploaded marksheet belongs to Semester {extracted_sem}. Please upload Semester {expected_sem} marksheet."
+    except Exception:
+        pass
+    return None
+
+class ProcessingError(Exception):
+    """Pipeline failure with the HTTP status it maps to"""
+
+    def __init__(self, message, status_code=500, cache_status="MISS"):
+        super().__init__(message)
+        self.status_code = status_code
+        self.cache_status = cache_status
+
+def upload_cache_key(upload_sha256, filename, mode="school", page=1):
+    """Result cache key of a /process upload; page only counts for PDFs"""
+    return result_cache_key(
+        upload_sha256,
+        endpoint="process",
+        mode=mode,
+        page=page if is_pdf(filename) else None,
+        config=processor.config_fingerprint(),
+    )
+
+def process_upload(body, upload_sha256, filename, mode="school", expected_sem=None, page=1, on_event=None,
+                   cancel=None):
+    """
+    Run the pipeline on one upload (on a job worker thread); on_event receives the per-stage
+    events of MarksheetProcessor.process_single_marksheet (school mode, cache misses only).
+    Raises Cancelled when the job's cancel token fires before the pipeline finishes.
+    
+    Returns:
+        tuple: (payload, "HIT" or "MISS" for the result cache)
+    """
+    cache_key = upload_cache_key(upload_sha256, filename, mode, page)
+    
+    payload = result_cache.get(cache_key)
+    cache_status = "HIT" if payload is not None else "MISS"
+    if payload is None:
+        name = artifact_name(filename)
+        image = ImageContext.from_bytes(body, name=name)
+        
+        # If PDF, render only the requested page for downstream OCR
+        try:
+            if is_pdf(filename):
+                page_image = pdf_page_context(body, page=page, dpi=PDF_DPI, name=name)
+                if page_image is None:
+                    raise ProcessingError(f"PDF has no page {page}", 400, cache_status)
+                image = page_image
+        except ProcessingError:
+            raise
+        except Exception as _e:
+            # Non-fatal; continue with original file if conversion failed
+            pass
+        # Run pipeline
+        try:
+            if mode == "college":
+                data = process_college_page(image, cancel)
+                payload = {"board": "COLLEGE_FIXED", "data": data}
+                # Responses built from failed OCR are not worth keeping
+                cacheable = cacheable_response(payload)
+            else:
+                result = processor.process_single_marksheet(image, sink=artifact_sink, on_event=on_event,
+                                                            cancel=cancel)
+                payload = school_payload(result)
+                cacheable = cacheable_response(payload, result.get("extraction", {}).get("ocr_ok", False))
+            if cancel is not None:
+                # A partial result of a cancelled run is neither cached nor returned
+                cancel.check()
+        except Cancelled:
+            raise
+        except Exception as e:
+            raise ProcessingError(str(e), 500, cache_status)
+        if cacheable:
+            result_cache.put(cache_key, payload)
+    
+    # Semester validation: compare extracted semester with expected_sem (if provided)
+    if mode == "college" and expected_sem:
+        error = semester_mismatch(payload["data"], expected_sem)
+        if error:
+            raise ProcessingError(error, 400, cache_status)
+    return payload, cache_status
+
+def upload_job_fields(result):
+    """GET /jobs/{job_id} fields of a finished process_upload job"""
+    payload, cache_status = result
+    return {"result": payload, "cache": cache_status}
+
+async def await_job(job, request: Request):
+    """
+    Wait for a job's result; the job is cancelled if the client disconnects first. The result goes
+    to this request only, so the job is not kept for GET /jobs/{job_id}
+    """
+    future = asyncio.wrap_future(job.future)
+    try:
+        while not future.done():
+            await asyncio.wait({future}, timeout=DISCONNECT_POLL_SECONDS)
+            if not future.done() and await request.is_disconnected():
+                jobs.cancel(job.id, "client disconnected")
+        return future.result()
+    finally:
+        jobs.release(job)
+
+def cancelled_response(error):
+    # 499: the request was cancelled (client closed it or POST /jobs/{job_id}/cancel) before it finished
+    return JSONResponse(content={"error": f"cancelled: {error}"}, status_code=499)
+
+def queue_full_response():
+    return JSONResponse(content={"error": "Too many uploads in progress, retry shortly"}, status_code=429,
+                        headers={"Retry-After": str(JOB_RETRY_AFTER_SECONDS)})
+
+@app.post("/jobs", status_code=202)
+async def create_job(
+    file: UploadFile = File(...),
+    mode: str = Query("school"),  # "school" or "college"
+    expected_sem: Optional[str] = Query(None),
+    page: int = Query(1, ge=1),  # PDF page to process
+):
+    """Queue an upload; poll GET /jobs/{job_id} for the result"""
+    body, upload_sha256 = await read_upload(file)
+    try:
+        job = jobs.submit("process", process_upload, body, upload_sha256, file.filename or "upload",
+                          mode, expected_sem, page, render=upload_job_fields)
+    except QueueFull:
+        return queue_full_response()
+    return JSONResponse(content=job.to_dict(), status_code=202)
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired job")
+    info = job.to_dict()
+    if job.status == "done":
+        info.update(job.render(job.future.result()))
+    elif job.status == "failed":
+        error = job.future.exception()
+        info["error"] = str(error)
+        info["status_code"] = getattr(error, "status_code", 500)
+    elif job.status == "cancelled":
+        info["error"] = str(job.token.reason)
+    return info
+
+@app.post("/jobs/{job_id}/cancel")
+async def cancel_job(job_id: str):
+    """Stop a queued or running job; its worker slot is freed as soon as the pipeline notices"""
+    job = jobs.cancel(job_id, "cancelled by client")
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired job")
+    return job.to_dict()
+
+def sse_event(event, data):
+    """One Server-Sent Events message"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"
+
+@app.post("/process_stream")
+async def process_marksheet_stream(
+    file: UploadFile = File(...),
+    mode: str = Query("school"),  # "school" or "college"
+    expected_sem: Optional[str] = Query(None),
+    page: int = Query(1, ge=1),  # PDF page to process
+):
+    """
+    /process as a Server-Sent Events stream: one event per pipeline stage as it completes
+    (preprocess, logo, face, tables, status, ocr_info, ocr_marks, extraction, or aborted/error),
+    then a final "result" event with the /process payload, "failed" with {error, status_code},
+    or "cancelled". Closing the stream cancels the job; the "job" event carries its id for
+    POST /jobs/{job_id}/cancel.
+    """
+    body, upload_sha256 = await read_upload(file)
+    loop = asyncio.get_running_loop()
+    events = asyncio.Queue()
+    
+    def on_event(stage, data):
+        # Called from pipeline threads
+        loop.call_soon_threadsafe(events.put_nowait, (stage, data))
+    
+    try:
+        job = jobs.submit("process", process_upload, body, upload_sha256, file.filename or "upload",
+                          mode, expected_sem, page, on_event, render=upload_job_fields)
+    except QueueFull:
+        return queue_full_response()
+    
+    async def stream():
+        finished = asyncio.wrap_future(job.future)
+        try:
+            yield sse_event("job", job.to_dict())
+            while not finished.done():
+                next_event = asyncio.ensure_future(events.get())
+                await asyncio.wait({next_event, finished}, return_when=asyncio.FIRST_COMPLETED)
+                if next_event.done():
+                    yield sse_event(*next_event.result())
+                else:
+                    next_event.cancel()
+        finally:
+            # The client went away mid-stream (the generator is closed): stop the pipeline too
+            if not finished.done():
+                jobs.cancel(job.id, "client disconnected")
+            jobs.release(job)
+        # Events queued before the job finished
+        while not events.empty():
+            yield sse_event(*events.get_nowait())
+        try:
+            payload, cache_status = finished.result()
+            yield sse_event("result", {"cache": cache_status, **payload})
+        except Cancelled as e:
+            yield sse_event("cancelled", {"reason": str(e)})
+        except ProcessingError as e:
+            yield sse_event("failed", {"error": str(e), "status_code": e.status_code})
+        except Exception as e:
+            yield sse_event("failed", {"error": str(e), "status_code": 500})
+    
+    return StreamingResponse(stream(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
 
 @app.post("/process")
 async def process_marksheet(
+    request: Request,
     file: UploadFile = File(...),
     mode: str = Query("school"),  # "school" or "college"
     expected_sem: Optional[str] = Query(None),
+    page: int = Query(1, ge=1),  # PDF page to process
 ):
-    # Save upload to disk
-    suffix = Path(file.filename).suffix
-    temp_filename = f"{uuid.uuid4().hex}{suffix}"
-    temp_path = UPLOAD_DIR / temp_filename
-    with open(temp_path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
+    # Decode straight from the request body; nothing is written to backend/uploads
+    body, upload_sha256 = await read_upload(file)
+    # Same job pool as POST /jobs; the event loop stays free while the pipeline runs
+    try:
+        job = jobs.submit("process", process_upload, body, upload_sha256, file.filename or "upload",
+                          mode, expected_sem, page, render=upload_job_fields)
+    except QueueFull:
+        return queue_full_response()
+    try:
+        payload, cache_status = await await_job(job, request)
+    except Cancelled as e:
+        return cancelled_response(e)
+    except ProcessingError as e:
+        # X-Cache tells the client whether the pipeline ran for this response
+        return JSONResponse(content={"error": str(e)}, status_code=e.status_code, headers={"X-Cache": e.cache_status})
+    except Exception as e:
+        return JSONResponse(content={"error": str(e)}, status_code=500)
+    return JSONResponse(content=payload, headers={"X-Cache": cache_status})
+
+def process_pdf_upload(body, filename, mode="school", pages="all", cancel=None):
+    """Run every selected page of a PDF (on a job worker thread); returns {"pages": {page: payload}}"""
+    name = artifact_name(filename)
+    try:
+        if mode == "college":
+            page_results = processor.process_document(body, pages=pages, name=name, cancel=cancel,
+                                                      process_page=lambda page: process_college_page(page, cancel))
+        else:
+            page_results = processor.process_document(body, pages=pages, name=name, sink=artifact_sink,
+                                                      cancel=cancel)
+        if cancel is not None:
+            cancel.check()
+    except Cancelled:
+        raise
+    except ValueError as e:
+        raise ProcessingError(str(e), 400)
+    except Exception as e:
+        raise ProcessingError(str(e), 500)
     
-    # If PDF, convert first page to image for downstream OCR
-    try:
-        if suffix.lower() == ".pdf":
-            from pdf2image import convert_from_path
-            pages = convert_from_path(str(temp_path), dpi=300)
-            img_path = UPLOAD_DIR / f"{Path(temp_filename).stem}.jpg"
-            if pages:
-                pages[0].save(str(img_path), format="JPEG")
-                try:
-                    os.remove(temp_path)
-                except Exception:
-                    pass
-                temp_path = img_path
-                suffix = ".jpg"
-    except Exception as _e:
-        # Non-fatal; continue with original file if conversion failed
-        pass
-    # Run pipeline
+    response = {}
+    for page, result in page_results.items():
+        if result.get("overall_status") == "error":
+            response[str(page)] = {"error": result.get("error", "")}
+        elif mode == "college":
+            response[str(page)] = {"board": "COLLEGE_FIXED", "data": result}
+        else:
+            response[str(page)] = school_payload(result)
+    return {"pages": response}
+
+def upload_context(body, filename):
+    """ImageContext of an upload; the first page for PDFs"""
+    name = artifact_name(filename)
+    if is_pdf(filename):
+        image = pdf_page_context(body, page=1, dpi=PDF_DPI, name=name)
+        if image is None:
+            raise ProcessingError("PDF has no pages", 400)
+        return image
+    return ImageContext.from_bytes(body, name=name)
+
+def process_batch_upload(uploads, mode="school", cancel=None):
+    """
+    Run many uploads (on one job worker thread) as a single batch: logo and table detection are
+    shared across the files and their OCR runs concurrently (MarksheetProcessor.process_marksheets).
+    Results come from and go to the same cache as /process.
+    
+    Returns:
+        dict: {"files": [{filename, cache, board, data} or {filename, error, status_code}, ...]} in upload order
+    """
+    entries = [{"filename": filename} for _, _, filename in uploads]
+    misses = []
+    for entry, (body, upload_sha256, filename) in zip(entries, uploads):
+        cache_key = upload_cache_key(upload_sha256, filename, mode)
+        payload = result_cache.get(cache_key)
+        if payload is not None:
+            entry.update(cache="HIT", **payload)
+            continue
+        entry["cache"] = "MISS"
+        try:
+            misses.append((entry, cache_key, upload_context(body, filename)))
+        except ProcessingError as e:
+            entry.update(error=str(e), status_code=e.status_code)
+        except Exception as e:
+            entry.update(error=f"Failed to read upload: {e}", status_code=400)
+    
+    images = [image for _, _, image in misses]
     try:
         if mode == "college":
-            # Lazy import to avoid loading unless needed
-            from scripts.college_extractor import process_fixed_format as college_process
-            # Provided normalized boxes
-            info_box = (0.395423, 0.163709, 0.653978, 0.128660)
-            marks_box = (0.492943, 0.472937, 0.849016, 0.492458)
-            data = college_process(str(temp_path), info_box, marks_box)
-            # Semester validation: compare extracted semester with expected_sem (if provided)
-            if expected_sem:
+            # The fixed college format has no detection stage; only the OCR of the files runs concurrently
+            def college_page(image):
                 try:
-                    extracted_sem = (data.get("college", {}) or {}).get("semester")
-                    if extracted_sem and str(extracted_sem).strip().upper() != str(expected_sem).strip().upper():
-                        return JSONResponse(content={"error": f"Uploaded marksheet belongs to Semester {extracted_sem}. Please upload Semester {expected_sem} marksheet."}, status_code=400)
-                except Exception:
-                    pass
-            return JSONResponse(content={"board": "COLLEGE_FIXED", "data": data})
+                    data = process_college_page(image, cancel)
+                except Cancelled:
+                    raise
+                except Exception as e:
+                    return {"overall_status": "error", "error": str(e)}
+                return {"data": data}
+            with ThreadPoolExecutor(max_workers=processor.page_workers, thread_name_prefix="college") as pool:
+                results = list(pool.map(college_page, images))
         else:
-            result = processor.process_single_marksheet(str(temp_path))
-            # The result should contain an 'extraction' field with the final JSON path and/or data
-            data = None
-            if 'extraction' in result:
-                data = result['extraction'].get('data')
-                if not data and result['extraction'].get('final_json'):
-                    final_json_path = Path(result['extraction']['final_json'])
-                    if final_json_path.exists():
-                        import json
-                        with open(final_json_path, 'r', encoding='utf-8') as f:
-                            data = json.load(f)
-            if data is not None:
-                # Also allow board-name/type to frontend
-                return JSONResponse(content={"board": result.get("logo_detection", {}).get("board_name", ""), "data": data})
-            else:
-                # Return partial results even if extraction failed
-                board_name = result.get("logo_detection", {}).get("board_name", "")
-                return JSONResponse(content={
-                    "board": board_name,
-                    "data": {
-                        "board": board_name,
-                        "student_name": "OCR not available",
-                        "subjects": [],
-                        "note": "OCR extraction failed - please check API key"
-                    }
-                })
+            results = processor.process_marksheets(images, sink=artifact_sink, cancel=cancel)
+        if cancel is not None:
+            # Partial results of a cancelled batch are neither cached nor returned
+            cancel.check()
+    except Cancelled:
+        raise
+    except Exception as e:
+        raise ProcessingError(str(e), 500)
+    
+    for (entry, cache_key, _), result in zip(misses, results):
+        if result.get("overall_status") == "error":
+            entry.update(error=result.get("error", ""), status_code=500)
+            continue
+        if mode == "college":
+            payload = {"board": "COLLEGE_FIXED", "data": result["data"]}
+            cacheable = cacheable_response(payload)
+        else:
+            payload = school_payload(result)
+            cacheable = cacheable_response(payload, result.get("extraction", {}).get("ocr_ok", False))
+        if cacheable:
+            result_cache.put(cache_key, payload)
+        entry.update(payload)
+    return {"files": entries}
+
+@app.post("/process_batch")
+async def process_batch(
+    request: Request,
+    files: List[UploadFile] = File(...),
+    mode: str = Query("school"),  # "school" or "college"
+):
+    """
+    Process several uploads in one request (first page of PDFs): one job, shared logo and table
+    detection batches, concurrent OCR; the response lists one /process payload or error per file
+    """
+    if len(files) > MAX_BATCH_FILES:
+        return JSONResponse(content={"error": f"At most {MAX_BATCH_FILES} files per batch"}, status_code=400)
+    uploads = []
+    for file in files:
+        body, upload_sha256 = await read_upload(file)
+        uploads.append((body, upload_sha256, file.filename or "upload"))
+    try:
+        job = jobs.submit("process_batch", process_batch_upload, uploads, mode)
+    except QueueFull:
+        return queue_full_response()
+    try:
+        response = await await_job(job, request)
+    except Cancelled as e:
+        return cancelled_response(e)
+    except ProcessingError as e:
+        return JSONResponse(content={"error": str(e)}, status_code=e.status_code)
     except Exception as e:
         return JSONResponse(content={"error": str(e)}, status_code=500)
-    finally:
-        try:
-            os.remove(temp_path)
-        except Exception:
-            pass
+    return JSONResponse(content=response)
+
+@app.post("/process_document")
+async def process_document(
+    request: Request,
+    file: UploadFile = File(...),
+    mode: str = Query("school"),  # "school" or "college"
+    pages: str = Query("all"),  # page selector, e.g. "all", "1-3", "2,4"
+):
+    """Process the pages of a PDF concurrently; response is keyed by page number"""
+    filename = file.filename or "upload.pdf"
+    if not is_pdf(filename):
+        return JSONResponse(content={"error": "process_document expects a PDF"}, status_code=400)
+    body = await file.read()
+    try:
+        job = jobs.submit("process_document", process_pdf_upload, body, filename, mode, pages)
+    except QueueFull:
+        return queue_full_response()
+    try:
+        response = await await_job(job, request)
+    except Cancelled as e:
+        return cancelled_response(e)
+    except ProcessingError as e:
+        return JSONResponse(content={"error": str(e)}, status_code=e.status_code)
+    except Exception as e:
+        return JSONResponse(content={"error": str(e)}, status_code=500)
+    return JSONResponse(content=response)
+
 @app.post("/create_user")
 async def create_user(user: UserCreate):
     try:
@@ -29,6 +29,9 @@ def main():
     clean_directory("data/output/table_coordinates", "table coordinates")
     clean_directory("data/output/final_json", "final JSON outputs")
     
+    # Clean OCR/result caches
+    clean_directory("data/cache", "caches")
+    
     # Clean backend/uploads
     clean_directory("backend/uploads", "backend uploads")
     
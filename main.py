@@ -5,8 +5,11 @@ Integrates preprocessing, logo detection, face detection, and table verification
 
 import os
 import sys
-import json
 import argparse
+import hashlib
+import threading
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, FIRST_COMPLETED, as_completed, wait
 from pathlib import Path
 import cv2
 import numpy as np
@@ -16,42 +19,48 @@ sys.path.append(os.path.join(os.path.dirname(__file__), 'scripts'))
 
 # Import core modules
 from preprocess import preprocess_marksheet
-from scripts.detectLogo import detect_logo
-from scripts.facedetector import detect_candidate_photo
-from scripts.predict_table import process_single_image as detect_tables
+from scripts.detectLogo import (detect_logo_with_boxes_and_scores, detect_logo_batch_with_boxes_and_scores,
+                                detect_logo_raw, logo_from_raw, LOGO_CONFIDENCE)
+from scripts.facedetector import detect_faces
+from scripts.predict_table import (detect_tables_with_boxes_and_scores, detect_tables_batch_with_boxes_and_scores,
+                                   detect_tables_raw, tables_from_raw)
+from scripts.model_registry import get_registry, model_version
+from scripts.detections import DetectionResult, BOARD_NAMES
+from scripts.image_context import ImageContext
+from scripts.artifacts import ArtifactSink, DeferredArtifactSink, NULL_SINK
+from scripts.prefetch import PrefetchPipeline
+from scripts.stage_graph import StageGraph
+from scripts.pipeline_policy import PipelinePolicy, PipelineAborted
+from scripts.results_log import ResultsLog, file_sha256
+from scripts.result_cache import ocr_text_failed
+from scripts.cancel import Cancelled, ensure_token
+from scripts.detection_cache import DetectionCache, RawDetections, raw_meta, rethreshold
+from scripts.pdf_ingest import DEFAULT_PDF_DPI, is_pdf, pdf_page_context, iter_pdf_page_contexts
 # Defer OCR/extractor imports to runtime to avoid import-time failures when env/config missing
 # from scripts.ocr import process_image_with_tables as ocr_process_image_with_tables
 # from scripts.extractor import create_final_results_dir as extractor_create_results_dir, process_file as extractor_process_file
 
 
-def create_annotated_image(image_path, logo_result, face_result, table_result, output_path, logo_model_path, table_model_path, board_name=None):
+def create_annotated_image(image_path, detections, output_path):
     """
     Create a single annotated image with all detections marked with bounding boxes
     
     Args:
-        image_path: Path to original image
-        logo_result: Logo detection result
-        face_result: Face detection result  
-        table_result: Table detection result
+        image_path: Path to original image or ImageContext
+        detections: DetectionResult holding the logo, face and table detections
         output_path: Path to save annotated image
-        logo_model_path: Path to logo detection model
-        table_model_path: Path to table detection model
-        board_name: Detected board name (e.g., "ICSE", "CBSE", "Uttarakhand")
     """
-    # Load the original image
-    print(f"Loading image for annotation: {image_path}")
-    image = cv2.imread(image_path)
+    # Load the original image (portrait orientation); copy since the view is shared
+    ctx = ImageContext.coerce(image_path)
+    print(f"Loading image for annotation: {ctx.name}")
+    image = ctx.portrait_bgr
     if image is None:
-        print(f"Failed to load image: {image_path}")
+        print(f"Failed to load image: {ctx.name}")
         return False
+    image = image.copy()
     
     print(f"Image loaded successfully, shape: {image.shape}")
     
-    # Ensure portrait orientation
-    height, width = image.shape[:2]
-    if width > height:
-        image = cv2.rotate(image, cv2.ROTATE_90_COUNTERCLOCKWISE)
-    
     # Define colors for different annotations
     colors = {
         'logo': (0, 255, 0),      # Green
@@ -61,65 +70,32 @@ def create_annotated_image(image_path, logo_result, face_result, table_result, o
     }
     
     # Draw logo detection boxes
-    if logo_result != -1:
-        try:
-            from detectLogo import detect_logo_with_boxes
-            print(f"Detecting logo boxes for result: {logo_result}")
-            logo_boxes = detect_logo_with_boxes(image_path, logo_model_path)
-            print(f"Found {len(logo_boxes)} logo boxes")
-            for box in logo_boxes:
-                x1, y1, x2, y2 = box
-                cv2.rectangle(image, (int(x1), int(y1)), (int(x2), int(y2)), colors['logo'], 4)
-                cv2.putText(image, "LOGO", (int(x1), int(y1)-15), 
-                           cv2.FONT_HERSHEY_SIMPLEX, 0.8, colors['logo'], 3)
-        except Exception as e:
-            print(f"Logo detection failed: {e}")
-            pass  # If logo detection fails, continue without boxes
+    for box in detections.logo_boxes:
+        x1, y1, x2, y2 = box
+        cv2.rectangle(image, (int(x1), int(y1)), (int(x2), int(y2)), colors['logo'], 4)
+        cv2.putText(image, "LOGO", (int(x1), int(y1)-15), 
+                   cv2.FONT_HERSHEY_SIMPLEX, 0.8, colors['logo'], 3)
     
     # Draw face detection boxes
-    if face_result["photo_detected"] == 1:
-        try:
-            # Crop to top 30% where photos usually appear
-            height = image.shape[0]
-            img_cropped = image[:int(height * 0.3), :]
-            gray = cv2.cvtColor(img_cropped, cv2.COLOR_BGR2GRAY)
-            
-            # Use Haar cascade face detector
-            face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
-            faces = face_cascade.detectMultiScale(gray, scaleFactor=1.1, minNeighbors=5, minSize=(30, 30))
-            
-            print(f"Found {len(faces)} faces")
-            for (x, y, w, h) in faces:
-                cv2.rectangle(image, (x, y), (x+w, y+h), colors['face'], 4)
-                cv2.putText(image, "FACE", (x, y-15), 
-                           cv2.FONT_HERSHEY_SIMPLEX, 0.8, colors['face'], 3)
-        except Exception as e:
-            print(f"Face detection failed: {e}")
-            pass  # If face detection fails, continue without boxes
+    for (x, y, w, h) in detections.face_rects:
+        cv2.rectangle(image, (x, y), (x+w, y+h), colors['face'], 4)
+        cv2.putText(image, "FACE", (x, y-15), 
+                   cv2.FONT_HERSHEY_SIMPLEX, 0.8, colors['face'], 3)
     
     # Draw table detection boxes
-    if table_result == 1:
-        try:
-            from predict_table import detect_tables_with_boxes_and_scores
-            print(f"Detecting table boxes for result: {table_result}")
-            table_data = detect_tables_with_boxes_and_scores(image_path, table_model_path)
-            print(f"Found {len(table_data)} table boxes")
-            for i, (box, label, confidence) in enumerate(table_data):
-                x1, y1, x2, y2 = box
-                table_type = "INFO_TABLE" if label == 0 else "MARKS_TABLE"
-                # Draw thicker rectangle for better visibility
-                cv2.rectangle(image, (int(x1), int(y1)), (int(x2), int(y2)), colors['table'], 4)
-                # Draw label with confidence score
-                label_text = f"{table_type} ({confidence:.2f})"
-                cv2.putText(image, label_text, (int(x1), int(y1)-15), 
-                           cv2.FONT_HERSHEY_SIMPLEX, 0.8, colors['table'], 3)
-        except Exception as e:
-            print(f"Table detection failed: {e}")
-            pass  # If table detection fails, continue without boxes
+    for box, label, confidence in detections.tables():
+        x1, y1, x2, y2 = box
+        table_type = "INFO_TABLE" if label == 0 else "MARKS_TABLE"
+        # Draw thicker rectangle for better visibility
+        cv2.rectangle(image, (int(x1), int(y1)), (int(x2), int(y2)), colors['table'], 4)
+        # Draw label with confidence score
+        label_text = f"{table_type} ({confidence:.2f})"
+        cv2.putText(image, label_text, (int(x1), int(y1)-15), 
+                   cv2.FONT_HERSHEY_SIMPLEX, 0.8, colors['table'], 3)
     
     # Add overall status text (ICSE may not contain a photo on some marksheets)
-    is_icse = (str(board_name).upper() == "ICSE") if board_name else False
-    is_valid = (logo_result != -1 and table_result == 1 and (face_result["photo_detected"] == 1 or is_icse))
+    is_icse = detections.board_name == "ICSE"
+    is_valid = (detections.board_id != -1 and detections.tables_found == 1 and (detections.photo_detected == 1 or is_icse))
     overall_status = "VALID MARKSHEET" if is_valid else "INVALID MARKSHEET"
     status_color = (0, 255, 0) if overall_status == "VALID MARKSHEET" else (0, 0, 255)
     
@@ -137,19 +113,76 @@ def create_annotated_image(image_path, logo_result, face_result, table_result, o
         return False
 
 
+def emit_event(on_event, stage, data):
+    """Report a pipeline event to an on_event callback (if any); callback errors never fail the pipeline"""
+    if on_event is None:
+        return
+    try:
+        on_event(stage, data)
+    except Exception as e:
+        print(f"(Non-blocking) Event callback failed for {stage}: {e}")
+
+
 class MarksheetProcessor:
     """Complete marksheet processing pipeline"""
     
-    def __init__(self, logo_model_path="models\\logo.pt", table_model_path="models\\tt_finetuned"):
+    def __init__(self, logo_model_path="models\\logo.pt", table_model_path="models\\tt_finetuned", logo_batched=True,
+                 confidence_threshold=0.5, info_threshold=0.5, marks_threshold=0.8, table_batch_size=8, backend="torch",
+                 table_variant="fp32", detect_max_side=1600, page_workers=2, pdf_dpi=DEFAULT_PDF_DPI,
+                 logo_threshold=LOGO_CONFIDENCE, detection_cache_dir=None, stage_workers=4, policy=None):
         """
         Initialize the marksheet processor
         
         Args:
             logo_model_path: Path to logo detection model
             table_model_path: Path to table detection model
+            logo_batched: Run the logo CLAHE sweep as one batched YOLO call
+            confidence_threshold: Table detection threshold for classes without their own threshold
+            info_threshold: Threshold for Information Tables
+            marks_threshold: Threshold for Marks Tables
+            table_batch_size: Images per table detection forward pass in batch mode
+            backend: Inference backend for both detectors: "torch", "onnx" (graphs from scripts/export_onnx.py) or "auto"
+            table_variant: Table model variant: "fp32" or "int8" (dynamic quantization, see scripts/quant_report.py)
+            detect_max_side: Longer side images are downscaled to before logo/table detection; boxes are
+                mapped back to original coordinates (None or 0 disables)
+            page_workers: Pages of a PDF document processed concurrently
+            pdf_dpi: Resolution PDF pages are rendered at
+            logo_threshold: Minimum confidence of a logo hit
+            detection_cache_dir: Keep raw detector output per image here (scripts/detection_cache.py) so
+                repeat images and threshold changes skip inference (None disables)
+            stage_workers: Threads running the independent stages of one marksheet (see marksheet_stages)
+            policy: PipelinePolicy with the statuses that stop a marksheet early and the skipped stages
+                (default: abort on invalid_logo, skip face detection for ICSE)
         """
+        # Constructor arguments, so batch worker processes can build an identical processor
+        self.init_kwargs = dict(
+            logo_model_path=logo_model_path, table_model_path=table_model_path, logo_batched=logo_batched,
+            confidence_threshold=confidence_threshold, info_threshold=info_threshold,
+            marks_threshold=marks_threshold, table_batch_size=table_batch_size, backend=backend,
+            table_variant=table_variant, detect_max_side=detect_max_side, page_workers=page_workers,
+            pdf_dpi=pdf_dpi, logo_threshold=logo_threshold, detection_cache_dir=detection_cache_dir,
+            stage_workers=stage_workers, policy=policy
+        )
         self.logo_model_path = logo_model_path
         self.table_model_path = table_model_path
+        self.logo_batched = logo_batched
+        self.confidence_threshold = confidence_threshold
+        self.info_threshold = info_threshold
+        self.marks_threshold = marks_threshold
+        self.table_batch_size = max(1, int(table_batch_size))
+        self.backend = backend
+        self.table_variant = table_variant
+        self.detect_max_side = detect_max_side or None
+        self.page_workers = max(1, int(page_workers))
+        self.pdf_dpi = pdf_dpi
+        self.logo_threshold = logo_threshold
+        self.detection_cache = DetectionCache(detection_cache_dir) if detection_cache_dir else None
+        self.stage_workers = max(1, int(stage_workers))
+        self._stage_pool = None
+        self._stage_pool_lock = threading.Lock()
+        self.policy = policy or PipelinePolicy()
+        # Models are loaded once per process and shared by every processor instance
+        self.models = get_registry()
         
         # Verify model paths exist
         if not os.path.exists(logo_model_path):
@@ -158,64 +191,413 @@ class MarksheetProcessor:
         if not os.path.exists(table_model_path):
             print(f"Warning: Table model not found at {table_model_path}")
     
-    def process_single_marksheet(self, image_path, output_dir=None, save_intermediate=False):
+    def preload_models(self):
         """
-        Process a single marksheet through the complete pipeline
+        Load all detection models into the shared registry ahead of the first request
+        
+        Returns:
+            list: Load time and memory per resident model
+        """
+        return self.models.preload(self.logo_model_path, self.table_model_path, backend=self.backend,
+                                   table_variant=self.table_variant)
+    
+    def config_fingerprint(self):
+        """
+        Everything besides the input that changes pipeline output: model versions, backend and thresholds
+        
+        Returns:
+            dict: JSON-serializable settings, used in result cache keys
+        """
+        return {
+            **self.detector_setup(),
+            "logo_batched": self.logo_batched,
+            "logo_threshold": self.logo_threshold,
+            "confidence_threshold": self.confidence_threshold,
+            "info_threshold": self.info_threshold,
+            "marks_threshold": self.marks_threshold,
+            "pdf_dpi": self.pdf_dpi,
+            "policy": self.policy.describe(),
+        }
+    
+    def detector_setup(self):
+        """Settings that change raw detector output (thresholds excluded)"""
+        return {
+            "logo_model": model_version(self.logo_model_path),
+            "table_model": model_version(self.table_model_path),
+            "backend": self.backend,
+            "table_variant": self.table_variant,
+            "detect_max_side": self.detect_max_side,
+        }
+    
+    def raw_detections(self, image_path):
+        """
+        Raw logo and table detector output for an image, from the detection cache when present
         
         Args:
-            image_path: Path to input marksheet image
-            output_dir: Directory to save results (optional)
-            save_intermediate: Whether to save intermediate processing steps (ignored - only saves final annotated image)
+            image_path: Path to input marksheet image or ImageContext
             
         Returns:
-            dict: Complete processing results
+            RawDetections: Unthresholded output; see scripts/detection_cache.rethreshold
         """
-        print(f"\n=== Processing Marksheet: {os.path.basename(image_path)} ===")
+        ctx = ImageContext.coerce(image_path)
+        setup = self.detector_setup()
+        key = DetectionCache.key(ctx.digest, setup)
+        raw = self.detection_cache.load(key) if self.detection_cache is not None else None
+        if raw is None:
+            processor, model = self.models.table_detector(self.table_model_path, self.backend, self.table_variant)
+            table = detect_tables_raw(ctx, processor, model, max_side=self.detect_max_side)
+            logo = detect_logo_raw(ctx, self.logo_model_path, backend=self.backend, max_side=self.detect_max_side)
+            raw = RawDetections(table, logo, raw_meta(ctx.source or ctx.name, setup))
+            if self.detection_cache is not None:
+                self.detection_cache.save(key, raw)
+        return raw
+    
+    def rethreshold(self, image_path, confidence_threshold=None, info_threshold=None, marks_threshold=None,
+                    logo_threshold=None):
+        """
+        Board and table decisions for other thresholds, from raw detector output (cached when enabled)
         
-        # Initialize results dictionary
-        results = {
-            "input_image": image_path,
-            "preprocessing": {},
-            "logo_detection": {},
-            "face_detection": {},
-            "table_detection": {},
-            "overall_status": "unknown"
+        Args:
+            image_path: Path to input marksheet image or ImageContext
+            confidence_threshold, info_threshold, marks_threshold, logo_threshold: Overrides; None keeps
+                the processor's own value
+            
+        Returns:
+            dict: board_id, board_name, tables_found and table_coordinates as in process_single_marksheet
+        """
+        ctx = ImageContext.coerce(image_path)
+        detections = rethreshold(
+            self.raw_detections(ctx),
+            confidence_threshold=self.confidence_threshold if confidence_threshold is None else confidence_threshold,
+            info_threshold=self.info_threshold if info_threshold is None else info_threshold,
+            marks_threshold=self.marks_threshold if marks_threshold is None else marks_threshold,
+            logo_threshold=self.logo_threshold if logo_threshold is None else logo_threshold,
+            image_path=ctx.source or ctx.name,
+        )
+        return {
+            "board_id": detections.board_id,
+            "board_name": detections.board_name,
+            "tables_found": detections.tables_found,
+            "table_coordinates": detections.table_coordinates(),
         }
+    
+    def detect_logo(self, image_path, raw=None, logo=None):
+        """Step 2: board logo as (board_id, boxes, scores); logo from a batched run is passed through"""
+        print("Step 2: Detecting board logo...")
+        if logo is None and raw is not None:
+            logo = logo_from_raw(raw.logo, self.logo_threshold)
+        elif logo is None:
+            logo = detect_logo_with_boxes_and_scores(
+                image_path, self.logo_model_path, batched=self.logo_batched, backend=self.backend,
+                max_side=self.detect_max_side, conf_threshold=self.logo_threshold
+            )
+        print(f"✓ Logo detection completed - Board: {BOARD_NAMES.get(logo[0], 'Unknown')}")
+        return logo
+    
+    def detect_face_rects(self, image_path):
+        """Step 3: candidate photo rectangles"""
+        print("Step 3: Detecting candidate photo...")
+        face_rects = detect_faces(image_path) or []
+        print(f"✓ Face detection completed - Photo detected: {1 if face_rects else 0}")
+        return face_rects
+    
+    def detect_table_data(self, image_path, table_data=None, raw=None):
+        """Step 4: tables as [(box, label, score), ...]; table_data from a batched run is passed through"""
+        print("Step 4: Detecting tables...")
+        if table_data is None and raw is not None and raw.table is not None:
+            table_data = tables_from_raw(raw.table, self.confidence_threshold, self.info_threshold,
+                                         self.marks_threshold)
+        if table_data is None:
+            table_data = detect_tables_with_boxes_and_scores(
+                image_path,
+                model_path=self.table_model_path,
+                confidence_threshold=self.confidence_threshold,
+                info_threshold=self.info_threshold,
+                marks_threshold=self.marks_threshold,
+                fix_orientation=True,
+                backend=self.backend,
+                variant=self.table_variant,
+                max_side=self.detect_max_side
+            )
+        print(f"✓ Table detection completed - Tables found: {len(table_data)}")
+        return table_data
+    
+    @staticmethod
+    def assemble_detections(ctx, logo, face_rects, table_data):
+        """DetectionResult from the outputs of the logo, face and table steps"""
+        board_id, logo_boxes, logo_scores = logo
+        detections = DetectionResult(ctx.source or ctx.name, board_id=board_id, logo_boxes=logo_boxes,
+                                     logo_scores=logo_scores, face_rects=face_rects)
+        detections.set_tables(table_data)
+        return detections
+    
+    def detect(self, image_path, table_data=None):
+        """
+        Run logo, face and table detection once on an image, one after another
         
-        try:
+        Args:
+            image_path: Path to input marksheet image or ImageContext
+            table_data: Precomputed table detections [(box, label, score), ...] from a batched run (optional)
+            
+        Returns:
+            DetectionResult: Boxes, labels, scores, board id and face rectangles
+        """
+        # All three detectors share one decode of the image
+        ctx = ImageContext.coerce(image_path)
+        # With a detection cache, thresholds are applied to cached raw output instead of re-running models
+        raw = self.raw_detections(ctx) if self.detection_cache is not None else None
+        
+        logo = self.detect_logo(ctx, raw)
+        face_rects = self.detect_face_rects(ctx)
+        table_data = self.detect_table_data(ctx, table_data, raw)
+        return self.assemble_detections(ctx, logo, face_rects, table_data)
+    
+    def stage_executor(self):
+        """Thread pool running the stages of process_single_marksheet (created on first use)"""
+        with self._stage_pool_lock:
+            if self._stage_pool is None:
+                self._stage_pool = ThreadPoolExecutor(max_workers=self.stage_workers, thread_name_prefix="stage")
+            return self._stage_pool
+    
+    def marksheet_stages(self, ctx, table_data=None, sink=NULL_SINK, source_dir=None, on_event=None, cancel=None,
+                         logo_data=None):
+        """
+        Stage graph of one marksheet
+        
+        preprocess, logo, face and tables run concurrently; OCR starts as soon as the table boxes
+        (and the preprocessing and policy checks) are done; annotation runs alongside OCR.
+        self.policy decides which checks abort the marksheet (PipelineAborted) and which stages are
+        skipped; face detection waits for the board when the policy depends on it, and table
+        detection waits for the logo check when a missing logo aborts, so a logo-less upload never
+        reaches the table model.
+        
+        Returns:
+            StageGraph: stages preprocess, raw, logo, logo_check, face, tables, tables_check,
+            detections, ocr and annotate (unless skipped by the policy); OCR texts are reported
+            to on_event as "ocr_info" / "ocr_marks" as they arrive; with a cancelled CancelToken,
+            stages that have not started yet raise Cancelled and OCR stops polling. table_data and
+            logo_data from batched runs replace the table and logo detector calls.
+        """
+        stem = ctx.stem
+        policy = self.policy
+        cancel = ensure_token(cancel)
+        
+        def preprocess():
             # Step 1: Preprocessing (cropping only) - save cropped image
             print("Step 1: Preprocessing marksheet (cropping only)...")
             processed_image, original_image, crop_coords = preprocess_marksheet(
-                image_path, 
+                ctx, 
                 output_path=None,  # We'll handle saving separately
                 save_intermediate=False  # No intermediate saves
             )
             
             # Save the preprocessed (cropped) image
-            if output_dir:
-                output_path = Path(output_dir)
-                output_path.mkdir(exist_ok=True)
-                preprocessed_path = output_path / f"{Path(image_path).stem}_preprocessed.jpg"
+            preprocessed_path = sink.save_image("preprocessed", stem, processed_image, source_dir)
+            if preprocessed_path:
+                print(f"✓ Preprocessing completed - Cropped image saved to: {preprocessed_path}")
             else:
-                preprocessed_path = Path(image_path).parent / f"{Path(image_path).stem}_preprocessed.jpg"
-            
-            cv2.imwrite(str(preprocessed_path), processed_image)
-            
-            results["preprocessing"] = {
+                print("✓ Preprocessing completed")
+            return {
                 "status": "success",
                 "crop_coordinates": crop_coords,
                 "processed_image_shape": processed_image.shape,
-                "preprocessed_image": str(preprocessed_path)
+                "preprocessed_image": preprocessed_path
             }
+        
+        def logo_check(logo):
+            board_id = logo[0]
+            policy.check("invalid_logo", board_id == -1, "logo", "No board logo detected")
+            return BOARD_NAMES.get(board_id, "Unknown")
+        
+        def face(logo_check=None):
+            # None marks a skipped stage (e.g. ICSE, where the photo is optional)
+            if not policy.runs("face", logo_check):
+                print("Step 3: Face detection skipped by policy")
+                return None
+            face_rects = self.detect_face_rects(ctx)
+            policy.check("no_photo", not face_rects and logo_check != "ICSE", "face", "No candidate photo detected")
+            return face_rects
+        
+        def tables_check(tables):
+            policy.check("no_tables", not tables, "tables", "No information or marks table detected")
+        
+        def ocr(tables, preprocess, logo_check, tables_check, **face):
+            if not policy.runs("ocr", logo_check):
+                return None
+            # Lazy import to avoid import-time failures if environment is not set up
+            from scripts.ocr import ocr_table_texts
+            coordinates = self.assemble_detections(ctx, (-1, [], []), [], tables).table_coordinates()
+            # OCR the best info and marks tables straight from the decoded image
+            return ocr_table_texts(ctx, coordinates,
+                                   on_text=lambda key, text: emit_event(on_event, f"ocr_{key}", {"text": text}),
+                                   cancel=cancel)
+        
+        def annotate(detections):
+            if not policy.runs("annotate", detections.board_name):
+                return None
+            annotated_path = sink.prepare("annotated", stem, source_dir)
+            if annotated_path and create_annotated_image(ctx, detections, str(annotated_path)):
+                return str(annotated_path)
+            return None
+        
+        # Face detection needs the board when a board skips it or when a missing photo aborts
+        face_deps = ("logo_check",) if ("no_photo" in policy.abort_on or any(
+            "face" in stages for stages in policy.board_skip_stages.values())) else ()
+        
+        graph = StageGraph()
+        
+        def add(name, fn, deps=()):
+            def run(**results):
+                cancel.check()
+                return fn(**results)
+            graph.add(name, run, deps)
+        
+        add("preprocess", preprocess)
+        # With a detection cache, thresholds are applied to cached raw output instead of re-running models
+        add("raw", lambda: self.raw_detections(ctx) if self.detection_cache is not None else None)
+        add("logo", lambda raw: self.detect_logo(ctx, raw, logo_data), deps=("raw",))
+        add("logo_check", logo_check, deps=("logo",))
+        add("face", face, deps=face_deps)
+        # The table model is the most expensive detector; skip it for uploads the logo check rejects
+        table_deps = ("raw", "logo_check") if "invalid_logo" in policy.abort_on else ("raw",)
+        add("tables", lambda raw, **checks: self.detect_table_data(ctx, table_data, raw), deps=table_deps)
+        add("tables_check", tables_check, deps=("tables",))
+        add("detections",
+            lambda logo, face, tables, **checks: self.assemble_detections(ctx, logo, face or [], tables),
+            deps=("logo", "face", "tables", "logo_check", "tables_check"))
+        # Remote OCR only runs once the logo and table checks (and the photo check, when a missing
+        # photo aborts) have passed
+        ocr_deps = ("tables", "preprocess", "logo_check", "tables_check")
+        if "no_photo" in policy.abort_on:
+            ocr_deps += ("face",)
+        add("ocr", ocr, deps=ocr_deps)
+        if policy.runs("annotate"):
+            add("annotate", annotate, deps=("detections",))
+        return graph
+    
+    def detect_tables_batch(self, image_paths):
+        """
+        Run table detection over many images, table_batch_size images per forward pass
+        
+        Args:
+            image_paths: List of image paths
             
-            print(f"✓ Preprocessing completed - Cropped image saved to: {preprocessed_path}")
+        Returns:
+            dict: image_path -> [(box, label, score), ...]; None for images that failed in the batch
+        """
+        return detect_tables_batch_with_boxes_and_scores(
+            image_paths,
+            model_path=self.table_model_path,
+            confidence_threshold=self.confidence_threshold,
+            info_threshold=self.info_threshold,
+            marks_threshold=self.marks_threshold,
+            fix_orientation=True,
+            batch_size=self.table_batch_size,
+            backend=self.backend,
+            variant=self.table_variant,
+            max_side=self.detect_max_side
+        )
+    
+    def detect_logo_batch(self, image_paths):
+        """
+        Run logo detection over many images, the CLAHE variants of table_batch_size images per YOLO call
+        
+        Args:
+            image_paths: List of image paths or ImageContexts
             
-            # Step 2: Logo Detection
-            print("Step 2: Detecting board logo...")
-            logo_result = detect_logo(image_path, self.logo_model_path)
+        Returns:
+            dict: image_path -> (board_id, boxes, scores); None for images that failed in the batch
+        """
+        return detect_logo_batch_with_boxes_and_scores(
+            image_paths,
+            self.logo_model_path,
+            backend=self.backend,
+            max_side=self.detect_max_side,
+            conf_threshold=self.logo_threshold,
+            batch_size=self.table_batch_size
+        )
+    
+    def stream_stage_events(self, ctx, stages, on_event):
+        """Emit preprocess, logo, face and tables events as soon as each of those stages succeeds"""
+        views = {
+            "preprocess": lambda pre: {"crop_coordinates": pre["crop_coordinates"],
+                                       "processed_image_shape": pre["processed_image_shape"]},
+            "logo": lambda logo: {"board_id": logo[0], "board_name": BOARD_NAMES.get(logo[0], "Unknown"),
+                                  "detected": logo[0] != -1},
+            "face": lambda rects: {"skipped": rects is None, "photo_detected": 1 if rects else 0},
+            "tables": lambda tables: {
+                "tables_found": 1 if tables else 0,
+                "table_coordinates": self.assemble_detections(ctx, (-1, [], []), [], tables).table_coordinates()
+            },
+        }
+        
+        def on_done(stage, future):
+            if not future.cancelled() and future.exception() is None:
+                emit_event(on_event, stage, views[stage](future.result()))
+        
+        for stage in views:
+            stages[stage].add_done_callback(lambda future, stage=stage: on_done(stage, future))
+    
+    def process_single_marksheet(self, image_path, output_dir=None, save_intermediate=False, table_data=None,
+                                 sink=None, on_event=None, cancel=None, logo_data=None):
+        """
+        Process a single marksheet through the complete pipeline
+        
+        Args:
+            image_path: Path to input marksheet image or ImageContext
+            output_dir: Directory to save results (optional)
+            save_intermediate: Whether to save intermediate processing steps (ignored - only saves final annotated image)
+            table_data: Precomputed table detections from detect_tables_batch (optional)
+            sink: ArtifactSink deciding which files are written (default: all artifacts, as before);
+                  pass scripts.artifacts.NULL_SINK to run fully in memory
+            on_event: Called as on_event(stage, data) from pipeline threads as results become available:
+                      preprocess, logo, face, tables, ocr_info, ocr_marks, status, extraction (or aborted/error);
+                      data is a JSON-serializable partial result
+            cancel: CancelToken; cancelling it fails every unfinished stage at once and stops OCR polling,
+                    and the result comes back with overall_status "cancelled"
+            logo_data: Precomputed (board_id, boxes, scores) from detect_logo_batch (optional)
             
-            board_names = {0: "Uttarakhand", 1: "CBSE", 2: "ICSE", -1: "Unknown"}
-            board_name = board_names.get(logo_result, "Unknown")
+        Returns:
+            dict: Complete processing results
+        """
+        # Decode once; every stage below reads views of the same image
+        ctx = ImageContext.coerce(image_path)
+        image_path = ctx.source or ctx.name
+        stem = ctx.stem
+        source_dir = Path(ctx.source).parent if ctx.source else None
+        if sink is None:
+            sink = ArtifactSink(output_dir=output_dir)
+        print(f"\n=== Processing Marksheet: {os.path.basename(image_path)} ===")
+        
+        # Initialize results dictionary
+        results = {
+            "input_image": image_path,
+            "preprocessing": {},
+            "logo_detection": {},
+            "face_detection": {},
+            "table_detection": {},
+            "overall_status": "unknown"
+        }
+        
+        # Independent stages run concurrently; see marksheet_stages
+        cancel = ensure_token(cancel)
+        graph = self.marksheet_stages(ctx, table_data, sink, source_dir, on_event, cancel, logo_data)
+        stages = graph.run(self.stage_executor())
+        if on_event is not None:
+            self.stream_stage_events(ctx, stages, on_event)
+        # Waiters below return as soon as the token is cancelled; a running detector finishes in the background
+        unregister_cancel = cancel.add_callback(lambda: StageGraph.abort(stages, Cancelled(cancel.reason)))
+        
+        try:
+            # Steps 2-4: Logo, face and table detection (one forward pass per model); fails fast when
+            # the policy aborts the marksheet
+            detections = stages["detections"].result()
+            results["preprocessing"] = stages["preprocess"].result()
+            logo_result = detections.board_id
+            board_name = detections.board_name
+            face_result = detections.face_result()
+            face_skipped = stages["face"].result() is None
+            table_result = detections.tables_found
             
             results["logo_detection"] = {
                 "status": "success",
@@ -224,68 +606,21 @@ class MarksheetProcessor:
                 "detected": logo_result != -1
             }
             
-            print(f"✓ Logo detection completed - Board: {board_name}")
-            
-            # Step 3: Face Detection
-            print("Step 3: Detecting candidate photo...")
-            face_result = detect_candidate_photo(image_path, logo_result)
-            
             results["face_detection"] = {
-                "status": "success",
+                "status": "skipped" if face_skipped else "success",
                 "photo_detected": face_result["photo_detected"],
                 "board": face_result["board"]
             }
             
-            print(f"✓ Face detection completed - Photo detected: {face_result['photo_detected']}")
-            
-            # Step 4: Table Detection
-            print("Step 4: Detecting tables...")
-            table_result = detect_tables(
-                image_path,
-                model_path=self.table_model_path,
-                confidence_threshold=0.5,
-                info_threshold=0.5,
-                marks_threshold=0.8,
-                save_results=False,  # No matplotlib popup
-                fix_orientation=True
-            )
-            
-            # Get table coordinates and confidence scores for saving
-            table_coordinates = []
-            if table_result == 1:
-                try:
-                    from predict_table import detect_tables_with_boxes_and_scores
-                    table_data = detect_tables_with_boxes_and_scores(image_path, self.table_model_path)
-                    for i, (box, label, confidence) in enumerate(table_data):
-                        x1, y1, x2, y2 = box
-                        table_type = "Information Table" if label == 0 else "Marks Table"
-                        table_coordinates.append({
-                            "table_id": i + 1,
-                            "table_type": table_type,
-                            "confidence": float(confidence),
-                            "coordinates": {
-                                "x1": float(x1),
-                                "y1": float(y1), 
-                                "x2": float(x2),
-                                "y2": float(y2)
-                            },
-                            "width": float(x2 - x1),
-                            "height": float(y2 - y1)
-                        })
-                except Exception as e:
-                    print(f"Failed to get table coordinates: {e}")
-            
             results["table_detection"] = {
                 "status": "success",
                 "tables_found": table_result,
                 "has_tables": table_result == 1,
-                "table_coordinates": table_coordinates
+                "table_coordinates": detections.table_coordinates()
             }
             
-            print(f"✓ Table detection completed - Tables found: {table_result}")
-            
-            # Determine overall status (ICSE photo optional)
-            is_icse = (board_name == "ICSE")
+            # Determine overall status (ICSE photo optional, as is a photo the policy did not look for)
+            is_icse = (board_name == "ICSE") or face_skipped
             if (logo_result != -1 and 
                 (face_result["photo_detected"] == 1 or is_icse) and 
                 table_result == 1):
@@ -298,81 +633,79 @@ class MarksheetProcessor:
                 results["overall_status"] = "no_photo"
             else:
                 results["overall_status"] = "partial_match"
+            emit_event(on_event, "status", {
+                "overall_status": results["overall_status"],
+                "board_name": board_name,
+                "photo_detected": face_result["photo_detected"],
+                "tables_found": table_result
+            })
             
-            # Save intermediate detection results as JSON (needed by OCR module)
-            if output_dir:
-                results_path = output_path / f"{Path(image_path).stem}_result.json"
-            else:
-                results_path = Path(image_path).parent / f"{Path(image_path).stem}_result.json"
-            
+            # Save intermediate detection results as JSON
             try:
-                with open(results_path, 'w') as f:
-                    json.dump(results, f, indent=2)
-                print(f"✓ Results saved to: {results_path}")
-                results["results_file"] = str(results_path)
+                results_path = sink.save_json("result", stem, results, source_dir)
+                if results_path:
+                    print(f"✓ Results saved to: {results_path}")
+                    results["results_file"] = results_path
             except Exception as e:
                 print(f"✗ Failed to save results JSON: {e}")
             
             # Persist table coordinates JSON to data/output/table_coordinates
             try:
-                table_coords_dir = Path("data/output/table_coordinates")
-                table_coords_dir.mkdir(parents=True, exist_ok=True)
-                coords_out_path = table_coords_dir / f"{Path(image_path).stem}.json"
-                with open(coords_out_path, 'w', encoding='utf-8') as f:
-                    json.dump({
-                        "file": str(image_path),
-                        "table_coordinates": results["table_detection"].get("table_coordinates", [])
-                    }, f, indent=2)
-                print(f"✓ Table coordinates saved to: {coords_out_path}")
+                coords_out_path = sink.save_json("table_coordinates", stem, {
+                    "file": str(image_path),
+                    "table_coordinates": results["table_detection"].get("table_coordinates", [])
+                })
+                if coords_out_path:
+                    print(f"✓ Table coordinates saved to: {coords_out_path}")
             except Exception as e:
                 print(f"✗ Failed to save table coordinates JSON: {e}")
 
-            # Run OCR on detected tables and extract structured data JSON via new module
+            # OCR was started as soon as the tables were found; extract structured data JSON via new module
+            cancel.check()
             try:
-                # Lazy import to avoid import-time failures if environment is not set up
-                from scripts.ocr import process_image_with_tables as ocr_process_image_with_tables
-                from scripts.extractor import create_final_results_dir as extractor_create_results_dir, process_file as extractor_process_file
-                # Ensure output dirs used by the new module exist
-                extractor_create_results_dir()
-                # Generate info and marks text files in ./results using the detection JSON
-                ocr_process_image_with_tables(image_path, str(results_path))
-                # Use extractor to parse the OCR text files and build final JSON
-                base_filename = Path(image_path).stem
-                extracted_data = extractor_process_file(base_filename, board_name)
-                final_json_path = Path("data/output/final_json") / f"{base_filename}.json"
+                from scripts.extractor import extract_from_texts
+                texts = stages["ocr"].result()
+                if texts is None:
+                    raise RuntimeError("skipped by policy")
+                for key, text in texts.items():
+                    if text is not None:
+                        text_path = sink.save_text("ocr_text", stem, text, key)
+                        if text_path:
+                            print(f"  Saved {key} table to: {text_path}")
+                # Use extractor to parse the OCR texts and build final JSON
+                extracted_data = extract_from_texts(texts["info"], texts["marks"], board_name, stem)
+                final_json_path = None
                 if extracted_data:
                     try:
-                        with open(final_json_path, 'w', encoding='utf-8') as f:
-                            json.dump(extracted_data, f, indent=2, ensure_ascii=False)
-                        print(f"✓ Final extracted JSON saved to: {final_json_path}")
+                        final_json_path = sink.save_json("final_json", stem, extracted_data)
+                        if final_json_path:
+                            print(f"✓ Final extracted JSON saved to: {final_json_path}")
                     except Exception as e:
                         print(f"✗ Failed to write final JSON: {e}")
                 else:
                     print("✗ Extraction returned no data; final JSON not created")
                 results["extraction"] = {
-                    "final_json": str(final_json_path),
+                    "final_json": final_json_path,
                     "extracted": extracted_data is not None,
+                    # False when a table's OCR failed; the extracted data is then incomplete
+                    "ocr_ok": not any(ocr_text_failed(texts.get(key)) for key in ("info", "marks")),
                     "data": extracted_data
                 }
+                emit_event(on_event, "extraction", {"extracted": extracted_data is not None, "data": extracted_data})
+            except Cancelled:
+                raise
             except Exception as e:
                 print(f"✗ OCR/Extraction step failed: {e}")
             
             # (Optional) Create and save annotated image - not required for final outputs
             # Keeping this step non-blocking to prioritize requested outputs
             try:
-                if output_dir:
-                    output_path = Path(output_dir)
-                    output_path.mkdir(exist_ok=True)
-                    annotated_path = output_path / f"{Path(image_path).stem}_annotated.jpg"
-                else:
-                    annotated_path = Path(image_path).parent / f"{Path(image_path).stem}_annotated.jpg"
-                success = create_annotated_image(
-                    image_path, logo_result, face_result, table_result, str(annotated_path),
-                    self.logo_model_path, self.table_model_path, board_name
-                )
-                if success:
-                    results["annotated_image"] = str(annotated_path)
+                annotated_path = stages["annotate"].result() if "annotate" in stages else None
+                if annotated_path:
+                    results["annotated_image"] = annotated_path
                     print(f"✓ Annotated image saved to: {annotated_path}")
+            except Cancelled:
+                raise
             except Exception as e:
                 print(f"(Non-blocking) Annotated image creation failed: {e}")
             
@@ -382,24 +715,155 @@ class MarksheetProcessor:
             print(f"Photo Detected: {face_result['photo_detected']}")
             print(f"Tables Found: {table_result}")
             
+        except PipelineAborted as e:
+            # Rejected by the policy; stages that have not started yet never run, and the ones still
+            # running finish before the result is returned, so their artifacts are written before it
+            StageGraph.abort(stages, e)
+            graph.wait_idle()
+            print(f"\n=== Processing Stopped: {e.status} ({e.reason}) ===")
+            results["overall_status"] = e.status
+            results["aborted"] = {"stage": e.stage, "reason": e.reason}
+            if stages["logo"].done() and not stages["logo"].exception():
+                board_id = stages["logo"].result()[0]
+                results["logo_detection"] = {
+                    "status": "success",
+                    "board_id": board_id,
+                    "board_name": BOARD_NAMES.get(board_id, "Unknown"),
+                    "detected": board_id != -1
+                }
+            emit_event(on_event, "aborted", {"overall_status": e.status, **results["aborted"]})
+        except Cancelled as e:
+            print(f"\n=== Processing Cancelled: {e} ===")
+            results["overall_status"] = "cancelled"
+            results["cancelled"] = str(e)
+            emit_event(on_event, "cancelled", {"reason": str(e)})
         except Exception as e:
+            StageGraph.abort(stages, e)
+            graph.wait_idle()
             print(f"Error processing marksheet: {e}")
             results["overall_status"] = "error"
             results["error"] = str(e)
+            emit_event(on_event, "error", {"error": str(e)})
+        finally:
+            unregister_cancel()
         
         return results
     
-    def process_batch(self, input_dir, output_dir=None, save_intermediate=False):
+    def process_document(self, pdf_source, pages="all", name=None, output_dir=None, sink=None, process_page=None,
+                         cancel=None):
+        """
+        Process the pages of a PDF concurrently
+        
+        Pages are rendered one at a time by a generator on the calling thread and handed to a
+        pool of page_workers threads, so rendering the next page overlaps with inference on the
+        pages already submitted.
+        
+        Args:
+            pdf_source: PDF path or bytes
+            pages: Page selector, e.g. "all", "1", "1-3,5" (see scripts/pdf_ingest.py)
+            name: Document file name used to name per-page outputs (default: file name of pdf_source)
+            output_dir: Directory to save results (optional)
+            sink: ArtifactSink for the per-page artifacts (optional)
+            process_page: Callable taking a page ImageContext and returning its result
+                (default: process_single_marksheet, e.g. pass college process_fixed_format instead)
+            cancel: CancelToken; no further pages are rendered once it is cancelled (raises Cancelled)
+            
+        Returns:
+            dict: page number -> result of process_page, in page order
+        """
+        if process_page is None:
+            def process_page(ctx):
+                return self.process_single_marksheet(ctx, output_dir, sink=sink, cancel=cancel)
+        
+        results = {}
+        futures = {}
+        with ThreadPoolExecutor(max_workers=self.page_workers, thread_name_prefix="pdf-page") as pool:
+            pending = set()
+            for page, ctx in iter_pdf_page_contexts(pdf_source, pages, self.pdf_dpi, name):
+                # Render at most one page ahead of the workers so decoded pages do not pile up
+                while len(pending) > self.page_workers:
+                    _, pending = wait(pending, return_when=FIRST_COMPLETED)
+                if cancel is not None:
+                    cancel.check()
+                future = pool.submit(process_page, ctx)
+                futures[future] = (page, ctx.name)
+                pending.add(future)
+        
+        for future, (page, page_name) in futures.items():
+            try:
+                results[page] = future.result()
+            except Exception as e:
+                print(f"Error processing page {page} ({page_name}): {e}")
+                results[page] = {
+                    "input_image": page_name,
+                    "overall_status": "error",
+                    "error": str(e)
+                }
+        return dict(sorted(results.items()))
+    
+    def process_marksheets(self, images, output_dir=None, sink=None, cancel=None, workers=None):
+        """
+        Process several marksheets with shared detection batches
+        
+        Logo and table detection run once over all images on the calling thread (table_batch_size
+        images per forward pass); the remaining stages of each marksheet, OCR included, then run
+        concurrently, so the OCR requests of different files overlap.
+        
+        Args:
+            images: Image paths or ImageContexts
+            output_dir: Directory to save results (optional)
+            sink: ArtifactSink for the per-image artifacts (optional)
+            cancel: CancelToken; no further marksheets are started once it is cancelled (raises Cancelled)
+            workers: Marksheets processed concurrently (default: page_workers)
+            
+        Returns:
+            list: process_single_marksheet result per image, in input order
+        """
+        contexts = [ImageContext.coerce(image) for image in images]
+        cancel = ensure_token(cancel)
+        logos, tables = {}, {}
+        # With a detection cache, each marksheet reads its cached raw output instead
+        if self.detection_cache is None and contexts:
+            cancel.check()
+            try:
+                logos = self.detect_logo_batch(contexts)
+            except Exception as e:
+                print(f"Batched logo detection failed, falling back to per-image detection: {e}")
+            cancel.check()
+            try:
+                tables = self.detect_tables_batch(contexts)
+            except Exception as e:
+                print(f"Batched table detection failed, falling back to per-image detection: {e}")
+        
+        futures = []
+        with ThreadPoolExecutor(max_workers=max(1, int(workers or self.page_workers)),
+                                thread_name_prefix="marksheet") as pool:
+            for ctx in contexts:
+                cancel.check()
+                futures.append(pool.submit(self.process_single_marksheet, ctx, output_dir, sink=sink, cancel=cancel,
+                                           table_data=tables.get(ctx), logo_data=logos.get(ctx)))
+        return [future.result() for future in futures]
+    
+    def process_batch(self, input_dir, output_dir=None, save_intermediate=False, workers=1, results_log=None,
+                      resume=False, prefetch=4, write_queue=8):
         """
         Process all marksheets in a directory
         
+        Results are not kept in memory: each one is appended to a JSONL results log as soon as its
+        image finishes (scripts/results_log.py), and the summary is computed from the log.
+        
         Args:
             input_dir: Directory containing input images
             output_dir: Directory to save results
             save_intermediate: Whether to save intermediate processing steps
+            workers: Worker processes; above 1 images are spread over a process pool (see process_batch_parallel)
+            results_log: JSONL results file (default: <output_dir>/results.jsonl)
+            resume: Keep the existing results log and skip inputs whose content hash it already records
+            prefetch: Images read and decoded ahead of inference (single-process mode)
+            write_queue: Results and artifacts queued for the writer thread (single-process mode)
             
         Returns:
-            list: List of processing results for each image
+            Path: The results log, one JSON result per line (None when there is nothing to process)
         """
         input_path = Path(input_dir)
         
@@ -411,68 +875,216 @@ class MarksheetProcessor:
         # Create output directory
         output_path.mkdir(exist_ok=True)
         
-        # Get all image files
-        image_extensions = ('.jpg', '.jpeg', '.png', '.bmp', '.tiff')
+        # Get all image files (and PDFs, processed page by page)
+        image_extensions = ('.jpg', '.jpeg', '.png', '.bmp', '.tiff', '.pdf')
         image_files = [f for f in input_path.iterdir() 
                       if f.suffix.lower() in image_extensions]
         
         if not image_files:
             print(f"No images found in {input_dir}")
-            return []
+            return None
+        
+        log = ResultsLog(results_log or output_path / "results.jsonl", resume=resume)
+        if resume:
+            print(f"Resuming {log.path}: {log.resumed} inputs already done")
         
         print(f"Processing {len(image_files)} marksheets...")
         
-        all_results = []
+        with log:
+            if workers > 1:
+                self.process_batch_parallel(image_files, output_path, log, save_intermediate, workers)
+            else:
+                self.process_batch_serial(image_files, output_path, log, save_intermediate, prefetch, write_queue)
+        
+        # Print summary over the whole log, including files finished by earlier runs
+        self.print_batch_summary(log)
+        print(f"Results log: {log.path}")
+        
+        return log.path
+    
+    def process_batch_serial(self, image_files, output_path, log, save_intermediate=False, prefetch=4, write_queue=8):
+        """
+        Process files in this process as a prefetch pipeline (scripts/prefetch.py), appending results to log
+        
+        A decoder thread reads, hashes and decodes the next `prefetch` images; this thread runs logo and table
+        detection (table_batch_size images per forward pass) and the rest of the pipeline; a writer thread
+        appends results to the log and writes the artifacts. Per-stage utilization is printed at the end.
+        """
+        pending = list(image_files)
+        if log.resumed:
+            # Hash up front on resume, so progress counts only the files still to process
+            pending = [image_file for image_file in image_files if not log.is_done(file_sha256(image_file))]
+            if len(pending) < len(image_files):
+                print(f"Skipped {len(image_files) - len(pending)} files already in the results log")
         
-        for i, image_file in enumerate(image_files):
-            print(f"\n{'='*60}")
-            print(f"Processing {i+1}/{len(image_files)}: {image_file.name}")
-            print(f"{'='*60}")
+        def decode(image_file):
+            data = image_file.read_bytes()
+            digest = hashlib.sha256(data).hexdigest()
+            if is_pdf(image_file):
+                # Pages are rendered by process_document
+                return digest, None
+            ctx = ImageContext(source=str(image_file), data=data)
+            # Decode now, on the prefetch thread (detectors read bgr, the table model reads pil)
+            if ctx.bgr is None or ctx.pil is None:
+                raise ValueError(f"Failed to decode image: {image_file}")
+            return digest, ctx
+        
+        def infer(batch):
+            # Logo and table detection run batched, one forward pass per table_batch_size images
+            # (with a detection cache, both come from the cached raw output instead)
+            contexts = [decoded[1] for _, decoded, error in batch if error is None and decoded[1] is not None]
+            batch_logos, batch_tables = {}, {}
+            if self.detection_cache is None and contexts:
+                try:
+                    batch_logos = self.detect_logo_batch(contexts)
+                except Exception as e:
+                    print(f"Batched logo detection failed, falling back to per-image detection: {e}")
+                try:
+                    batch_tables = self.detect_tables_batch(contexts)
+                except Exception as e:
+                    print(f"Batched table detection failed, falling back to per-image detection: {e}")
             
-            try:
-                result = self.process_single_marksheet(
-                    str(image_file), 
-                    str(output_path), 
-                    save_intermediate
-                )
-                all_results.append(result)
-                
-                # Save individual result (optional - only if needed for debugging)
-                # result_file = output_path / f"{image_file.stem}_result.json"
-                # with open(result_file, 'w') as f:
-                #     json.dump(result, f, indent=2)
+            outputs = []
+            for image_file, decoded, error in batch:
+                progress["n"] += 1
+                print(f"\n{'='*60}")
+                print(f"Processing {progress['n']}/{len(pending)}: {image_file.name}")
+                print(f"{'='*60}")
                 
-            except Exception as e:
-                print(f"Error processing {image_file.name}: {e}")
-                error_result = {
-                    "input_image": str(image_file),
-                    "overall_status": "error",
-                    "error": str(e)
-                }
-                all_results.append(error_result)
+                if error is not None:
+                    print(f"Error processing {image_file.name}: {error}")
+                    outputs.append((image_file, None, [{
+                        "input_image": str(image_file),
+                        "overall_status": "error",
+                        "error": error
+                    }]))
+                    continue
+                digest, ctx = decoded
+                results = self.process_batch_file(ctx or image_file, output_path, save_intermediate,
+                                                  table_data=batch_tables.get(ctx), sink=sink,
+                                                  logo_data=batch_logos.get(ctx))
+                outputs.append((image_file, digest, results))
+            return outputs
         
-        # Save summary results (optional - only if needed for debugging)
-        # summary_file = output_path / "processing_summary.json"
-        # with open(summary_file, 'w') as f:
-        #     json.dump(all_results, f, indent=2)
+        def write(output):
+            _, digest, results = output
+            log.append_input(results, digest)
+        
+        progress = {"n": 0}
+        pipeline = PrefetchPipeline(decode, infer, write, decode_depth=prefetch, write_depth=write_queue,
+                                    batch_size=self.table_batch_size)
+        # Artifact files are written by the writer thread too
+        sink = DeferredArtifactSink(pipeline.defer, output_dir=str(output_path))
+        pipeline.run(pending)
+        pipeline.print_report()
+    
+    def process_batch_file(self, image_file, output_path, save_intermediate=False, table_data=None, sink=None,
+                           logo_data=None):
+        """
+        Process one file of a batch run
         
-        # Print summary
-        self.print_batch_summary(all_results)
+        Args:
+            image_file: Image or PDF path, or ImageContext of an image
+            sink: ArtifactSink for the outputs (default: all artifacts under output_path)
         
-        return all_results
+        Returns:
+            list: One result per image (one per page for PDFs); errors become "error" results
+        """
+        ctx = image_file if isinstance(image_file, ImageContext) else None
+        name = ctx.name if ctx is not None else Path(image_file).name
+        try:
+            if ctx is None and is_pdf(image_file):
+                page_results = []
+                for page, result in self.process_document(str(image_file), output_dir=str(output_path),
+                                                          sink=sink).items():
+                    result["page"] = page
+                    page_results.append(result)
+                return page_results
+            
+            result = self.process_single_marksheet(
+                ctx or str(image_file), 
+                str(output_path), 
+                save_intermediate,
+                table_data=table_data,
+                sink=sink,
+                logo_data=logo_data
+            )
+            
+            # Save individual result (optional - only if needed for debugging)
+            # result_file = output_path / f"{image_file.stem}_result.json"
+            # with open(result_file, 'w') as f:
+            #     json.dump(result, f, indent=2)
+            return [result]
+            
+        except Exception as e:
+            print(f"Error processing {name}: {e}")
+            return [{
+                "input_image": ctx.source if ctx is not None else str(image_file),
+                "overall_status": "error",
+                "error": str(e)
+            }]
+    
+    def process_batch_parallel(self, image_files, output_path, log, save_intermediate=False, workers=2):
+        """
+        Spread files over a pool of worker processes, appending each result to log
+        
+        Each worker builds its own processor from init_kwargs and loads the models once when it starts,
+        with torch intra-op threads pinned to cpu_count // workers so the pool does not oversubscribe the
+        CPU. Results are logged and reported in completion order.
+        """
+        pending = []
+        for image_file in image_files:
+            digest = file_sha256(image_file)
+            if not log.is_done(digest):
+                pending.append((image_file, digest))
+        if len(pending) < len(image_files):
+            print(f"Skipped {len(image_files) - len(pending)} files already in the results log")
+        
+        threads = max(1, (os.cpu_count() or 1) // workers)
+        print(f"Starting {workers} worker processes ({threads} torch threads each)...")
+        done = 0
+        # spawn: forked copies of a process that already started torch/OpenCV threads can deadlock
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                                 initializer=_init_batch_worker, initargs=(self.init_kwargs, threads)) as pool:
+            futures = {
+                pool.submit(_process_batch_file, str(image_file), str(output_path), save_intermediate): (image_file, digest)
+                for image_file, digest in pending
+            }
+            for future in as_completed(futures):
+                # Drop finished futures so their results are not held until the end
+                image_file, digest = futures.pop(future)
+                try:
+                    results = future.result()
+                except Exception as e:
+                    # Worker process died (e.g. out of memory); the other files carry on
+                    results = [{"input_image": str(image_file), "overall_status": "error", "error": str(e)}]
+                done += 1
+                log.append_input(results, digest)
+                for result in results:
+                    page = f" (page {result['page']})" if "page" in result else ""
+                    print(f"[{done}/{len(pending)}] {image_file.name}{page}: {result.get('overall_status')}")
     
     def print_batch_summary(self, results):
-        """Print summary of batch processing results"""
+        """Print summary of batch processing results (any iterable, read once - e.g. a ResultsLog)"""
         print(f"\n{'='*60}")
         print("BATCH PROCESSING SUMMARY")
         print(f"{'='*60}")
         
-        total = len(results)
-        valid = sum(1 for r in results if r.get("overall_status") == "valid_marksheet")
-        invalid_logo = sum(1 for r in results if r.get("overall_status") == "invalid_logo")
-        no_photo = sum(1 for r in results if r.get("overall_status") == "no_photo")
-        no_tables = sum(1 for r in results if r.get("overall_status") == "no_tables")
-        errors = sum(1 for r in results if r.get("overall_status") == "error")
+        total = valid = invalid_logo = no_photo = no_tables = errors = stopped = 0
+        board_counts = {}
+        for result in results:
+            status = result.get("overall_status")
+            total += 1
+            valid += status == "valid_marksheet"
+            invalid_logo += status == "invalid_logo"
+            no_photo += status == "no_photo"
+            no_tables += status == "no_tables"
+            errors += status == "error"
+            stopped += "aborted" in result
+            # Board distribution
+            if "logo_detection" in result:
+                board = result["logo_detection"].get("board_name", "Unknown")
+                board_counts[board] = board_counts.get(board, 0) + 1
         
         print(f"Total processed: {total}")
         print(f"Valid marksheets: {valid}")
@@ -480,20 +1092,35 @@ class MarksheetProcessor:
         print(f"No photo detected: {no_photo}")
         print(f"No tables found: {no_tables}")
         print(f"Errors: {errors}")
+        print(f"Stopped early by policy: {stopped}")
         print(f"Success rate: {(valid/total)*100:.1f}%" if total > 0 else "Success rate: 0%")
         
-        # Board distribution
-        board_counts = {}
-        for result in results:
-            if "logo_detection" in result:
-                board = result["logo_detection"].get("board_name", "Unknown")
-                board_counts[board] = board_counts.get(board, 0) + 1
-        
         print(f"\nBoard Distribution:")
         for board, count in board_counts.items():
             print(f"  {board}: {count}")
 
 
+# Processor of a batch worker process (see MarksheetProcessor.process_batch_parallel)
+_worker_processor = None
+
+
+def _init_batch_worker(init_kwargs, torch_threads):
+    """Pool initializer: pin intra-op threads, then build the processor and load its models once"""
+    global _worker_processor
+    try:
+        import torch
+        torch.set_num_threads(torch_threads)
+    except ImportError:
+        pass
+    cv2.setNumThreads(torch_threads)
+    _worker_processor = MarksheetProcessor(**init_kwargs)
+    _worker_processor.preload_models()
+
+
+def _process_batch_file(image_file, output_dir, save_intermediate):
+    return _worker_processor.process_batch_file(image_file, output_dir, save_intermediate)
+
+
 def main():
     """Main function for command-line interface"""
     parser = argparse.ArgumentParser(description="Complete Marksheet Processing Pipeline")
@@ -506,6 +1133,40 @@ def main():
                        help="Path to table detection model")
     parser.add_argument("--save-intermediate", action="store_true",
                        help="Save intermediate processing steps")
+    parser.add_argument("--batch-size", type=int, default=8,
+                       help="Images per table detection forward pass in --dir mode (default: 8)")
+    parser.add_argument("--backend", type=str, default="torch", choices=["torch", "onnx", "auto"],
+                       help="Detector inference backend; onnx needs graphs from scripts/export_onnx.py (default: torch)")
+    parser.add_argument("--table-variant", type=str, default="fp32", choices=["fp32", "int8"],
+                       help="Table model variant; int8 uses dynamic quantization (default: fp32)")
+    parser.add_argument("--max-side", type=int, default=1600,
+                       help="Downscale images to this longer side before detection; 0 disables (default: 1600)")
+    parser.add_argument("--pdf-page", type=int, default=1,
+                       help="Page processed when --image is a PDF (default: 1)")
+    parser.add_argument("--detection-cache", type=str, default=None,
+                       help="Directory for raw detector output, reused across runs and threshold changes "
+                            "(e.g. data/cache/detections; see scripts/sweep_thresholds.py)")
+    parser.add_argument("--page-workers", type=int, default=2,
+                       help="PDF pages processed concurrently in --dir mode (default: 2)")
+    parser.add_argument("--pdf-dpi", type=int, default=DEFAULT_PDF_DPI,
+                       help=f"Resolution PDF pages are rendered at (default: {DEFAULT_PDF_DPI})")
+    parser.add_argument("--abort-on", type=str, default="invalid_logo",
+                       help="Comma separated statuses that stop an image early: invalid_logo, no_tables, no_photo "
+                            "(empty string: never stop early; default: invalid_logo)")
+    parser.add_argument("--skip-stages", type=str, default="",
+                       help="Comma separated stages to skip: face, ocr, annotate")
+    parser.add_argument("--workers", type=int, default=1,
+                       help="Worker processes for --dir; each loads the models once (default: 1, in-process)")
+    parser.add_argument("--results-log", type=str, default=None,
+                       help="JSONL file --dir appends one result per image to (default: <output>/results.jsonl)")
+    parser.add_argument("--resume", action="store_true",
+                       help="Continue an interrupted --dir run: skip files already in the results log")
+    parser.add_argument("--prefetch", type=int, default=4,
+                       help="Images read and decoded ahead of inference in --dir mode (default: 4)")
+    parser.add_argument("--write-queue", type=int, default=8,
+                       help="Results and artifacts queued for the writer thread in --dir mode (default: 8)")
+    parser.add_argument("--stage-workers", type=int, default=4,
+                       help="Threads running logo, face, table and OCR stages of one image concurrently (default: 4)")
     
     args = parser.parse_args()
     
@@ -517,15 +1178,28 @@ def main():
         return
     
     # Initialize processor
-    processor = MarksheetProcessor(args.logo_model, args.table_model)
+    processor = MarksheetProcessor(args.logo_model, args.table_model, table_batch_size=args.batch_size,
+                                   backend=args.backend, table_variant=args.table_variant,
+                                   detect_max_side=args.max_side, page_workers=args.page_workers,
+                                   pdf_dpi=args.pdf_dpi, detection_cache_dir=args.detection_cache,
+                                   stage_workers=args.stage_workers,
+                                   policy=PipelinePolicy.from_spec(args.abort_on, args.skip_stages))
     
     if args.image:
         if not os.path.exists(args.image):
             print(f"Image not found: {args.image}")
             return
         
+        image = args.image
+        if is_pdf(args.image):
+            # Render only the requested page, in memory
+            image = pdf_page_context(args.image, page=args.pdf_page, dpi=args.pdf_dpi)
+            if image is None:
+                print(f"PDF has no page {args.pdf_page}: {args.image}")
+                return
+        
         result = processor.process_single_marksheet(
-            args.image, 
+            image, 
             args.output, 
             args.save_intermediate
         )
@@ -558,7 +1232,9 @@ def main():
             print(f"Directory not found: {args.dir}")
             return
         
-        processor.process_batch(args.dir, args.output, args.save_intermediate)
+        processor.process_batch(args.dir, args.output, args.save_intermediate, workers=args.workers,
+                                results_log=args.results_log, resume=args.resume, prefetch=args.prefetch,
+                                write_queue=args.write_queue)
 
 
 if __name__ == "__main__":
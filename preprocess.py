@@ -11,10 +11,12 @@ Returns (processed_image, original_image, crop_coords)
 where crop_coords = (x1, y1, x2, y2) in original image coordinates.
 """
 
-from typing import Tuple, Optional
+from typing import Tuple, Optional, Union
 import cv2
 import numpy as np
 
+from scripts.image_context import ImageContext
+
 
 def _find_largest_contour_cropping_box(image_gray: np.ndarray) -> Optional[Tuple[int, int, int, int]]:
     """
@@ -68,31 +70,28 @@ def _apply_contrast_and_saturation(img_bgr: np.ndarray) -> np.ndarray:
     return bgr_out
 
 
-def preprocess_marksheet(image_path: str,
+def preprocess_marksheet(image_path: Union[str, ImageContext],
                          output_path: Optional[str] = None,
                          save_intermediate: bool = False):
     """
     Load an image, crop to the marksheet region, enhance contrast and reduce saturation.
 
     Args:
-        image_path: Path to the input image
+        image_path: Path to the input image, or an ImageContext that is already decoded
         output_path: Optional path to save the processed image (unused when None)
         save_intermediate: Whether to save intermediate images (not used; kept for compatibility)
 
     Returns:
         processed_image (np.ndarray), original_image (np.ndarray), crop_coords (x1,y1,x2,y2)
     """
-    original = cv2.imread(image_path)
+    ctx = ImageContext.coerce(image_path)
+    original = ctx.bgr
     if original is None:
-        raise FileNotFoundError(f"Failed to read image: {image_path}")
-
-    # Ensure portrait orientation similar to downstream expectations
-    h, w = original.shape[:2]
-    img = original.copy()
-    if w > h:
-        img = cv2.rotate(img, cv2.ROTATE_90_COUNTERCLOCKWISE)
+        raise FileNotFoundError(f"Failed to read image: {ctx.source or ctx.name}")
 
-    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+    # Ensure portrait orientation similar to downstream expectations (shared, read-only view)
+    img = ctx.portrait_bgr
+    gray = ctx.gray if img is original else cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
 
     # Find crop box
     crop_box = _find_largest_contour_cropping_box(gray)
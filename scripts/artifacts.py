@@ -0,0 +1,153 @@
+"""
+Artifact sink: the only place the pipeline writes files.
+
+The pipeline itself runs on in-memory images and returns its results; every
+file it used to write (preprocessed crop, detection JSON, table coordinates,
+OCR text, final JSON, annotated image) goes through an ArtifactSink, which
+writes only the kinds it was asked for. The CLI uses the default sink (all
+kinds, same locations as before); the API uses NULL_SINK so an upload never
+touches the filesystem.
+DeferredArtifactSink hands the writes to another thread (the batch writer in
+scripts/prefetch.py) and returns the paths right away.
+
+Locations:
+- preprocessed, result, annotated: <output_dir or source image dir>/<stem>_<kind>.<ext>
+- table_coordinates:              data/output/table_coordinates/<stem>.json
+- ocr_text:                       data/output/ocr_results/<stem>_<info|marks>.txt
+- final_json:                     data/output/final_json/<stem>.json
+"""
+
+import json
+from pathlib import Path
+from typing import Iterable, Optional
+
+import cv2
+
+ARTIFACT_KINDS = ("preprocessed", "result", "table_coordinates", "ocr_text", "final_json", "annotated")
+
+_DATA_DIRS = {
+    "table_coordinates": Path("data/output/table_coordinates"),
+    "ocr_text": Path("data/output/ocr_results"),
+    "final_json": Path("data/output/final_json"),
+}
+_SUFFIXES = {
+    "preprocessed": "_preprocessed.jpg",
+    "result": "_result.json",
+    "annotated": "_annotated.jpg",
+    "table_coordinates": ".json",
+    "final_json": ".json",
+}
+
+
+class ArtifactSink:
+    """Writes the requested kinds of pipeline artifacts to disk and skips the rest"""
+
+    def __init__(self, kinds: Iterable[str] = ARTIFACT_KINDS, output_dir: Optional[str] = None):
+        kinds = set(kinds)
+        unknown = kinds - set(ARTIFACT_KINDS)
+        if unknown:
+            raise ValueError(f"Unknown artifact kinds: {sorted(unknown)}; expected {ARTIFACT_KINDS}")
+        self.kinds = kinds
+        self.output_dir = Path(output_dir) if output_dir else None
+
+    @classmethod
+    def from_spec(cls, spec: Optional[str], output_dir: Optional[str] = None) -> "ArtifactSink":
+        """Sink from a comma separated list of kinds ("all" for every kind, empty for none)"""
+        spec = (spec or "").strip()
+        if spec == "all":
+            return cls(output_dir=output_dir)
+        return cls([k.strip() for k in spec.split(",") if k.strip()], output_dir=output_dir)
+
+    def wants(self, kind: str) -> bool:
+        return kind in self.kinds
+
+    def path(self, kind: str, stem: str, source_dir=None, suffix: Optional[str] = None) -> Path:
+        """Where an artifact of this kind is written; suffix selects the OCR text file (info/marks)"""
+        if kind == "ocr_text":
+            return _DATA_DIRS[kind] / f"{stem}_{suffix}.txt"
+        if kind in _DATA_DIRS:
+            return _DATA_DIRS[kind] / f"{stem}{_SUFFIXES[kind]}"
+        base = self.output_dir or (Path(source_dir) if source_dir else Path("data/output"))
+        return base / f"{stem}{_SUFFIXES[kind]}"
+
+    def prepare(self, kind: str, stem: str, source_dir=None, suffix: Optional[str] = None) -> Optional[Path]:
+        """Path for an artifact with its directory created, or None when this kind is not wanted"""
+        if not self.wants(kind):
+            return None
+        target = self.path(kind, stem, source_dir, suffix)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        return target
+
+    def save_image(self, kind: str, stem: str, image, source_dir=None) -> Optional[str]:
+        """Write a BGR image; returns the path, or None when this kind is not wanted"""
+        target = self.prepare(kind, stem, source_dir)
+        if target is None:
+            return None
+        if not cv2.imwrite(str(target), image):
+            raise IOError(f"Failed to write image: {target}")
+        return str(target)
+
+    def save_json(self, kind: str, stem: str, data, source_dir=None) -> Optional[str]:
+        """Write JSON data; returns the path, or None when this kind is not wanted"""
+        target = self.prepare(kind, stem, source_dir)
+        if target is None:
+            return None
+        with open(target, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+        return str(target)
+
+    def save_text(self, kind: str, stem: str, text: str, suffix: str) -> Optional[str]:
+        """Write OCR text (suffix "info" or "marks"); returns the path, or None when not wanted"""
+        target = self.prepare(kind, stem, suffix=suffix)
+        if target is None:
+            return None
+        with open(target, 'w', encoding='utf-8') as f:
+            f.write(text)
+        return str(target)
+
+
+class DeferredArtifactSink(ArtifactSink):
+    """
+    ArtifactSink that hands its file writes to submit(fn, *args) (e.g. a writer thread) and
+    returns the target path immediately; JSON is serialized up front so callers may keep
+    changing the dict they saved
+    """
+
+    def __init__(self, submit, kinds: Iterable[str] = ARTIFACT_KINDS, output_dir: Optional[str] = None):
+        super().__init__(kinds, output_dir)
+        self.submit = submit
+
+    def save_image(self, kind: str, stem: str, image, source_dir=None) -> Optional[str]:
+        target = self.prepare(kind, stem, source_dir)
+        if target is None:
+            return None
+        self.submit(_write_image, target, image)
+        return str(target)
+
+    def save_json(self, kind: str, stem: str, data, source_dir=None) -> Optional[str]:
+        target = self.prepare(kind, stem, source_dir)
+        if target is None:
+            return None
+        self.submit(_write_text, target, json.dumps(data, indent=2, ensure_ascii=False))
+        return str(target)
+
+    def save_text(self, kind: str, stem: str, text: str, suffix: str) -> Optional[str]:
+        target = self.prepare(kind, stem, suffix=suffix)
+        if target is None:
+            return None
+        self.submit(_write_text, target, text)
+        return str(target)
+
+
+def _write_image(target: Path, image):
+    if not cv2.imwrite(str(target), image):
+        raise IOError(f"Failed to write image: {target}")
+
+
+def _write_text(target: Path, text: str):
+    with open(target, 'w', encoding='utf-8') as f:
+        f.write(text)
+
+
+# Sink that writes nothing; results live only in the returned dict
+NULL_SINK = ArtifactSink(kinds=())
@@ -0,0 +1,67 @@
+"""Benchmark sequential vs batched CLAHE sweep in logo detection"""
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.detectLogo import detect_logo_with_boxes_and_scores
+from scripts.model_registry import get_registry
+
+
+def list_images(input_dir):
+    image_extensions = ('.jpg', '.jpeg', '.png', '.bmp', '.tiff')
+    return sorted(os.path.join(input_dir, f) for f in os.listdir(input_dir)
+                  if f.lower().endswith(image_extensions))
+
+
+def time_mode(image_path, model_path, batched, repeats):
+    """Best-of-N wall time (seconds) and detection result for one image"""
+    best = float("inf")
+    result = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = detect_logo_with_boxes_and_scores(image_path, model_path, batched=batched)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Logo detection CLAHE sweep benchmark")
+    parser.add_argument("--dir", type=str, default="data/input", help="Directory of marksheet images")
+    parser.add_argument("--model", type=str, default="models/logo.pt", help="Path to YOLO logo model")
+    parser.add_argument("--repeats", type=int, default=3, help="Timed runs per image and mode (default: 3)")
+    args = parser.parse_args()
+
+    images = list_images(args.dir)
+    if not images:
+        print(f"No images found in {args.dir}")
+        return
+
+    # Load once and warm up so model loading is not part of the measurement
+    get_registry().yolo(args.model)
+    detect_logo_with_boxes_and_scores(images[0], args.model, batched=False)
+    detect_logo_with_boxes_and_scores(images[0], args.model, batched=True)
+
+    print(f"{'Image':<20} | {'Sequential':>10} | {'Batched':>10} | {'Speedup':>7} | Board (seq/batch)")
+    print("-" * 75)
+    total_seq = total_batch = 0.0
+    mismatches = 0
+    for image_path in images:
+        t_seq, r_seq = time_mode(image_path, args.model, False, args.repeats)
+        t_batch, r_batch = time_mode(image_path, args.model, True, args.repeats)
+        total_seq += t_seq
+        total_batch += t_batch
+        if r_seq[0] != r_batch[0]:
+            mismatches += 1
+        print(f"{os.path.basename(image_path):<20} | {t_seq*1000:>8.0f}ms | {t_batch*1000:>8.0f}ms | "
+              f"{t_seq/t_batch:>6.2f}x | {r_seq[0]}/{r_batch[0]}")
+
+    print("-" * 75)
+    print(f"{'Total':<20} | {total_seq*1000:>8.0f}ms | {total_batch*1000:>8.0f}ms | {total_seq/total_batch:>6.2f}x")
+    print(f"Board mismatches: {mismatches}/{len(images)}")
+
+
+if __name__ == "__main__":
+    main()
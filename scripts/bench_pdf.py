@@ -0,0 +1,88 @@
+"""
+Benchmark PDF rasterization: all pages at 300 DPI (old backend behaviour) vs selected pages at a tuned DPI.
+
+For every PDF in --dir the report prints render time, number of pages rendered,
+resolution of the page handed to the pipeline and the decoded pixel memory held.
+"""
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.pdf_ingest import DEFAULT_PDF_DPI, pdf_page_count, rasterize_pdf
+
+
+def list_pdfs(input_dir):
+    return sorted(os.path.join(input_dir, f) for f in os.listdir(input_dir) if f.lower().endswith(".pdf"))
+
+
+def _pixel_mb(images):
+    return sum(img.width * img.height * len(img.getbands()) for img in images) / (1024 * 1024)
+
+
+def time_full_render(data, repeats):
+    """Old path: convert_from_bytes renders every page at 300 DPI and the caller keeps pages[0]"""
+    from pdf2image import convert_from_bytes
+
+    best = float("inf")
+    pages = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        pages = convert_from_bytes(data, dpi=300)
+        best = min(best, time.perf_counter() - start)
+    return best, pages
+
+
+def time_selected_render(data, selector, dpi, repeats):
+    best = float("inf")
+    pages = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        pages = [img for _, img in rasterize_pdf(data, selector, dpi)]
+        best = min(best, time.perf_counter() - start)
+    return best, pages
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PDF rasterization benchmark")
+    parser.add_argument("--dir", type=str, default="data/input", help="Directory of sample PDFs")
+    parser.add_argument("--pages", type=str, default="1", help="Page selector for the tuned path (default: 1)")
+    parser.add_argument("--dpi", type=str, default=f"150,{DEFAULT_PDF_DPI},300",
+                        help=f"Comma separated DPIs for the tuned path (default: 150,{DEFAULT_PDF_DPI},300)")
+    parser.add_argument("--repeats", type=int, default=3, help="Timed runs per PDF and mode (default: 3)")
+    args = parser.parse_args()
+
+    pdfs = list_pdfs(args.dir)
+    if not pdfs:
+        print(f"No PDFs found in {args.dir}")
+        return
+    dpis = [int(d) for d in args.dpi.split(",") if d.strip()]
+
+    print(f"{'PDF':<16} | {'Mode':<18} | {'Time':>8} | {'Pages':>5} | {'First page':>11} | {'Pixels':>8}")
+    print("-" * 82)
+    for pdf_path in pdfs:
+        with open(pdf_path, "rb") as f:
+            data = f.read()
+        name = os.path.basename(pdf_path)
+        print(f"{name:<16} | {'page count':<18} | {'':>8} | {pdf_page_count(data):>5} |")
+
+        t_full, full_pages = time_full_render(data, args.repeats)
+        first = full_pages[0] if full_pages else None
+        print(f"{name:<16} | {'all pages @300':<18} | {t_full*1000:>6.0f}ms | {len(full_pages):>5} | "
+              f"{(f'{first.width}x{first.height}' if first else '-'):>11} | {_pixel_mb(full_pages):>6.0f}MB")
+        del full_pages, first
+
+        for dpi in dpis:
+            t_sel, pages = time_selected_render(data, args.pages, dpi, args.repeats)
+            first = pages[0] if pages else None
+            mode = f"pages {args.pages} @{dpi}"
+            print(f"{name:<16} | {mode:<18} | {t_sel*1000:>6.0f}ms | {len(pages):>5} | "
+                  f"{(f'{first.width}x{first.height}' if first else '-'):>11} | {_pixel_mb(pages):>6.0f}MB | "
+                  f"{t_full/t_sel:.1f}x faster")
+        print("-" * 82)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Cooperative cancellation.
+
+A CancelToken is created per unit of work (an API job) and handed down through
+the pipeline. Long-running code checks it between steps (`check`) and waits on
+it instead of sleeping (`sleep`), so a cancelled upload stops polling the OCR
+service at once. Code that is waiting on futures registers a callback that
+fails or cancels them, which releases the waiting thread without waiting for
+work that cannot be interrupted (a running forward pass finishes in the
+background and its result is dropped).
+
+    token = CancelToken()
+    token.check()           # raises Cancelled once token.cancel() was called
+    token.sleep(2.0)        # like time.sleep, but wakes up (and raises) on cancel
+"""
+
+import threading
+from typing import Callable, Optional
+
+
+class Cancelled(Exception):
+    """Raised inside cancelled work; the message is the cancel reason"""
+
+
+class CancelToken:
+    """Thread-safe cancellation flag with callbacks"""
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks = []
+        self.reason = None
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self, reason: str = "cancelled") -> bool:
+        """Cancel once and run the registered callbacks; returns False if already cancelled"""
+        with self._lock:
+            if self._event.is_set():
+                return False
+            self.reason = reason
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                print(f"Warning: Cancel callback failed: {e}")
+        return True
+
+    def add_callback(self, callback: Callable[[], None]) -> Callable[[], None]:
+        """Run callback on cancel (right away if already cancelled); returns a function that unregisters it"""
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return lambda: self._remove(callback)
+        callback()
+        return lambda: None
+
+    def _remove(self, callback):
+        with self._lock:
+            if callback in self._callbacks:
+                self._callbacks.remove(callback)
+
+    def check(self):
+        if self._event.is_set():
+            raise Cancelled(self.reason)
+
+    def sleep(self, seconds: float):
+        """Sleep up to seconds; raises Cancelled as soon as the token is cancelled"""
+        if self._event.wait(max(0.0, seconds)):
+            raise Cancelled(self.reason)
+
+
+def ensure_token(cancel: Optional[CancelToken]) -> CancelToken:
+    """The given token, or a fresh one that is never cancelled"""
+    return cancel if cancel is not None else CancelToken()
@@ -0,0 +1,87 @@
+"""
+Parity check between the torch and ONNX detector backends.
+
+Runs table and logo detection with both backends on every image in a directory and
+fails (exit code 1) when labels differ, a box moves more than --box-tol pixels or a
+score drifts more than --score-tol.
+"""
+import os
+import sys
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.predict_table import detect_tables_with_boxes_and_scores
+from scripts.detectLogo import detect_logo_with_boxes_and_scores
+
+
+def list_images(input_dir):
+    image_extensions = ('.jpg', '.jpeg', '.png', '.bmp', '.tiff')
+    return sorted(os.path.join(input_dir, f) for f in os.listdir(input_dir)
+                  if f.lower().endswith(image_extensions))
+
+
+def compare_detections(reference, candidate, box_tol, score_tol):
+    """List of mismatch descriptions between two [(box, label, score), ...] lists"""
+    if len(reference) != len(candidate):
+        return [f"detection count {len(reference)} != {len(candidate)}"]
+
+    problems = []
+    # Match by label then by score order so small score swaps do not register as mismatches
+    ordered_ref = sorted(reference, key=lambda d: (d[1], -d[2]))
+    ordered_cand = sorted(candidate, key=lambda d: (d[1], -d[2]))
+    for (box_r, label_r, score_r), (box_c, label_c, score_c) in zip(ordered_ref, ordered_cand):
+        if label_r != label_c:
+            problems.append(f"label {label_r} != {label_c}")
+            continue
+        box_diff = max(abs(a - b) for a, b in zip(box_r, box_c))
+        if box_diff > box_tol:
+            problems.append(f"label {label_r}: box differs by {box_diff:.2f}px")
+        if abs(score_r - score_c) > score_tol:
+            problems.append(f"label {label_r}: score {score_r:.4f} vs {score_c:.4f}")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Torch vs ONNX detector parity check")
+    parser.add_argument("--dir", type=str, default="data/input", help="Directory of marksheet images")
+    parser.add_argument("--table-model", type=str, default="models/tt_finetuned")
+    parser.add_argument("--logo-model", type=str, default="models/logo.pt")
+    parser.add_argument("--box-tol", type=float, default=2.0, help="Max box coordinate difference in pixels")
+    parser.add_argument("--score-tol", type=float, default=0.01, help="Max score difference")
+    parser.add_argument("--skip-logo", action="store_true", help="Only check the table detector")
+    args = parser.parse_args()
+
+    images = list_images(args.dir)
+    if not images:
+        print(f"No images found in {args.dir}")
+        return 1
+
+    failures = 0
+    for image_path in images:
+        name = os.path.basename(image_path)
+        problems = []
+
+        tables_torch = detect_tables_with_boxes_and_scores(image_path, args.table_model, backend="torch")
+        tables_onnx = detect_tables_with_boxes_and_scores(image_path, args.table_model, backend="onnx")
+        problems += [f"tables: {p}" for p in compare_detections(tables_torch, tables_onnx, args.box_tol, args.score_tol)]
+
+        if not args.skip_logo:
+            cls_t, boxes_t, scores_t = detect_logo_with_boxes_and_scores(image_path, args.logo_model, backend="torch")
+            cls_o, boxes_o, scores_o = detect_logo_with_boxes_and_scores(image_path, args.logo_model, backend="onnx")
+            logo_ref = [(b, cls_t, s) for b, s in zip(boxes_t, scores_t)]
+            logo_cand = [(b, cls_o, s) for b, s in zip(boxes_o, scores_o)]
+            problems += [f"logo: {p}" for p in compare_detections(logo_ref, logo_cand, args.box_tol, args.score_tol)]
+
+        if problems:
+            failures += 1
+            print(f"FAIL {name}: " + "; ".join(problems))
+        else:
+            print(f"OK   {name}: {len(tables_torch)} tables")
+
+    print(f"\n{len(images) - failures}/{len(images)} images match within tolerance")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,12 +1,12 @@
 import os
 import re
-import json
-import tempfile
 from typing import Tuple, Optional, Dict, Any
-from pathlib import Path
 from PIL import Image
 
-from scripts.ocr import process_ocr
+from scripts.ocr import ocr_many, encode_cropped_image
+from scripts.image_context import ImageContext
+from scripts.artifacts import ArtifactSink
+from scripts.cancel import CancelToken
 
 def _clean(text: Optional[str]) -> Optional[str]:
     if not text:
@@ -14,21 +14,24 @@ def _clean(text: Optional[str]) -> Optional[str]:
     text = re.sub(r"\s+", " ", str(text)).strip()
     return text or None
 
-def crop_by_norm_box(image_path: str, norm_box: Tuple[float, float, float, float], margin_ratio: float = 0.02) -> Image.Image:
-    with Image.open(image_path) as img:
-        w, h = img.width, img.height
-        cx, cy, bw, bh = norm_box
-        x1 = int(round((cx - bw/2) * w))
-        y1 = int(round((cy - bh/2) * h))
-        x2 = int(round((cx + bw/2) * w))
-        y2 = int(round((cy + bh/2) * h))
-        pad_x = int(round((x2 - x1) * margin_ratio))
-        pad_y = int(round((y2 - y1) * margin_ratio))
-        x1 = max(0, x1 - pad_x)
-        y1 = max(0, y1 - pad_y)
-        x2 = min(w, x2 + pad_x)
-        y2 = min(h, y2 + pad_y)
-        return img.crop((x1, y1, x2, y2)).convert('RGB')
+def crop_by_norm_box(image_path, norm_box: Tuple[float, float, float, float], margin_ratio: float = 0.02) -> Image.Image:
+    ctx = ImageContext.coerce(image_path)
+    img = ctx.pil
+    if img is None:
+        raise FileNotFoundError(f"Failed to read image: {ctx.source or ctx.name}")
+    w, h = img.width, img.height
+    cx, cy, bw, bh = norm_box
+    x1 = int(round((cx - bw/2) * w))
+    y1 = int(round((cy - bh/2) * h))
+    x2 = int(round((cx + bw/2) * w))
+    y2 = int(round((cy + bh/2) * h))
+    pad_x = int(round((x2 - x1) * margin_ratio))
+    pad_y = int(round((y2 - y1) * margin_ratio))
+    x1 = max(0, x1 - pad_x)
+    y1 = max(0, y1 - pad_y)
+    x2 = min(w, x2 + pad_x)
+    y2 = min(h, y2 + pad_y)
+    return img.crop((x1, y1, x2, y2)).convert('RGB')
 
 def save_txt(dirpath: str, stem: str, suffix: str, text: str) -> str:
     os.makedirs(dirpath, exist_ok=True)
@@ -210,44 +213,41 @@ def parse_college_texts(info_text: str, marks_text: str) -> Dict[str, Any]:
     return data
 
 def process_fixed_format(
-    image_path: str,
+    image_path,
     info_norm_box: Tuple[float, float, float, float],
     marks_norm_box: Tuple[float, float, float, float],
+    sink: Optional[ArtifactSink] = None,
+    cancel: Optional[CancelToken] = None,
 ) -> Dict[str, Any]:
-    stem = Path(image_path).stem
-    ocr_dir = os.path.join("data", "output", "ocr_results")
-    final_dir = os.path.join("data", "output", "final_json")
-    coords_dir = os.path.join("data", "output", "table_coordinates")
-    os.makedirs(ocr_dir, exist_ok=True)
-    os.makedirs(final_dir, exist_ok=True)
-    os.makedirs(coords_dir, exist_ok=True)
-
-    with open(os.path.join(coords_dir, f"{stem}.json"), 'w', encoding='utf-8') as f:
-        json.dump({
-            "file": image_path,
-            "table_coordinates": [
-                {"table_id": 1, "table_type": "Information Table", "normalized": info_norm_box},
-                {"table_id": 2, "table_type": "Marks Table", "normalized": marks_norm_box},
-            ]
-        }, f, indent=2)
-
-    info_img = crop_by_norm_box(image_path, info_norm_box)
-    marks_img = crop_by_norm_box(image_path, marks_norm_box)
-
-    with tempfile.TemporaryDirectory() as td:
-        info_tmp = os.path.join(td, f"{stem}_info.jpg")
-        marks_tmp = os.path.join(td, f"{stem}_marks.jpg")
-        info_img.save(info_tmp, format='JPEG')
-        marks_img.save(marks_tmp, format='JPEG')
-        info_text = process_ocr(info_tmp)
-        marks_text = process_ocr(marks_tmp)
-
-    save_txt(ocr_dir, stem, "info", info_text)
-    save_txt(ocr_dir, stem, "marks", marks_text)
+    # Decode once; both crops share the same image
+    ctx = ImageContext.coerce(image_path)
+    stem = ctx.stem
+    # Default sink keeps writing coordinates, OCR text and final JSON under data/output
+    if sink is None:
+        sink = ArtifactSink()
+
+    sink.save_json("table_coordinates", stem, {
+        "file": ctx.source or ctx.name,
+        "table_coordinates": [
+            {"table_id": 1, "table_type": "Information Table", "normalized": info_norm_box},
+            {"table_id": 2, "table_type": "Marks Table", "normalized": marks_norm_box},
+        ]
+    })
+
+    info_img = crop_by_norm_box(ctx, info_norm_box)
+    marks_img = crop_by_norm_box(ctx, marks_norm_box)
+
+    # Encoded once in memory; both crops are OCR'd concurrently (cancel stops both and raises Cancelled)
+    if cancel is not None:
+        cancel.check()
+    texts = ocr_many({"info": encode_cropped_image(info_img), "marks": encode_cropped_image(marks_img)},
+                     cancel=cancel)
+    info_text, marks_text = texts["info"], texts["marks"]
+
+    sink.save_text("ocr_text", stem, info_text, "info")
+    sink.save_text("ocr_text", stem, marks_text, "marks")
 
     data = parse_college_texts(info_text, marks_text)
-    out_json = os.path.join(final_dir, f"{stem}.json")
-    with open(out_json, 'w', encoding='utf-8') as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
+    sink.save_json("final_json", stem, data)
 
     return data
@@ -1,11 +1,17 @@
 from pathlib import Path
 import cv2
 import numpy as np
-from ultralytics import YOLO
 import os
 
 os.environ['YOLO_VERBOSE'] = 'False'
 
+try:
+	from scripts.model_registry import get_registry
+	from scripts.image_context import ImageContext
+except ImportError:
+	from model_registry import get_registry
+	from image_context import ImageContext
+
 
 def ensure_portrait(image: np.ndarray) -> np.ndarray:
 	if image is None or image.size == 0:
@@ -25,13 +31,239 @@ def enhance_contrast(image: np.ndarray, clip_limit: float) -> np.ndarray:
 	return cv2.cvtColor(gray_eq, cv2.COLOR_GRAY2BGR)
 
 
-def detect_logo(image_path: str, model_path: str = "models\logo.pt") -> int:
+def cap_resolution(image: np.ndarray, max_side: int = None):
+	"""
+	Downscale so the longer side is at most max_side.
+	
+	Returns:
+		tuple: (resized image, scale) where original coordinates = resized coordinates / scale
+	"""
+	if image is None or image.size == 0 or not max_side:
+		return image, 1.0
+	height, width = image.shape[:2]
+	if max(height, width) <= max_side:
+		return image, 1.0
+	scale = max_side / float(max(height, width))
+	new_size = (max(1, round(width * scale)), max(1, round(height * scale)))
+	return cv2.resize(image, new_size, interpolation=cv2.INTER_AREA), scale
+
+
+CLAHE_CLIP_VALUES = tuple(range(9, 14))
+LOGO_CONFIDENCE = 0.25
+# Confidence YOLO is run at when keeping raw detections for later re-thresholding
+RAW_LOGO_CONFIDENCE = 0.05
+
+
+def contrast_variants(image: np.ndarray, clip_values=CLAHE_CLIP_VALUES) -> list:
+	"""
+	Build all CLAHE contrast variants of an image in one pass.
+	
+	The grayscale conversion is done once and the gray -> BGR expansion is a single
+	vectorized broadcast over the stacked variants, instead of two color conversions
+	per clip value as in enhance_contrast.
+	
+	Returns:
+		list: One BGR image per clip value, in the order of clip_values
+	"""
+	if image is None or image.size == 0:
+		return []
+	gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+	stacked = np.stack([
+		cv2.createCLAHE(clipLimit=float(clip_val), tileGridSize=(8, 8)).apply(gray)
+		for clip_val in clip_values
+	])
+	variants = np.repeat(stacked[..., np.newaxis], 3, axis=-1)
+	return list(variants)
+
+
+def _result_arrays(result):
+	"""(boxes xyxy, conf, cls) numpy arrays of one YOLO result (empty arrays when nothing was found)"""
+	if result is None or result.boxes is None or len(result.boxes) == 0:
+		return np.zeros((0, 4), dtype=np.float32), np.zeros(0, dtype=np.float32), np.zeros(0, dtype=np.float32)
+	return result.boxes.xyxy.cpu().numpy(), result.boxes.conf.cpu().numpy(), result.boxes.cls.cpu().numpy()
+
+
+def _best_hit(boxes, conf, cls, conf_threshold: float = LOGO_CONFIDENCE):
+	"""Best detection with conf >= threshold as (class_id, box, conf), or None"""
+	if len(conf) == 0:
+		return None
+	valid_mask = conf >= conf_threshold
+	if not valid_mask.any():
+		return None
+	best_idx = int(np.argmax(conf[valid_mask]))
+	return int(cls[valid_mask][best_idx]), boxes[valid_mask][best_idx].tolist(), float(conf[valid_mask][best_idx])
+
+
+def _best_logo_hit(result, conf_threshold: float = LOGO_CONFIDENCE):
+	"""Best detection above threshold in one YOLO result as (class_id, box, conf), or None"""
+	boxes, conf, cls = _result_arrays(result)
+	return _best_hit(boxes, conf, cls, conf_threshold)
+
+
+def detect_logo_with_boxes_and_scores(image_path: str, model_path: str = os.path.join("models", "logo.pt"), batched: bool = False, backend: str = "torch", max_side: int = None, conf_threshold: float = LOGO_CONFIDENCE) -> tuple:
+	"""
+	Detect logo in image and return class ID, bounding boxes and confidences in one pass.
+	
+	Args:
+		image_path: Path to input image or ImageContext
+		model_path: Path to YOLO model weights
+		batched: Send all CLAHE variants to YOLO as one batch instead of one predict per clip value
+		backend: "torch", "onnx" (exported logo.onnx on onnxruntime) or "auto"
+		max_side: Downscale so the longer side is at most this before CLAHE and YOLO (None keeps full resolution)
+		conf_threshold: Minimum confidence of a logo hit
+	
+	Returns:
+		tuple: (class_id, [(x1, y1, x2, y2)], [confidence]); (-1, [], []) when nothing is found.
+		Boxes are in the coordinates of the full-resolution portrait image.
+	"""
+	registry = get_registry()
+	model = registry.yolo(model_path, backend)
+	ctx = ImageContext.coerce(image_path)
+	img = ctx.portrait_bgr
+	if img is None:
+		print(f"Failed to load image: {ctx.source or ctx.name}")
+		return -1, [], []
+	
+	img, scale = cap_resolution(img, max_side)
+	
+	hit = None
+	if batched:
+		# All clip values in a single batched predict; the lowest clip value with a
+		# valid hit wins, exactly as in the sequential sweep below
+		variants = contrast_variants(img)
+		with registry.lock(registry.yolo_key(model_path, backend)):
+			results = model.predict(source=variants, verbose=False)
+		for result in results or []:
+			hit = _best_logo_hit(result, conf_threshold)
+			if hit is not None:
+				break
+	else:
+		for clip_val in CLAHE_CLIP_VALUES:
+			processed = enhance_contrast(img, float(clip_val))
+			with registry.lock(registry.yolo_key(model_path, backend)):
+				results = model.predict(source=processed, verbose=False)
+			
+			# Keep the best detection (highest confidence)
+			hit = _best_logo_hit(results[0], conf_threshold) if results else None
+			if hit is not None:
+				break
+	
+	if hit is None:
+		return -1, [], []
+	
+	class_id, box, conf = hit
+	# Map the box back to full-resolution coordinates
+	box = [v / scale for v in box]
+	return class_id, [box], [conf]
+
+
+def detect_logo_batch_with_boxes_and_scores(image_paths, model_path: str = os.path.join("models", "logo.pt"), backend: str = "torch", max_side: int = None, conf_threshold: float = LOGO_CONFIDENCE, batch_size: int = 8) -> dict:
+	"""
+	Batched CLAHE sweep over many images: the variants of batch_size images go to YOLO as one predict.
+	
+	Per image the result is the same as detect_logo_with_boxes_and_scores(batched=True).
+	
+	Returns:
+		dict: image_path -> (class_id, [(x1, y1, x2, y2)], [confidence]), or None for images that
+		could not be read or failed in the batch
+	"""
+	registry = get_registry()
+	model = registry.yolo(model_path, backend)
+	image_paths = list(image_paths)
+	batch_size = max(1, int(batch_size))
+	logos = {}
+	for start in range(0, len(image_paths), batch_size):
+		chunk = []
+		for image_path in image_paths[start:start + batch_size]:
+			ctx = ImageContext.coerce(image_path)
+			img = ctx.portrait_bgr
+			if img is None:
+				print(f"Failed to load image: {ctx.source or ctx.name}")
+				logos[image_path] = None
+				continue
+			img, scale = cap_resolution(img, max_side)
+			chunk.append((image_path, scale, contrast_variants(img)))
+		if not chunk:
+			continue
+		try:
+			with registry.lock(registry.yolo_key(model_path, backend)):
+				results = model.predict(source=[v for _, _, variants in chunk for v in variants], verbose=False)
+		except Exception as e:
+			print(f"Batched logo detection failed: {e}")
+			for image_path, _, _ in chunk:
+				logos[image_path] = None
+			continue
+		offset = 0
+		for image_path, scale, variants in chunk:
+			hit = None
+			# The lowest clip value with a valid hit wins, as in the single-image sweep
+			for result in results[offset:offset + len(variants)]:
+				hit = _best_logo_hit(result, conf_threshold)
+				if hit is not None:
+					break
+			offset += len(variants)
+			if hit is None:
+				logos[image_path] = (-1, [], [])
+			else:
+				class_id, box, conf = hit
+				logos[image_path] = (class_id, [[v / scale for v in box]], [conf])
+	return logos
+
+
+def detect_logo_raw(image_path, model_path: str = os.path.join("models", "logo.pt"), backend: str = "torch", max_side: int = None) -> list:
+	"""
+	Run the batched CLAHE sweep at RAW_LOGO_CONFIDENCE and keep every detection per clip value.
+	
+	Returns:
+		list: One (boxes [N, 4] in full-resolution portrait coordinates, conf [N], cls [N]) tuple per
+		clip value in CLAHE_CLIP_VALUES; empty list when the image cannot be read
+	"""
+	registry = get_registry()
+	model = registry.yolo(model_path, backend)
+	ctx = ImageContext.coerce(image_path)
+	img = ctx.portrait_bgr
+	if img is None:
+		print(f"Failed to load image: {ctx.source or ctx.name}")
+		return []
+	
+	img, scale = cap_resolution(img, max_side)
+	with registry.lock(registry.yolo_key(model_path, backend)):
+		results = model.predict(source=contrast_variants(img), conf=RAW_LOGO_CONFIDENCE, verbose=False)
+	raw = []
+	for result in results or []:
+		boxes, conf, cls = _result_arrays(result)
+		raw.append((boxes / scale, conf, cls))
+	return raw
+
+
+def logo_from_raw(raw: list, conf_threshold: float = LOGO_CONFIDENCE) -> tuple:
+	"""
+	Logo decision from detect_logo_raw output without running YOLO.
+	
+	Same precedence as the sweep: the lowest clip value with a hit >= conf_threshold wins,
+	with its most confident box. Valid for thresholds >= RAW_LOGO_CONFIDENCE.
+	
+	Returns:
+		tuple: (class_id, [(x1, y1, x2, y2)], [confidence]); (-1, [], []) when nothing passes
+	"""
+	for boxes, conf, cls in raw:
+		hit = _best_hit(boxes, conf, cls, conf_threshold)
+		if hit is not None:
+			class_id, box, score = hit
+			return class_id, [box], [score]
+	return -1, [], []
+
+
+def detect_logo(image_path: str, model_path: str = "models\logo.pt", batched: bool = False, backend: str = "torch", max_side: int = None) -> int:
 	"""
 	Detect logo in image and return class ID.
 	
 	Args:
 		image_path: Path to input image
 		model_path: Path to YOLO model weights
+		batched: Run the CLAHE sweep as a single batched predict
+		backend: "torch", "onnx" or "auto"
+		max_side: Downscale so the longer side is at most this before detection
 	
 	Returns:
 		0: Uttarakhand
@@ -39,71 +271,26 @@ def detect_logo(image_path: str, model_path: str = "models\logo.pt") -> int:
 		2: ICSE
 		-1: No detection
 	"""
-	model = YOLO(model_path, verbose=False)
-	img = cv2.imread(image_path)
-	if img is None:
-		return -1
-	
-	img = ensure_portrait(img)
-	
-	for clip_val in range(9, 14):
-		processed = enhance_contrast(img, float(clip_val))
-		results = model.predict(source=processed, verbose=False)
-		
-		if results and results[0].boxes is not None and len(results[0].boxes) > 0:
-			conf = results[0].boxes.conf.cpu().numpy()
-			cls = results[0].boxes.cls.cpu().numpy()
-			
-			valid_mask = conf >= 0.25
-			if valid_mask.any():
-				best_idx = int(np.argmax(conf[valid_mask]))
-				return int(cls[valid_mask][best_idx])
-	
-	return -1
+	class_id, _, _ = detect_logo_with_boxes_and_scores(image_path, model_path, batched=batched, backend=backend, max_side=max_side)
+	return class_id
 
 
-def detect_logo_with_boxes(image_path: str, model_path: str = "models\logo.pt") -> list:
+def detect_logo_with_boxes(image_path: str, model_path: str = "models\logo.pt", batched: bool = False, backend: str = "torch", max_side: int = None) -> list:
 	"""
 	Detect logo in image and return bounding boxes.
 	
 	Args:
 		image_path: Path to input image
 		model_path: Path to YOLO model weights
+		batched: Run the CLAHE sweep as a single batched predict
+		backend: "torch", "onnx" or "auto"
+		max_side: Downscale so the longer side is at most this before detection
 	
 	Returns:
 		list: List of bounding boxes [(x1, y1, x2, y2), ...]
 	"""
-	print(f"Logo detection with boxes for: {image_path}")
-	model = YOLO(model_path, verbose=False)
-	img = cv2.imread(image_path)
-	if img is None:
-		print(f"Failed to load image: {image_path}")
-		return []
-	
-	print(f"Image loaded, shape: {img.shape}")
-	img = ensure_portrait(img)
-	print(f"After portrait check, shape: {img.shape}")
-	
-	for clip_val in range(9, 14):
-		processed = enhance_contrast(img, float(clip_val))
-		results = model.predict(source=processed, verbose=False)
-		
-		if results and results[0].boxes is not None and len(results[0].boxes) > 0:
-			conf = results[0].boxes.conf.cpu().numpy()
-			cls = results[0].boxes.cls.cpu().numpy()
-			boxes = results[0].boxes.xyxy.cpu().numpy()
-			
-			print(f"Found {len(conf)} detections with confidences: {conf}")
-			valid_mask = conf >= 0.25
-			if valid_mask.any():
-				# Return the best detection (highest confidence) like the original function
-				best_idx = int(np.argmax(conf[valid_mask]))
-				best_box = boxes[valid_mask][best_idx]
-				print(f"Best detection box: {best_box}")
-				return [best_box.tolist()]
-	
-	print("No valid logo detections found")
-	return []
+	_, boxes, _ = detect_logo_with_boxes_and_scores(image_path, model_path, batched=batched, backend=backend, max_side=max_side)
+	return boxes
 
 
 if __name__ == "__main__":
@@ -0,0 +1,149 @@
+"""
+Raw-detection cache for re-thresholding without re-running inference.
+
+For each image (keyed by the SHA-256 of its decoded pixels) and detector setup
+(model versions, backend, variant, resolution cap) the cache keeps the raw,
+unthresholded model output:
+
+- table model: per-query logits and normalized boxes (detect_tables_raw)
+- logo model: every YOLO detection at RAW_LOGO_CONFIDENCE, per CLAHE clip value (detect_logo_raw)
+
+`rethreshold` turns a cached entry into board and table decisions for any set of
+thresholds in microseconds; scripts/sweep_thresholds.py runs it over the whole
+cache. Entries are .npz files under data/cache/detections, written atomically.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+import numpy as np
+
+try:
+    from scripts.detections import DetectionResult
+    from scripts.detectLogo import LOGO_CONFIDENCE, RAW_LOGO_CONFIDENCE, logo_from_raw
+    from scripts.predict_table import tables_from_raw
+except ImportError:
+    from detections import DetectionResult
+    from detectLogo import LOGO_CONFIDENCE, RAW_LOGO_CONFIDENCE, logo_from_raw
+    from predict_table import tables_from_raw
+
+# Bump when the stored arrays change meaning
+CACHE_VERSION = 1
+
+
+class RawDetections:
+    """Unthresholded table and logo detector output for one image"""
+
+    def __init__(self, table: Optional[Dict[str, Any]], logo: List[tuple], meta: Optional[Dict[str, Any]] = None):
+        self.table = table
+        self.logo = logo
+        self.meta = meta or {}
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        arrays = {"meta": np.array(json.dumps(self.meta))}
+        if self.table is not None:
+            arrays["table_logits"] = self.table["logits"]
+            arrays["table_pred_boxes"] = self.table["pred_boxes"]
+            arrays["table_size"] = np.array(self.table["size"], dtype=np.int64)
+        for i, (boxes, conf, cls) in enumerate(self.logo):
+            arrays[f"logo_boxes_{i}"] = boxes
+            arrays[f"logo_conf_{i}"] = conf
+            arrays[f"logo_cls_{i}"] = cls
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, arrays) -> "RawDetections":
+        table = None
+        if "table_logits" in arrays:
+            table = {
+                "logits": arrays["table_logits"],
+                "pred_boxes": arrays["table_pred_boxes"],
+                "size": tuple(int(v) for v in arrays["table_size"]),
+            }
+        logo = []
+        i = 0
+        while f"logo_conf_{i}" in arrays:
+            logo.append((arrays[f"logo_boxes_{i}"], arrays[f"logo_conf_{i}"], arrays[f"logo_cls_{i}"]))
+            i += 1
+        return cls(table, logo, json.loads(str(arrays["meta"])))
+
+
+def rethreshold(raw: RawDetections, confidence_threshold: float = 0.5, info_threshold: float = 0.5,
+                marks_threshold: float = 0.8, logo_threshold: float = LOGO_CONFIDENCE,
+                image_path: Optional[str] = None) -> DetectionResult:
+    """
+    Board and table decisions for the given thresholds, computed from cached raw output
+
+    Returns:
+        DetectionResult without face rectangles (the face cascade is not thresholded here);
+        use .board_name, .tables_found and .table_coordinates() for the decisions
+    """
+    if logo_threshold < RAW_LOGO_CONFIDENCE:
+        raise ValueError(f"logo_threshold below the raw capture confidence {RAW_LOGO_CONFIDENCE}")
+    board_id, logo_boxes, logo_scores = logo_from_raw(raw.logo, logo_threshold)
+    detections = DetectionResult(image_path or raw.meta.get("image", ""), board_id=board_id,
+                                 logo_boxes=logo_boxes, logo_scores=logo_scores)
+    if raw.table is not None:
+        detections.set_tables(tables_from_raw(raw.table, confidence_threshold, info_threshold, marks_threshold))
+    return detections
+
+
+class DetectionCache:
+    """On-disk store of RawDetections keyed by image digest and detector setup"""
+
+    def __init__(self, cache_dir: str = "data/cache/detections"):
+        self.cache_dir = Path(cache_dir)
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(image_digest: str, setup: Dict[str, Any]) -> str:
+        """Key from the image digest and everything that changes raw output (not thresholds)"""
+        payload = json.dumps({"v": CACHE_VERSION, "image": image_digest, **setup}, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}.npz"
+
+    def load(self, key: str) -> Optional[RawDetections]:
+        try:
+            with np.load(self._path(key), allow_pickle=False) as arrays:
+                raw = RawDetections.from_arrays(arrays)
+        except (OSError, ValueError, KeyError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return raw
+
+    def save(self, key: str, raw: RawDetections):
+        path = self._path(key)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=str(path.parent), prefix=".tmp-", suffix=".npz")
+            with os.fdopen(fd, "wb") as f:
+                np.savez_compressed(f, **raw.to_arrays())
+            os.replace(tmp, path)
+        except OSError as e:
+            print(f"Warning: Failed to write detection cache entry: {e}")
+
+    def __iter__(self) -> Iterator[RawDetections]:
+        """Every cached entry (skipping unreadable ones)"""
+        for path in sorted(self.cache_dir.glob("*/*.npz")):
+            try:
+                with np.load(path, allow_pickle=False) as arrays:
+                    yield RawDetections.from_arrays(arrays)
+            except (OSError, ValueError, KeyError):
+                continue
+
+    def stats(self) -> Dict[str, Any]:
+        return {"dir": str(self.cache_dir), "hits": self.hits, "misses": self.misses}
+
+
+def raw_meta(image_name: str, setup: Dict[str, Any]) -> Dict[str, Any]:
+    """Metadata stored next to the arrays so sweeps can filter and report by image"""
+    return {"image": image_name, "setup": setup, "created": time.time()}
@@ -0,0 +1,81 @@
+"""
+Structured detection results.
+
+A DetectionResult holds everything the detectors found on one image (logo,
+faces, tables). It is produced once per image and then read by the status
+logic, table coordinate persistence and annotation, so no stage has to run a
+model a second time.
+"""
+
+from typing import List, Optional, Tuple
+
+BOARD_NAMES = {0: "Uttarakhand", 1: "CBSE", 2: "ICSE", -1: "Unknown"}
+TABLE_TYPES = {0: "Information Table", 1: "Marks Table"}
+
+
+class DetectionResult:
+    """Logo, face and table detections for a single image"""
+
+    def __init__(self,
+                 image_path: str,
+                 board_id: int = -1,
+                 logo_boxes: Optional[List[List[float]]] = None,
+                 logo_scores: Optional[List[float]] = None,
+                 face_rects: Optional[List[Tuple[int, int, int, int]]] = None,
+                 table_boxes: Optional[List[List[float]]] = None,
+                 table_labels: Optional[List[int]] = None,
+                 table_scores: Optional[List[float]] = None):
+        self.image_path = image_path
+        self.board_id = board_id
+        self.logo_boxes = logo_boxes or []
+        self.logo_scores = logo_scores or []
+        self.face_rects = face_rects or []
+        self.table_boxes = table_boxes or []
+        self.table_labels = table_labels or []
+        self.table_scores = table_scores or []
+
+    @property
+    def board_name(self) -> str:
+        return BOARD_NAMES.get(self.board_id, "Unknown")
+
+    @property
+    def photo_detected(self) -> int:
+        return 1 if self.face_rects else 0
+
+    @property
+    def tables_found(self) -> int:
+        return 1 if self.table_boxes else 0
+
+    def set_tables(self, table_data):
+        """Store tables from detect_tables_with_boxes_and_scores output [(box, label, score), ...]"""
+        self.table_boxes = [list(box) for box, _, _ in table_data]
+        self.table_labels = [int(label) for _, label, _ in table_data]
+        self.table_scores = [float(score) for _, _, score in table_data]
+
+    def tables(self):
+        """Tables as [(box, label, score), ...] like detect_tables_with_boxes_and_scores"""
+        return list(zip(self.table_boxes, self.table_labels, self.table_scores))
+
+    def face_result(self) -> dict:
+        """Face detection in the detect_candidate_photo format"""
+        return {"board": BOARD_NAMES.get(self.board_id, "Unknown"), "photo_detected": self.photo_detected}
+
+    def table_coordinates(self) -> list:
+        """Table boxes in the format persisted to table_coordinates JSON and read by OCR"""
+        coordinates = []
+        for i, (box, label, confidence) in enumerate(self.tables()):
+            x1, y1, x2, y2 = box
+            coordinates.append({
+                "table_id": i + 1,
+                "table_type": TABLE_TYPES.get(label, "Marks Table"),
+                "confidence": float(confidence),
+                "coordinates": {
+                    "x1": float(x1),
+                    "y1": float(y1),
+                    "x2": float(x2),
+                    "y2": float(y2)
+                },
+                "width": float(x2 - x1),
+                "height": float(y2 - y1)
+            })
+        return coordinates
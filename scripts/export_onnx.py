@@ -0,0 +1,97 @@
+"""Export the table and logo detectors to ONNX for the onnxruntime backend"""
+import os
+import sys
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import torch
+from PIL import Image
+
+from scripts.model_registry import onnx_path_for
+
+
+class _TableTransformerExport(torch.nn.Module):
+    """Wraps TableTransformerForObjectDetection so the graph returns plain (logits, pred_boxes) tensors"""
+
+    def __init__(self, model):
+        super().__init__()
+        self.model = model
+
+    def forward(self, pixel_values, pixel_mask):
+        outputs = self.model(pixel_values=pixel_values, pixel_mask=pixel_mask)
+        return outputs.logits, outputs.pred_boxes
+
+
+def export_table_model(model_path, sample_image=None, opset=17):
+    """Export models/tt_finetuned to <model_path>/model.onnx with dynamic batch and spatial axes"""
+    from transformers import AutoImageProcessor, TableTransformerForObjectDetection
+
+    processor = AutoImageProcessor.from_pretrained(model_path)
+    model = TableTransformerForObjectDetection.from_pretrained(model_path)
+    model.eval()
+
+    # Trace with a real marksheet so the traced shapes match what the processor produces
+    if sample_image:
+        image = Image.open(sample_image).convert("RGB")
+    else:
+        image = Image.new("RGB", (1240, 1754), (255, 255, 255))
+    inputs = processor(images=image, return_tensors="pt")
+
+    out_path = onnx_path_for(model_path)
+    with torch.no_grad():
+        torch.onnx.export(
+            _TableTransformerExport(model),
+            (inputs["pixel_values"], inputs["pixel_mask"]),
+            out_path,
+            input_names=["pixel_values", "pixel_mask"],
+            output_names=["logits", "pred_boxes"],
+            dynamic_axes={
+                "pixel_values": {0: "batch", 2: "height", 3: "width"},
+                "pixel_mask": {0: "batch", 1: "height", 2: "width"},
+                "logits": {0: "batch"},
+                "pred_boxes": {0: "batch"},
+            },
+            opset_version=opset,
+        )
+    print(f"Table model exported to: {out_path}")
+    return out_path
+
+
+def export_logo_model(model_path):
+    """Export models/logo.pt to models/logo.onnx (dynamic batch so the batched CLAHE sweep works)"""
+    from ultralytics import YOLO
+
+    exported = YOLO(model_path).export(format="onnx", dynamic=True)
+    print(f"Logo model exported to: {exported}")
+    return exported
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export detectors to ONNX")
+    parser.add_argument("--table-model", type=str, default="models/tt_finetuned",
+                        help="Path to fine-tuned table model (default: models/tt_finetuned)")
+    parser.add_argument("--logo-model", type=str, default="models/logo.pt",
+                        help="Path to YOLO logo model (default: models/logo.pt)")
+    parser.add_argument("--sample-image", type=str, default=None,
+                        help="Marksheet image used to trace the table model")
+    parser.add_argument("--opset", type=int, default=17, help="ONNX opset version (default: 17)")
+    parser.add_argument("--skip-table", action="store_true", help="Do not export the table model")
+    parser.add_argument("--skip-logo", action="store_true", help="Do not export the logo model")
+    args = parser.parse_args()
+
+    if not args.skip_table:
+        if os.path.exists(args.table_model):
+            export_table_model(args.table_model, args.sample_image, args.opset)
+        else:
+            print(f"Table model not found: {args.table_model}")
+
+    if not args.skip_logo:
+        if os.path.exists(args.logo_model):
+            export_logo_model(args.logo_model)
+        else:
+            print(f"Logo model not found: {args.logo_model}")
+
+
+if __name__ == "__main__":
+    main()
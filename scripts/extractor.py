@@ -405,6 +405,15 @@ def process_file(filename: str, board_name: Optional[str] = None) -> Optional[Di
     with open(marks_file, 'r', encoding='utf-8') as f:
         marks_text = f.read()
 
+    return extract_from_texts(info_text, marks_text, board_name, filename)
+
+def extract_from_texts(info_text: Optional[str], marks_text: Optional[str], board_name: Optional[str] = None,
+                       filename: str = "image") -> Optional[Dict[str, Any]]:
+    """Build the final JSON from in-memory OCR texts of the info and marks tables"""
+    if info_text is None or marks_text is None:
+        print(f"Warning: Missing OCR text for {filename}")
+        return None
+
     board_type = normalize_board_name(board_name or '')
 
     if board_type == 'cbse':
@@ -1,45 +1,64 @@
-import cv2
 import json
-import os
 
-def detect_candidate_photo(image_path, board_id):
+try:
+    from scripts.model_registry import get_registry
+    from scripts.image_context import ImageContext
+except ImportError:
+    from model_registry import get_registry
+    from image_context import ImageContext
+
+def detect_faces(image_path):
     """
-    Detect candidate photo in marksheet image.
+    Detect faces in the top region of a marksheet image.
     
     Args:
-        image_path (str): Path to JPG image
-        board_id (int): 0=Uttarakhand, 1=CBSE, 2=ICSE
+        image_path (str | ImageContext): Path to JPG image or an already decoded ImageContext
     
     Returns:
-        dict: {"board": str, "photo_detected": int}
+        list: Face rectangles [(x, y, w, h), ...] in image coordinates, or None if the image could not be read
     """
-    board_names = {0: "Uttarakhand", 1: "CBSE", 2: "ICSE"}
-    board_name = board_names.get(board_id, "Unknown")
-    
+    ctx = ImageContext.coerce(image_path)
     
     # Check if image exists
-    if not os.path.exists(image_path):
-        print(f"Error: Image file '{image_path}' not found.")
-        return {"board": board_name, "photo_detected": 0}
+    if not ctx.exists():
+        print(f"Error: Image file '{ctx.source}' not found.")
+        return None
     
-    # Load image
-    img = cv2.imread(image_path)
-    if img is None:
-        print(f"Error: Could not load image '{image_path}'.")
-        return {"board": board_name, "photo_detected": 0}
+    # Load image (grayscale view is shared with other stages)
+    gray = ctx.gray
+    if gray is None:
+        print(f"Error: Could not load image '{ctx.source or ctx.name}'.")
+        return None
     
     # Crop to top 30% where photos usually appear
-    height = img.shape[0]
-    img_cropped = img[:int(height * 0.3), :]
+    height = gray.shape[0]
+    gray = gray[:int(height * 0.3), :]
+    
+    # Use Haar cascade face detector (reliable and built-in), loaded once per process
+    registry = get_registry()
+    face_cascade = registry.face_cascade()
+    with registry.lock(registry.face_key()):
+        faces = face_cascade.detectMultiScale(gray, scaleFactor=1.1, minNeighbors=5, minSize=(30, 30))
+    
+    return [tuple(int(v) for v in face) for face in faces]
+
+def detect_candidate_photo(image_path, board_id):
+    """
+    Detect candidate photo in marksheet image.
+    
+    Args:
+        image_path (str | ImageContext): Path to JPG image or ImageContext
+        board_id (int): 0=Uttarakhand, 1=CBSE, 2=ICSE
     
-    # Convert to grayscale
-    gray = cv2.cvtColor(img_cropped, cv2.COLOR_BGR2GRAY)
+    Returns:
+        dict: {"board": str, "photo_detected": int}
+    """
+    board_names = {0: "Uttarakhand", 1: "CBSE", 2: "ICSE"}
+    board_name = board_names.get(board_id, "Unknown")
     
-    # Use Haar cascade face detector (reliable and built-in)
-    face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
-    faces = face_cascade.detectMultiScale(gray, scaleFactor=1.1, minNeighbors=5, minSize=(30, 30))
+    faces = detect_faces(image_path)
     
-    return {"board": board_name, "photo_detected": 1 if len(faces) > 0 else 0}
+    return {"board": board_name, "photo_detected": 1 if faces else 0}
 
 def main():
     """Interactive main function"""
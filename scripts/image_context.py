@@ -0,0 +1,172 @@
+"""
+Decode-once image container shared by every pipeline stage.
+
+An ImageContext decodes its source a single time (with EXIF orientation applied,
+as cv2.imread does) and lazily exposes cached views:
+
+- bgr:          decoded image, HxWx3 uint8 (what cv2.imread returns)
+- rgb:          zero-copy channel-reversed view of bgr
+- gray:         single-channel grayscale
+- portrait_bgr: bgr rotated 90 degrees counter-clockwise when landscape, else bgr itself
+- pil:          RGB PIL image (for the table detector and OCR crops), built from a
+                contiguous copy of rgb since PIL cannot wrap a negative-stride view
+- digest:       SHA-256 of the decoded pixels (cache key for raw detections)
+
+Views are shared and must be treated as read-only; stages that draw on an image
+copy it first. Every image-consuming function in the pipeline accepts either a
+path or an ImageContext; `ImageContext.coerce` turns the former into the latter.
+"""
+
+import hashlib
+import io
+import os
+import threading
+from pathlib import Path
+from typing import Optional
+
+import cv2
+import numpy as np
+from PIL import Image, ImageOps
+
+_MISSING = object()
+
+
+class ImageContext:
+    """One decoded image plus cached views of it"""
+
+    def __init__(self, source: Optional[str] = None, data: Optional[bytes] = None,
+                 bgr: Optional[np.ndarray] = None, name: Optional[str] = None):
+        self.source = str(source) if source is not None else None
+        self.name = name or (os.path.basename(self.source) if self.source else "image")
+        self._data = data
+        self._views = {}
+        if bgr is not None:
+            self._views["bgr"] = bgr
+        self._lock = threading.RLock()
+
+    @classmethod
+    def from_path(cls, path) -> "ImageContext":
+        """Context for an image file; decoding happens on first access"""
+        return cls(source=path)
+
+    @classmethod
+    def from_bytes(cls, data: bytes, name: Optional[str] = None) -> "ImageContext":
+        """Context for encoded image bytes (JPEG/PNG/...), e.g. an upload body"""
+        return cls(data=data, name=name)
+
+    @classmethod
+    def from_array(cls, bgr: np.ndarray, name: Optional[str] = None) -> "ImageContext":
+        """Context around an already decoded BGR array"""
+        return cls(bgr=bgr, name=name)
+
+    @classmethod
+    def from_pil(cls, image: Image.Image, name: Optional[str] = None) -> "ImageContext":
+        """Context around a PIL image (e.g. a rasterized PDF page)"""
+        rgb = np.asarray(image.convert("RGB"))
+        ctx = cls(bgr=np.ascontiguousarray(rgb[..., ::-1]), name=name)
+        ctx._views["pil"] = image if image.mode == "RGB" else image.convert("RGB")
+        return ctx
+
+    @staticmethod
+    def coerce(source) -> "ImageContext":
+        """Return source unchanged if it already is an ImageContext, otherwise wrap the path"""
+        if isinstance(source, ImageContext):
+            return source
+        return ImageContext.from_path(source)
+
+    @property
+    def stem(self) -> str:
+        return Path(self.name).stem
+
+    def exists(self) -> bool:
+        """Whether the context has something to decode"""
+        if self._views.get("bgr") is not None or self._data is not None:
+            return True
+        return self.source is not None and os.path.exists(self.source)
+
+    def _decode(self) -> Optional[np.ndarray]:
+        if self._data is not None:
+            buffer = np.frombuffer(self._data, dtype=np.uint8)
+            image = cv2.imdecode(buffer, cv2.IMREAD_COLOR)
+        elif self.source is not None:
+            image = cv2.imread(self.source)
+        else:
+            image = None
+
+        if image is None:
+            # Formats OpenCV cannot decode (e.g. some TIFF/GIF variants) go through PIL
+            try:
+                if self._data is not None:
+                    pil = Image.open(io.BytesIO(self._data))
+                else:
+                    pil = Image.open(self.source)
+                pil = ImageOps.exif_transpose(pil).convert("RGB")
+                image = np.ascontiguousarray(np.asarray(pil)[..., ::-1])
+            except Exception:
+                return None
+        # Encoded bytes are no longer needed once decoded
+        self._data = None
+        return image
+
+    def _view(self, key, build):
+        view = self._views.get(key, _MISSING)
+        if view is not _MISSING:
+            return view
+        # Concurrent stages asking for the same view wait for one build instead of repeating it
+        with self._lock:
+            view = self._views.get(key, _MISSING)
+            if view is _MISSING:
+                view = build()
+                self._views[key] = view
+            return view
+
+    @property
+    def bgr(self) -> Optional[np.ndarray]:
+        """Decoded BGR image, or None when the source could not be decoded"""
+        return self._view("bgr", self._decode)
+
+    @property
+    def rgb(self) -> Optional[np.ndarray]:
+        bgr = self.bgr
+        return None if bgr is None else bgr[..., ::-1]
+
+    @property
+    def gray(self) -> Optional[np.ndarray]:
+        return self._view("gray", lambda: None if self.bgr is None else cv2.cvtColor(self.bgr, cv2.COLOR_BGR2GRAY))
+
+    @property
+    def portrait_bgr(self) -> Optional[np.ndarray]:
+        def build():
+            bgr = self.bgr
+            if bgr is None:
+                return None
+            height, width = bgr.shape[:2]
+            if width > height:
+                return cv2.rotate(bgr, cv2.ROTATE_90_COUNTERCLOCKWISE)
+            return bgr
+        return self._view("portrait_bgr", build)
+
+    @property
+    def pil(self) -> Optional[Image.Image]:
+        def build():
+            rgb = self.rgb
+            return None if rgb is None else Image.fromarray(np.ascontiguousarray(rgb))
+        return self._view("pil", build)
+
+    @property
+    def digest(self) -> Optional[str]:
+        """SHA-256 of the decoded pixels (identical images hash equal whatever their container)"""
+        def build():
+            bgr = self.bgr
+            if bgr is None:
+                return None
+            h = hashlib.sha256(str(bgr.shape).encode("ascii"))
+            h.update(np.ascontiguousarray(bgr).data)
+            return h.hexdigest()
+        return self._view("digest", build)
+
+    @property
+    def size(self):
+        """(width, height) of the decoded image"""
+        bgr = self.bgr
+        return None if bgr is None else (bgr.shape[1], bgr.shape[0])
@@ -0,0 +1,178 @@
+"""
+Bounded job queue for the API.
+
+Uploads are processed by a fixed-size pool of worker threads instead of on the
+event loop. `submit` creates a Job (queued -> running -> done | failed | cancelled) and
+returns it immediately, or raises QueueFull once `workers + max_pending` jobs
+are in flight, so a burst gets fast 429s instead of an ever-growing backlog.
+Each Job wraps a concurrent.futures.Future, which async endpoints can await
+with asyncio.wrap_future. Finished jobs are kept for ttl_seconds (at most
+max_finished of them) so clients can poll their results; a job whose result
+was already handed out directly is dropped with `release`.
+
+Every job carries a CancelToken that is passed to its function as `cancel=`;
+`cancel(job_id)` frees the slot of a queued job at once and signals a running
+one, which stops at its next check (see scripts/cancel.py).
+"""
+
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+try:
+    from scripts.cancel import Cancelled, CancelToken
+except ImportError:
+    from cancel import Cancelled, CancelToken
+
+JOB_STATUSES = ("queued", "running", "done", "failed", "cancelled")
+
+
+class QueueFull(Exception):
+    """Raised by JobQueue.submit when no more jobs are accepted"""
+
+
+class Job:
+    """One submitted unit of work and its outcome"""
+
+    def __init__(self, kind: str, future: Future, render: Optional[Callable[[Any], Dict[str, Any]]] = None):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.future = future
+        # Turns the function's return value into the response fields of a finished job
+        self.render = render or (lambda result: {"result": result})
+        # False once the result was handed out directly; the job is then forgotten when it finishes
+        self.keep = True
+        self.token = CancelToken()
+        self.status = "queued"
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+
+    @property
+    def done(self) -> bool:
+        return self.status in ("done", "failed", "cancelled")
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Status and timings; the result itself is rendered by the caller"""
+        info = {"job_id": self.id, "kind": self.kind, "status": self.status, "created": self.created}
+        if self.started is not None:
+            info["queued_seconds"] = round(self.started - self.created, 3)
+        if self.finished is not None and self.started is not None:
+            info["run_seconds"] = round(self.finished - self.started, 3)
+        return info
+
+
+class JobQueue:
+    """Fixed worker pool with a bounded backlog and a registry of recent jobs"""
+
+    def __init__(self, workers: int = 2, max_pending: int = 16, ttl_seconds: float = 3600, max_finished: int = 256):
+        self.workers = max(1, int(workers))
+        self.max_pending = max(0, int(max_pending))
+        self.ttl_seconds = ttl_seconds
+        self.max_finished = max(0, int(max_finished))
+        self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="job")
+        self._jobs = OrderedDict()
+        self._active = 0
+        self._lock = threading.Lock()
+        self.rejected = 0
+
+    def submit(self, kind: str, fn: Callable, *args, render: Optional[Callable[[Any], Dict[str, Any]]] = None,
+               **kwargs) -> Job:
+        """
+        Queue fn(*args, cancel=job.token, **kwargs); raises QueueFull when workers + max_pending jobs
+        are in flight. render(result) gives the response fields of the finished job (default {"result": result})
+        """
+        with self._lock:
+            self._prune()
+            if self._active >= self.workers + self.max_pending:
+                self.rejected += 1
+                raise QueueFull(f"{self._active} jobs in flight")
+            self._active += 1
+            job = Job(kind, Future(), render)
+            self._jobs[job.id] = job
+        self._pool.submit(self._run, job, fn, args, kwargs)
+        return job
+
+    def _run(self, job: Job, fn: Callable, args, kwargs):
+        with self._lock:
+            if job.status == "cancelled":
+                # Cancelled while queued; its slot was released then
+                return
+            job.started = time.time()
+            job.status = "running"
+        try:
+            result = fn(*args, cancel=job.token, **kwargs)
+        except Cancelled as e:
+            self._finish(job, "cancelled", error=e)
+        except BaseException as e:
+            self._finish(job, "failed", error=e)
+        else:
+            self._finish(job, "done", result=result)
+
+    def _finish(self, job: Job, status: str, result=None, error: Optional[BaseException] = None):
+        with self._lock:
+            job.status = status
+            job.finished = time.time()
+            self._active -= 1
+            if not job.keep:
+                self._jobs.pop(job.id, None)
+            self._prune()
+        if error is not None:
+            job.future.set_exception(error)
+        else:
+            job.future.set_result(result)
+
+    def cancel(self, job_id: str, reason: str = "cancelled") -> Optional[Job]:
+        """Cancel a queued or running job; returns the job (None if unknown)"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.done:
+                return job
+            queued = job.status == "queued"
+            if queued:
+                job.status = "cancelled"
+                job.finished = time.time()
+                self._active -= 1
+        job.token.cancel(reason)
+        if queued:
+            job.future.set_exception(Cancelled(reason))
+        return job
+
+    def release(self, job: Job):
+        """Forget a job whose result the caller has taken; a job still running is forgotten when it finishes"""
+        with self._lock:
+            job.keep = False
+            if job.done:
+                self._jobs.pop(job.id, None)
+
+    def _prune(self):
+        """Forget finished jobs older than ttl_seconds, and the oldest beyond max_finished (called with the lock held)"""
+        now = time.time()
+        finished = [job_id for job_id, job in self._jobs.items() if job.done]
+        expired = [job_id for job_id in finished if now - self._jobs[job_id].finished > self.ttl_seconds]
+        for job_id in expired:
+            del self._jobs[job_id]
+        finished = [job_id for job_id in finished if job_id in self._jobs]
+        for job_id in finished[:max(0, len(finished) - self.max_finished)]:
+            del self._jobs[job_id]
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            self._prune()
+            return self._jobs.get(job_id)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counts = {status: 0 for status in JOB_STATUSES}
+            for job in self._jobs.values():
+                counts[job.status] += 1
+            return {
+                "workers": self.workers,
+                "max_pending": self.max_pending,
+                "in_flight": self._active,
+                "rejected": self.rejected,
+                "jobs": counts,
+            }
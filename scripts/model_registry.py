@@ -0,0 +1,258 @@
+"""
+Process-wide model registry.
+
+Keeps the YOLO logo detector, the TableTransformer table detector and the Haar
+face cascade resident so each model is loaded once per process instead of once
+per call. Loading is lazy (first use) or eager via `preload`, and is guarded by
+a lock so concurrent requests never load the same model twice.
+
+Usage:
+    from scripts.model_registry import get_registry
+    model = get_registry().yolo("models/logo.pt")
+"""
+
+import contextlib
+import hashlib
+import importlib.util
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+
+def _rss_bytes() -> Optional[int]:
+    """Current resident set size of this process in bytes (None if unavailable)."""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE")
+    except Exception:
+        pass
+    try:
+        import psutil  # optional
+        return psutil.Process().memory_info().rss
+    except Exception:
+        return None
+
+
+def _torch_module_bytes(module: Any) -> Optional[int]:
+    """Size of parameters and buffers of a torch module in bytes (None if not a module)."""
+    try:
+        tensors = list(module.parameters()) + list(module.buffers())
+    except Exception:
+        return None
+    return int(sum(t.numel() * t.element_size() for t in tensors))
+
+
+BACKENDS = ("torch", "onnx", "auto")
+
+
+def onnx_path_for(model_path: str) -> str:
+    """Where the exported ONNX graph for a model lives (model.onnx inside HF dirs, .onnx next to .pt files)"""
+    if os.path.isdir(model_path):
+        return os.path.join(model_path, "model.onnx")
+    return os.path.splitext(model_path)[0] + ".onnx"
+
+
+def resolve_backend(backend: str, model_path: str) -> str:
+    """Map "auto" to "onnx" when an exported graph and onnxruntime are available, else "torch"."""
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend '{backend}', expected one of {BACKENDS}")
+    if backend == "auto":
+        if os.path.exists(onnx_path_for(model_path)) and importlib.util.find_spec("onnxruntime") is not None:
+            return "onnx"
+        return "torch"
+    return backend
+
+
+def model_version(model_path: str) -> str:
+    """Cheap version tag of a model file or directory: sizes and mtimes of its files ("missing" if absent)
+
+    Changes whenever the weights are replaced or re-exported, without hashing gigabytes of weights.
+    """
+    if os.path.isdir(model_path):
+        files = sorted(os.path.join(root, name) for root, _, names in os.walk(model_path) for name in names)
+    elif os.path.exists(model_path):
+        files = [model_path]
+    else:
+        return "missing"
+    parts = []
+    for path in files:
+        st = os.stat(path)
+        parts.append(f"{os.path.relpath(path, model_path) if path != model_path else ''}:{st.st_size}:{st.st_mtime_ns}")
+    return hashlib.sha256("|".join(parts).encode("utf-8")).hexdigest()[:16]
+
+
+class _ModelEntry:
+    """A loaded model plus its bookkeeping"""
+
+    def __init__(self, key: str, model: Any, load_seconds: float, memory_bytes: Optional[int],
+                 rss_delta_bytes: Optional[int] = None):
+        self.key = key
+        self.model = model
+        self.load_seconds = load_seconds
+        # Parameter/buffer bytes of torch modules (misses packed int8 weights and ONNX sessions)
+        self.memory_bytes = memory_bytes
+        # Process RSS growth while loading, which covers every kind of model
+        self.rss_delta_bytes = rss_delta_bytes
+        self.loaded_at = time.time()
+        # Serializes inference for models whose predict() is not thread-safe
+        self.lock = threading.Lock()
+
+
+class ModelRegistry:
+    """Thread-safe, lazily populated cache of loaded models keyed by name and path"""
+
+    def __init__(self):
+        self._entries: Dict[str, _ModelEntry] = {}
+        self._lock = threading.Lock()
+        self._key_locks: Dict[str, threading.Lock] = {}
+
+    def _key_lock(self, key: str) -> threading.Lock:
+        with self._lock:
+            lock = self._key_locks.get(key)
+            if lock is None:
+                lock = threading.Lock()
+                self._key_locks[key] = lock
+            return lock
+
+    def get(self, key: str, loader: Callable[[], Any]) -> Any:
+        """Return the model stored under `key`, calling `loader()` once to create it."""
+        entry = self._entries.get(key)
+        if entry is not None:
+            return entry.model
+
+        # Per-key lock: loading one model does not block lookups of another
+        with self._key_lock(key):
+            entry = self._entries.get(key)
+            if entry is not None:
+                return entry.model
+
+            rss_before = _rss_bytes()
+            start = time.perf_counter()
+            model = loader()
+            load_seconds = time.perf_counter() - start
+            rss_after = _rss_bytes()
+
+            parts = model if isinstance(model, tuple) else (model,)
+            module_bytes = [b for b in (_torch_module_bytes(p) or _torch_module_bytes(getattr(p, "model", None))
+                                        for p in parts) if b]
+            memory_bytes = sum(module_bytes) if module_bytes else None
+            rss_delta = max(0, rss_after - rss_before) if rss_before is not None and rss_after is not None else None
+
+            entry = _ModelEntry(key, model, load_seconds, memory_bytes, rss_delta)
+            with self._lock:
+                self._entries[key] = entry
+            print(f"Model registry: loaded {key} in {load_seconds:.2f}s")
+            return model
+
+    def lock(self, key: str) -> threading.Lock:
+        """Inference lock for the model stored under `key`."""
+        entry = self._entries.get(key)
+        if entry is None:
+            raise KeyError(f"Model not loaded: {key}")
+        return entry.lock
+
+    def lock_for(self, model: Any):
+        """Inference lock of a model handed out by the registry (also one part of a tuple entry);
+        a no-op context for models the registry does not hold."""
+        with self._lock:
+            entries = list(self._entries.values())
+        for entry in entries:
+            parts = entry.model if isinstance(entry.model, tuple) else (entry.model,)
+            if any(part is model for part in parts):
+                return entry.lock
+        return contextlib.nullcontext()
+
+    def yolo(self, model_path: str, backend: str = "torch") -> Any:
+        """Ultralytics YOLO model for logo detection (backend "onnx" loads the exported graph via onnxruntime)"""
+        backend = resolve_backend(backend, model_path)
+
+        def _load():
+            from ultralytics import YOLO
+            if backend == "onnx":
+                return YOLO(onnx_path_for(model_path), task="detect", verbose=False)
+            return YOLO(model_path, verbose=False)
+        return self.get(self.yolo_key(model_path, backend), _load)
+
+    def table_detector(self, model_path: str, backend: str = "torch", variant: str = "fp32"):
+        """(processor, model) pair for table detection; variant "int8" is the dynamically quantized model"""
+        backend = resolve_backend(backend, model_path)
+
+        def _load():
+            try:
+                from scripts.predict_table import load_model
+            except ImportError:
+                from predict_table import load_model
+            processor, model = load_model(model_path, backend=backend, variant=variant)
+            model.eval()
+            return processor, model
+        return self.get(self.table_key(model_path, backend, variant), _load)
+
+    def face_cascade(self) -> Any:
+        """OpenCV Haar cascade for frontal faces"""
+        def _load():
+            import cv2
+            cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
+            if cascade.empty():
+                raise RuntimeError("Failed to load Haar cascade")
+            return cascade
+        return self.get(self.face_key(), _load)
+
+    @staticmethod
+    def yolo_key(model_path: str, backend: str = "torch") -> str:
+        return f"yolo:{resolve_backend(backend, model_path)}:{os.path.normpath(model_path)}"
+
+    @staticmethod
+    def table_key(model_path: str, backend: str = "torch", variant: str = "fp32") -> str:
+        return f"table:{resolve_backend(backend, model_path)}:{variant}:{os.path.normpath(model_path)}"
+
+    @staticmethod
+    def face_key() -> str:
+        return "haar:frontalface_default"
+
+    def preload(self, logo_model_path: Optional[str] = None, table_model_path: Optional[str] = None,
+                face: bool = True, backend: str = "torch", table_variant: str = "fp32") -> List[Dict[str, Any]]:
+        """Eagerly load the given models (e.g. at server startup); failures are reported, not raised."""
+        loaders = []
+        if logo_model_path:
+            loaders.append(("logo", lambda: self.yolo(logo_model_path, backend)))
+        if table_model_path:
+            loaders.append(("table", lambda: self.table_detector(table_model_path, backend, table_variant)))
+        if face:
+            loaders.append(("face", self.face_cascade))
+        for name, load in loaders:
+            try:
+                load()
+            except Exception as e:
+                print(f"Warning: Failed to preload {name} model: {e}")
+        return self.stats()
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """Load time and memory footprint of every resident model"""
+        with self._lock:
+            entries = list(self._entries.values())
+        return [
+            {
+                "key": e.key,
+                "load_seconds": round(e.load_seconds, 3),
+                "memory_mb": round(e.memory_bytes / (1024 * 1024), 1) if e.memory_bytes is not None else None,
+                "rss_delta_mb": round(e.rss_delta_bytes / (1024 * 1024), 1) if e.rss_delta_bytes is not None else None,
+                "loaded_at": e.loaded_at,
+            }
+            for e in entries
+        ]
+
+    def clear(self):
+        """Drop all resident models"""
+        with self._lock:
+            self._entries.clear()
+            self._key_locks.clear()
+
+
+_registry = ModelRegistry()
+
+
+def get_registry() -> ModelRegistry:
+    """The process-wide model registry"""
+    return _registry
@@ -1,26 +1,50 @@
+import io
 import time
 import json
 import os
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FutureTimeoutError
 from PIL import Image
 from unstract.llmwhisperer import LLMWhispererClientV2
 from dotenv import load_dotenv
 
+try:
+    from scripts.image_context import ImageContext
+    from scripts.ocr_cache import OcrCache, get_ocr_cache
+    from scripts.cancel import Cancelled, ensure_token
+except ImportError:
+    from image_context import ImageContext
+    from ocr_cache import OcrCache, get_ocr_cache
+    from cancel import Cancelled, ensure_token
+
 # Load environment variables
 load_dotenv()
 api_key = os.getenv("UNSTRANCT_API_KEY")
+OCR_BASE_URL = "https://llmwhisperer-api.us-central.unstract.com/api/v2"
+# Extra whisper() arguments; together with the service URL they form the OCR part of the cache key
+WHISPER_OPTIONS = {}
 
 # Initialize client only if API key is available
 client = None
 if api_key and api_key != "your_api_key_here":
     try:
-        client = LLMWhispererClientV2(base_url="https://llmwhisperer-api.us-central.unstract.com/api/v2",
-                                      api_key=api_key)
+        client = LLMWhispererClientV2(base_url=OCR_BASE_URL, api_key=api_key)
     except Exception as e:
         print(f"Warning: Failed to initialize OCR client: {e}")
         client = None
 else:
     print("Warning: No valid OCR API key found. OCR will be skipped.")
 
+# Status polling starts short and backs off; OCR_DEADLINE_SECONDS bounds a whole dispatch
+POLL_INITIAL_SECONDS = 0.5
+POLL_MAX_SECONDS = 4.0
+POLL_BACKOFF = 1.5
+# whisper_status values after which the job will never be processed
+WHISPER_ERROR_STATUSES = ("error", "failed")
+OCR_DEADLINE_SECONDS = float(os.getenv("OCR_DEADLINE_SECONDS", 120))
+
+# Crops are submitted concurrently; threads mostly wait on the OCR service
+_ocr_pool = ThreadPoolExecutor(max_workers=int(os.getenv("OCR_MAX_WORKERS", 8)), thread_name_prefix="ocr")
+
 # Create OCR results directory if it doesn't exist
 results_dir = "data/output/ocr_results"
 if not os.path.exists(results_dir):
@@ -35,133 +59,205 @@ def get_max_confidence_table(tables, table_type):
     return max(filtered_tables, key=lambda x: x["confidence"])
 
 def crop_table_from_image(image_path, coordinates, margin_ratio: float = 0.10):
-    """Crop table region from image using coordinates with optional margin expansion."""
-    with Image.open(image_path) as img:
-        x1, y1 = int(coordinates["x1"]), int(coordinates["y1"])
-        x2, y2 = int(coordinates["x2"]), int(coordinates["y2"])
-
-        # Expand by margin_ratio on each side
-        width = max(0, x2 - x1)
-        height = max(0, y2 - y1)
-        pad_x = int(round(width * margin_ratio))
-        pad_y = int(round(height * margin_ratio))
-
-        x1 -= pad_x
-        y1 -= pad_y
-        x2 += pad_x
-        y2 += pad_y
-
-        # Ensure coordinates are within image bounds
-        x1 = max(0, min(x1, img.width))
-        y1 = max(0, min(y1, img.height))
-        x2 = max(0, min(x2, img.width))
-        y2 = max(0, min(y2, img.height))
-
-        cropped_img = img.crop((x1, y1, x2, y2))
-        return cropped_img
-
-def save_cropped_image(cropped_img, filename, table_type):
-    """Save cropped image temporarily for OCR processing"""
-    temp_filename = f"temp_{filename}_{table_type.replace(' ', '_').lower()}.jpg"
+    """Crop table region from image (path or ImageContext) using coordinates with optional margin expansion."""
+    ctx = ImageContext.coerce(image_path)
+    img = ctx.pil
+    if img is None:
+        raise FileNotFoundError(f"Failed to read image: {ctx.source or ctx.name}")
+
+    x1, y1 = int(coordinates["x1"]), int(coordinates["y1"])
+    x2, y2 = int(coordinates["x2"]), int(coordinates["y2"])
+
+    # Expand by margin_ratio on each side
+    width = max(0, x2 - x1)
+    height = max(0, y2 - y1)
+    pad_x = int(round(width * margin_ratio))
+    pad_y = int(round(height * margin_ratio))
+
+    x1 -= pad_x
+    y1 -= pad_y
+    x2 += pad_x
+    y2 += pad_y
+
+    # Ensure coordinates are within image bounds
+    x1 = max(0, min(x1, img.width))
+    y1 = max(0, min(y1, img.height))
+    x2 = max(0, min(x2, img.width))
+    y2 = max(0, min(y2, img.height))
+
+    cropped_img = img.crop((x1, y1, x2, y2))
+    return cropped_img
+
+def encode_cropped_image(cropped_img, quality: int = 75) -> bytes:
+    """Encode a cropped image as JPEG bytes in memory for OCR submission"""
     # Ensure image is in RGB mode for JPEG compatibility
     if cropped_img.mode != 'RGB':
         try:
             cropped_img = cropped_img.convert('RGB')
         except Exception:
             # Fallback: create a new RGB image and paste
-            from PIL import Image
             rgb_bg = Image.new('RGB', cropped_img.size, (255, 255, 255))
             rgb_bg.paste(cropped_img, mask=cropped_img.split()[-1] if cropped_img.mode in ('RGBA', 'LA') else None)
             cropped_img = rgb_bg
-    cropped_img.save(temp_filename, format='JPEG')
-    return temp_filename
+    buffer = io.BytesIO()
+    cropped_img.save(buffer, format='JPEG', quality=quality)
+    return buffer.getvalue()
+
+def _wait_for_whisper(whisper_hash, deadline=None, cancel=None):
+    """Poll whisper_status with growing backoff until processed; raises RuntimeError on a terminal
+    error status, TimeoutError past deadline and Cancelled (between polls) once cancel is cancelled"""
+    cancel = ensure_token(cancel)
+    delay = POLL_INITIAL_SECONDS
+    while True:
+        cancel.check()
+        status = client.whisper_status(whisper_hash=whisper_hash)
+        if status['status'] == 'processed':
+            return client.whisper_retrieve(whisper_hash=whisper_hash)
+        if status['status'] in WHISPER_ERROR_STATUSES:
+            # Terminal: polling further would only run into the deadline
+            raise RuntimeError(f"whisper {status['status']}: {status.get('message') or 'no details'}")
+        if deadline is not None:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError(f"not processed before deadline (last status: {status['status']})")
+            delay = min(delay, remaining)
+        cancel.sleep(delay)
+        delay = min(delay * POLL_BACKOFF, POLL_MAX_SECONDS)
 
-def process_ocr(image_path):
-    """Process OCR on an image and return extracted text"""
+def process_ocr(image, deadline=None, cancel=None):
+    """Process OCR on an image and return extracted text
+
+    image may be a file path, encoded image bytes, a binary stream or a PIL image;
+    it is submitted from memory. deadline is a time.monotonic() timestamp after which
+    polling gives up (default: OCR_DEADLINE_SECONDS from now). Results are cached on
+    disk by a hash of the exact bytes (see scripts/ocr_cache.py). A cancelled CancelToken
+    stops the submission or the polling and raises Cancelled.
+    """
     if not client:
         return "OCR not available - no valid API key"
+    if deadline is None:
+        deadline = time.monotonic() + OCR_DEADLINE_SECONDS
     
     try:
-        result = client.whisper(file_path=image_path)
+        if isinstance(image, (str, os.PathLike)):
+            with open(image, 'rb') as f:
+                data = f.read()
+        elif isinstance(image, Image.Image):
+            data = encode_cropped_image(image)
+        elif isinstance(image, (bytes, bytearray, memoryview)):
+            data = bytes(image)
+        else:
+            data = image.read()
         
-        while True:
-            status = client.whisper_status(whisper_hash=result['whisper_hash'])
-            if status['status'] == 'processed':
-                resultx = client.whisper_retrieve(whisper_hash=result['whisper_hash'])
-                break
-            time.sleep(5)
+        cache = get_ocr_cache()
+        cache_key = OcrCache.key(data, {"service": OCR_BASE_URL, **WHISPER_OPTIONS})
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return cached
         
+        if cancel is not None:
+            cancel.check()
+        result = client.whisper(stream=io.BytesIO(data), **WHISPER_OPTIONS)
+        resultx = _wait_for_whisper(result['whisper_hash'], deadline, cancel)
         extracted_text = resultx['extraction']['result_text']
+        cache.put(cache_key, extracted_text)
         return extracted_text
+    except Cancelled:
+        raise
     except Exception as e:
         return f"OCR failed: {str(e)}"
 
+def iter_ocr_results(images, timeout=None, cancel=None):
+    """Submit every image at once and yield (key, text) as each OCR result becomes ready
+
+    images maps a key (e.g. "info", "marks") to anything process_ocr accepts. All submissions
+    share one deadline, timeout seconds from now (default OCR_DEADLINE_SECONDS); keys still
+    pending at the deadline are yielded with an "OCR failed: timed out" text. Cancelling
+    cancel drops queued submissions, stops polling and raises Cancelled.
+    """
+    timeout = OCR_DEADLINE_SECONDS if timeout is None else timeout
+    deadline = time.monotonic() + timeout
+    futures = {_ocr_pool.submit(process_ocr, image, deadline, cancel): key for key, image in images.items()}
+    unregister = ensure_token(cancel).add_callback(lambda: [future.cancel() for future in futures])
+    done = set()
+    try:
+        for future in as_completed(futures, timeout=max(0.0, deadline - time.monotonic())):
+            done.add(future)
+            if future.cancelled():
+                raise Cancelled(cancel.reason if cancel is not None else "cancelled")
+            yield futures[future], future.result()
+    except FutureTimeoutError:
+        for future, key in futures.items():
+            if future not in done:
+                future.cancel()
+                yield key, f"OCR failed: timed out after {timeout:.0f}s"
+    finally:
+        unregister()
+
+def ocr_many(images, timeout=None, cancel=None):
+    """OCR several images concurrently; returns {key: text}"""
+    return dict(iter_ocr_results(images, timeout, cancel))
 
 
+
+def ocr_table_texts(image_path, table_coordinates, on_text=None, cancel=None):
+    """OCR the best marks and information tables of an image (path or ImageContext).
+
+    Returns {"marks": text or None, "info": text or None}; None when that table was not detected.
+    Crops are encoded in memory and streamed to the OCR client; nothing is written to disk.
+    on_text(key, text) is called as each table's text arrives (e.g. to stream progress);
+    cancel (a CancelToken) stops the OCR round trips and raises Cancelled.
+    """
+    ctx = ImageContext.coerce(image_path)
+    filename = ctx.stem
+    texts = {"marks": None, "info": None}
+    
+    # Get tables with maximum confidence for each type
+    marks_table = get_max_confidence_table(table_coordinates, "Marks Table")
+    info_table = get_max_confidence_table(table_coordinates, "Information Table")
+    
+    crops = {}
+    for key, table, table_name, margin_ratio in (("marks", marks_table, "Marks Table", 0.10),
+                                                 ("info", info_table, "Information Table", 0.15)):
+        if not table:
+            continue
+        print(f"  Processing {table_name} (confidence: {table['confidence']:.3f})")
+        cropped_img = crop_table_from_image(ctx, table["coordinates"], margin_ratio=margin_ratio)
+        crops[key] = encode_cropped_image(cropped_img)
+    
+    # Both tables are in flight at once; each text is taken as soon as it is ready
+    for key, text in iter_ocr_results(crops, cancel=cancel):
+        texts[key] = text
+        if "OCR not available" in text or "OCR failed" in text:
+            print(f"  Warning: {key} table: {text}")
+        if on_text is not None:
+            on_text(key, text)
+    
+    if not marks_table and not info_table:
+        print(f"  No tables found in {filename}")
+    return texts
+
 def process_image_with_tables(image_path, json_path):
-    """Process a single image with its corresponding JSON file"""
-    print(f"Processing: {os.path.basename(image_path)}")
+    """Process a single image (path or ImageContext) with its corresponding JSON file"""
+    ctx = ImageContext.coerce(image_path)
+    print(f"Processing: {ctx.name}")
     
     # Load JSON data
     with open(json_path, 'r') as f:
         data = json.load(f)
     
-    # Get filename without extension
-    filename = os.path.splitext(os.path.basename(image_path))[0]
-    
     # Extract table coordinates
     tables = data["table_detection"]["table_coordinates"]
+    texts = ocr_table_texts(ctx, tables)
     
-    # Get tables with maximum confidence for each type
-    marks_table = get_max_confidence_table(tables, "Marks Table")
-    info_table = get_max_confidence_table(tables, "Information Table")
-    
-    # Process Marks Table
-    if marks_table:
-        print(f"  Processing Marks Table (confidence: {marks_table['confidence']:.3f})")
-        cropped_img = crop_table_from_image(image_path, marks_table["coordinates"], margin_ratio=0.10)
-        temp_file = save_cropped_image(cropped_img, filename, "marks")
-        
-        try:
-            marks_text = process_ocr(temp_file)
-            marks_output_path = os.path.join(results_dir, f"{filename}_marks.txt")
-            with open(marks_output_path, 'w', encoding='utf-8') as f:
-                f.write(marks_text)
-            if "OCR not available" in marks_text or "OCR failed" in marks_text:
-                print(f"  Warning: {marks_text}")
-            else:
-                print(f"  Saved marks table to: {marks_output_path}")
-        except Exception as e:
-            print(f"  Error processing marks table: {e}")
-        finally:
-            # Clean up temporary file
-            if os.path.exists(temp_file):
-                os.remove(temp_file)
-    
-    # Process Information Table
-    if info_table:
-        print(f"  Processing Information Table (confidence: {info_table['confidence']:.3f})")
-        cropped_img = crop_table_from_image(image_path, info_table["coordinates"], margin_ratio=0.15)
-        temp_file = save_cropped_image(cropped_img, filename, "info")
-        
-        try:
-            info_text = process_ocr(temp_file)
-            info_output_path = os.path.join(results_dir, f"{filename}_info.txt")
-            with open(info_output_path, 'w', encoding='utf-8') as f:
-                f.write(info_text)
-            if "OCR not available" in info_text or "OCR failed" in info_text:
-                print(f"  Warning: {info_text}")
-            else:
-                print(f"  Saved info table to: {info_output_path}")
-        except Exception as e:
-            print(f"  Error processing info table: {e}")
-        finally:
-            # Clean up temporary file
-            if os.path.exists(temp_file):
-                os.remove(temp_file)
-    
-    if not marks_table and not info_table:
-        print(f"  No tables found in {filename}")
+    for key in ("marks", "info"):
+        if texts[key] is None:
+            continue
+        output_path = os.path.join(results_dir, f"{ctx.stem}_{key}.txt")
+        with open(output_path, 'w', encoding='utf-8') as f:
+            f.write(texts[key])
+        print(f"  Saved {key} table to: {output_path}")
+    return texts
 
 def list_available_images():
     """List all available images in the inputs folder"""
@@ -0,0 +1,184 @@
+"""
+Content-addressed on-disk cache of OCR results.
+
+Entries are keyed by the SHA-256 of the exact encoded crop bytes plus the OCR
+options, so a re-upload or retry of the same marksheet skips the remote OCR
+round trip. The store is a directory of small JSON files (data/cache/ocr/ab/<key>.json)
+and is safe to share between worker processes: entries are written to a temp file
+and renamed into place, and readers tolerate entries disappearing under them.
+
+Eviction:
+- entries older than max_age_seconds (since they were written) are dropped on read and on sweep
+- when the store grows past max_bytes, least recently used entries (file mtime, bumped on
+  every hit) are dropped until it is back under 90% of the limit
+
+Configuration (environment): OCR_CACHE=0 disables the cache, OCR_CACHE_DIR,
+OCR_CACHE_MAX_MB (default 512), OCR_CACHE_MAX_AGE_DAYS (default 30).
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+# Bump when the stored format or the meaning of cached text changes
+CACHE_VERSION = 1
+# Sweep the store every this many writes (per process)
+SWEEP_EVERY = 32
+
+
+class OcrCache:
+    """Bounded on-disk OCR text cache with hit/miss counters"""
+
+    def __init__(self, cache_dir: str = "data/cache/ocr", max_bytes: int = 512 * 1024 * 1024,
+                 max_age_seconds: float = 30 * 24 * 3600, enabled: bool = True):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._writes_since_sweep = 0
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+
+    @staticmethod
+    def key(data: bytes, options: Optional[Dict[str, Any]] = None) -> str:
+        """SHA-256 over the crop bytes and the OCR options that affect the result"""
+        digest = hashlib.sha256()
+        digest.update(json.dumps({"v": CACHE_VERSION, **(options or {})}, sort_keys=True).encode("utf-8"))
+        digest.update(b"\0")
+        digest.update(data)
+        return digest.hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}.json"
+
+    def _count(self, counter: str, n: int = 1):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + n)
+
+    def get(self, key: str) -> Optional[str]:
+        """Cached text for key, or None on a miss"""
+        if not self.enabled:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            self._count("misses")
+            return None
+
+        if time.time() - entry.get("created", 0) > self.max_age_seconds:
+            self._remove(path)
+            self._count("misses")
+            return None
+        try:
+            # mtime is the LRU clock
+            os.utime(path)
+        except OSError:
+            pass
+        self._count("hits")
+        return entry.get("text")
+
+    def put(self, key: str, text: str):
+        """Store text for key atomically (temp file + rename), then sweep every SWEEP_EVERY writes"""
+        if not self.enabled:
+            return
+        path = self._path(key)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=str(path.parent), prefix=".tmp-", suffix=".json")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({"created": time.time(), "text": text}, f, ensure_ascii=False)
+            os.replace(tmp, path)
+        except OSError as e:
+            print(f"Warning: Failed to write OCR cache entry: {e}")
+            return
+        self._count("writes")
+
+        with self._lock:
+            self._writes_since_sweep += 1
+            sweep = self._writes_since_sweep >= SWEEP_EVERY
+            if sweep:
+                self._writes_since_sweep = 0
+        if sweep:
+            self.sweep()
+
+    def _remove(self, path: Path) -> bool:
+        try:
+            path.unlink()
+        except OSError:
+            # Already evicted by another process
+            return False
+        self._count("evictions")
+        return True
+
+    def _entries(self):
+        """(path, size, mtime) of every entry currently in the store"""
+        entries = []
+        if not self.cache_dir.exists():
+            return entries
+        for path in self.cache_dir.glob("*/*.json"):
+            try:
+                st = path.stat()
+            except OSError:
+                continue
+            entries.append((path, st.st_size, st.st_mtime))
+        return entries
+
+    def sweep(self):
+        """Drop entries older than max_age_seconds, then LRU entries until under max_bytes"""
+        now = time.time()
+        live = []
+        for path, size, mtime in self._entries():
+            # mtime >= created, so an entry untouched for max_age is certainly expired
+            if now - mtime > self.max_age_seconds:
+                self._remove(path)
+            else:
+                live.append((path, size, mtime))
+
+        total = sum(size for _, size, _ in live)
+        if total <= self.max_bytes:
+            return
+        target = int(self.max_bytes * 0.9)
+        for path, size, _ in sorted(live, key=lambda e: e[2]):
+            if total <= target:
+                break
+            if self._remove(path):
+                total -= size
+
+    def stats(self) -> Dict[str, Any]:
+        entries = self._entries()
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "dir": str(self.cache_dir),
+            "entries": len(entries),
+            "size_mb": round(sum(size for _, size, _ in entries) / (1024 * 1024), 2),
+            "max_mb": round(self.max_bytes / (1024 * 1024), 1),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "writes": self.writes,
+            "evictions": self.evictions,
+        }
+
+
+_cache = OcrCache(
+    cache_dir=os.getenv("OCR_CACHE_DIR", "data/cache/ocr"),
+    max_bytes=int(float(os.getenv("OCR_CACHE_MAX_MB", 512)) * 1024 * 1024),
+    max_age_seconds=float(os.getenv("OCR_CACHE_MAX_AGE_DAYS", 30)) * 24 * 3600,
+    enabled=os.getenv("OCR_CACHE", "1") != "0",
+)
+
+
+def get_ocr_cache() -> OcrCache:
+    """The process-wide OCR cache"""
+    return _cache
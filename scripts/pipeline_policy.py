@@ -0,0 +1,81 @@
+"""
+Pipeline policy: which validation failures stop a marksheet early and which
+stages are skipped.
+
+MarksheetProcessor consults its PipelinePolicy while running the stage graph:
+
+- abort_on: overall statuses that end processing as soon as they are known.
+  "invalid_logo" is checked right after logo detection, so an upload without a
+  board logo never reaches OCR; "no_tables" after table detection; "no_photo"
+  after face detection.
+- skip_stages: stages never run ("face", "ocr", "annotate").
+- board_skip_stages: stages skipped for a board, e.g. face detection for ICSE
+  where the candidate photo is optional.
+
+The CLI keeps annotation; the API skips it (see the PipelinePolicy.from_spec call in
+backend/main.py, configured by PIPELINE_ABORT_ON and PIPELINE_SKIP_STAGES).
+"""
+
+from typing import Dict, Iterable, Optional
+
+ABORT_STATUSES = ("invalid_logo", "no_tables", "no_photo")
+OPTIONAL_STAGES = ("face", "ocr", "annotate")
+
+
+def _split_spec(spec: Optional[str]):
+    return [item.strip() for item in (spec or "").split(",") if item.strip()]
+
+
+class PipelineAborted(Exception):
+    """Raised by a policy check; status is the overall_status the marksheet ends with"""
+
+    def __init__(self, status: str, stage: str, reason: str):
+        super().__init__(reason)
+        self.status = status
+        self.stage = stage
+        self.reason = reason
+
+
+class PipelinePolicy:
+    """Early-abort statuses and stage skips applied by MarksheetProcessor"""
+
+    def __init__(self, abort_on: Iterable[str] = ("invalid_logo",), skip_stages: Iterable[str] = (),
+                 board_skip_stages: Optional[Dict[str, Iterable[str]]] = None):
+        abort_on = set(abort_on)
+        unknown = abort_on - set(ABORT_STATUSES)
+        if unknown:
+            raise ValueError(f"Unknown abort statuses: {sorted(unknown)}; expected {ABORT_STATUSES}")
+        if board_skip_stages is None:
+            board_skip_stages = {"ICSE": ("face",)}
+        board_skip_stages = {board: set(stages) for board, stages in board_skip_stages.items()}
+        skip_stages = set(skip_stages)
+        for stages in [skip_stages, *board_skip_stages.values()]:
+            unknown = stages - set(OPTIONAL_STAGES)
+            if unknown:
+                raise ValueError(f"Unknown optional stages: {sorted(unknown)}; expected {OPTIONAL_STAGES}")
+        self.abort_on = abort_on
+        self.skip_stages = skip_stages
+        self.board_skip_stages = board_skip_stages
+
+    @classmethod
+    def from_spec(cls, abort_on: Optional[str] = "invalid_logo", skip: Optional[str] = "") -> "PipelinePolicy":
+        """Policy from comma separated abort statuses and skipped stages (empty for none)"""
+        return cls(abort_on=_split_spec(abort_on), skip_stages=_split_spec(skip))
+
+    def runs(self, stage: str, board_name: Optional[str] = None) -> bool:
+        """Whether stage runs (for board_name, when the board is already known)"""
+        if stage in self.skip_stages:
+            return False
+        return stage not in self.board_skip_stages.get(board_name, ())
+
+    def check(self, status: str, failed: bool, stage: str, reason: str):
+        """Raise PipelineAborted when the check failed and status is configured to abort"""
+        if failed and status in self.abort_on:
+            raise PipelineAborted(status, stage, reason)
+
+    def describe(self) -> Dict[str, list]:
+        return {
+            "abort_on": sorted(self.abort_on),
+            "skip_stages": sorted(self.skip_stages),
+            "board_skip_stages": {board: sorted(stages) for board, stages in self.board_skip_stages.items()},
+        }
@@ -1,17 +1,74 @@
 """Table Detection Inference Script"""
 import os
 import torch
-import matplotlib.pyplot as plt
 import matplotlib.patches as patches
+from matplotlib.figure import Figure
 from PIL import Image, ImageOps
 from transformers import AutoImageProcessor, TableTransformerForObjectDetection
 import numpy as np
 import argparse
+from types import SimpleNamespace
 
-def load_model(model_path="models\tt_finetuned"):
-    """Load the fine-tuned model or use pretrained model"""
+try:
+    from scripts.model_registry import get_registry, onnx_path_for
+    from scripts.image_context import ImageContext
+    from scripts.prefetch import PrefetchPipeline
+except ImportError:
+    from model_registry import get_registry, onnx_path_for
+    from image_context import ImageContext
+    from prefetch import PrefetchPipeline
+
+class OnnxTableDetector:
+    """TableTransformer exported to ONNX (see export_onnx.py), run on onnxruntime's CPU provider"""
+
+    def __init__(self, onnx_path):
+        import onnxruntime as ort
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.onnx_path = onnx_path
+        self.session = ort.InferenceSession(onnx_path, sess_options=options, providers=["CPUExecutionProvider"])
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+    def eval(self):
+        return self
+
+    def __call__(self, pixel_values, pixel_mask=None, **kwargs):
+        """Same call/return shape as the torch model as far as post_process_object_detection is concerned"""
+        feeds = {"pixel_values": pixel_values.numpy().astype(np.float32)}
+        if "pixel_mask" in self.input_names:
+            if pixel_mask is None:
+                pixel_mask = torch.ones(pixel_values.shape[0], *pixel_values.shape[2:], dtype=torch.long)
+            feeds["pixel_mask"] = pixel_mask.numpy().astype(np.int64)
+        logits, pred_boxes = self.session.run(["logits", "pred_boxes"], feeds)
+        return SimpleNamespace(logits=torch.from_numpy(logits), pred_boxes=torch.from_numpy(pred_boxes))
+
+MODEL_VARIANTS = ("fp32", "int8")
+
+def quantize_model(model):
+    """Dynamic int8 quantization of the Linear layers (transformer encoder/decoder and heads)"""
+    model.eval()
+    return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+def load_model(model_path="models\tt_finetuned", backend="torch", variant="fp32"):
+    """
+    Load the fine-tuned model or use pretrained model
+
+    backend "onnx" uses the exported graph; variant "int8" dynamically quantizes the
+    Linear layers of the torch model (weights int8, activations quantized on the fly).
+    """
     print(f"Loading model from: {model_path}")
     
+    if variant not in MODEL_VARIANTS:
+        raise ValueError(f"Unknown model variant '{variant}', expected one of {MODEL_VARIANTS}")
+    
+    if backend == "onnx":
+        if variant != "fp32":
+            raise ValueError("The ONNX backend only supports the fp32 variant")
+        processor = AutoImageProcessor.from_pretrained(model_path)
+        model = OnnxTableDetector(onnx_path_for(model_path))
+        print("ONNX model loaded successfully!")
+        return processor, model
+    
     try:
         processor = AutoImageProcessor.from_pretrained(model_path)
         model = TableTransformerForObjectDetection.from_pretrained(model_path)
@@ -23,27 +80,87 @@ def load_model(model_path="models\tt_finetuned"):
         model = TableTransformerForObjectDetection.from_pretrained("microsoft/table-transformer-detection")
         print("Pretrained model loaded successfully!")
     
+    if variant == "int8":
+        model = quantize_model(model)
+        print("Model quantized to int8 (dynamic, Linear layers)")
+    
     return processor, model
 
-def detect_tables(image_path, processor, model, confidence_threshold=0.5, info_threshold=0.5, marks_threshold=0.8, fix_orientation=True):
-    """Detect tables in an image"""
-    print(f"Processing image: {image_path}")
-    
-    # Load and preprocess image
+def load_image(image_path, fix_orientation=True):
+    """
+    Load an image as RGB, optionally applying its EXIF orientation
+
+    An ImageContext is returned as its shared PIL view (already decoded and
+    EXIF-oriented) instead of being decoded again. With fix_orientation=False a
+    context backed by a file is re-read without rotation; contexts built from
+    bytes or arrays only hold the oriented pixels and are returned as they are.
+    """
+    if isinstance(image_path, ImageContext):
+        if not fix_orientation and image_path.source is not None:
+            return Image.open(image_path.source).convert("RGB")
+        image = image_path.pil
+        if image is None:
+            raise FileNotFoundError(f"Failed to read image: {image_path.source or image_path.name}")
+        return image
     image = Image.open(image_path)
     if fix_orientation:
         image = ImageOps.exif_transpose(image)
-    image = image.convert("RGB")
-    
-    # Process image
-    inputs = processor(images=image, return_tensors="pt")
-    
-    # Run inference
-    with torch.no_grad():
+    return image.convert("RGB")
+
+def apply_class_thresholds(results, confidence_threshold=0.5, info_threshold=0.5, marks_threshold=0.8):
+    """Keep detections that pass the threshold of their class (vectorized over all detections)"""
+    scores = results["scores"]
+    labels = results["labels"]
+
+    thresholds = torch.full_like(scores, confidence_threshold)
+    if info_threshold is not None:
+        thresholds[labels == 0] = info_threshold
+    if marks_threshold is not None:
+        thresholds[labels == 1] = marks_threshold
+
+    keep = scores >= thresholds
+    if bool(keep.all()):
+        return results
+    return {
+        "scores": scores[keep],
+        "labels": labels[keep],
+        "boxes": results["boxes"][keep],
+    }
+
+def cap_resolution(image, max_side=None):
+    """Downscale a PIL image so its longer side is at most max_side (no-op when already smaller)"""
+    if not max_side or max(image.size) <= max_side:
+        return image
+    scale = max_side / float(max(image.size))
+    new_size = (max(1, round(image.width * scale)), max(1, round(image.height * scale)))
+    return image.resize(new_size, Image.BILINEAR, reducing_gap=2.0)
+
+def detect_tables_in_images(images, processor, model, confidence_threshold=0.5, info_threshold=0.5, marks_threshold=0.8, max_side=None):
+    """
+    Detect tables in a list of RGB PIL images with one batched forward pass.
+
+    The processor pads the images into one tensor (with a pixel mask), and boxes are
+    rescaled to each image's own size before the per-class thresholds are applied.
+    With max_side, images are downscaled before detection; the model predicts
+    normalized boxes, so decoding them against the original sizes maps them back
+    to original coordinates.
+
+    Returns:
+        list: One results dict {"scores", "labels", "boxes"} per image
+    """
+    if not images:
+        return []
+
+    # Process images
+    inputs = processor(images=[cap_resolution(image, max_side) for image in images], return_tensors="pt")
+
+    # Run inference; one forward pass per model at a time (page workers, stage pools and batch
+    # requests share the resident model)
+    with get_registry().lock_for(model), torch.no_grad():
         outputs = model(**inputs)
-    
+
     # Post-process results
-    target_sizes = torch.tensor([image.size[::-1]])  # [height, width]
+    target_sizes = torch.tensor([image.size[::-1] for image in images])  # original [height, width] per image
     # Use the minimum of thresholds for initial decoding, then filter per-class below
     decode_threshold = confidence_threshold
     if info_threshold is not None:
@@ -51,56 +168,195 @@ def detect_tables(image_path, processor, model, confidence_threshold=0.5, info_t
     if marks_threshold is not None:
         decode_threshold = min(decode_threshold, marks_threshold)
 
-    results = processor.post_process_object_detection(
+    batch_results = processor.post_process_object_detection(
         outputs, 
         target_sizes=target_sizes, 
         threshold=decode_threshold
-    )[0]
+    )
 
     # Optional per-class thresholding
     if info_threshold is not None or marks_threshold is not None:
-        scores = results["scores"]
-        labels = results["labels"]
-        boxes = results["boxes"]
-
-        keep_indices = []
-        for i in range(len(scores)):
-            label_id = labels[i].item()
-            score_val = scores[i].item()
-            thr = info_threshold if label_id == 0 else marks_threshold if label_id == 1 else confidence_threshold
-            if thr is None:
-                thr = confidence_threshold
-            if score_val >= thr:
-                keep_indices.append(i)
-
-        if len(keep_indices) != len(scores):
-            idx = torch.tensor(keep_indices, dtype=torch.long)
-            results = {
-                "scores": scores.index_select(0, idx),
-                "labels": labels.index_select(0, idx),
-                "boxes": boxes.index_select(0, idx),
-            }
+        batch_results = [
+            apply_class_thresholds(results, confidence_threshold, info_threshold, marks_threshold)
+            for results in batch_results
+        ]
+
+    return batch_results
+
+def detect_tables(image_path, processor, model, confidence_threshold=0.5, info_threshold=0.5, marks_threshold=0.8, fix_orientation=True, max_side=None):
+    """Detect tables in an image (path or ImageContext)"""
+    print(f"Processing image: {image_path.name if isinstance(image_path, ImageContext) else image_path}")
+    
+    # Load and preprocess image
+    image = load_image(image_path, fix_orientation)
+    
+    results = detect_tables_in_images(
+        [image], processor, model,
+        confidence_threshold=confidence_threshold,
+        info_threshold=info_threshold,
+        marks_threshold=marks_threshold,
+        max_side=max_side,
+    )[0]
     
     return image, results
 
-def detect_tables_with_boxes_and_scores(image_path, model_path="models\tt_finetuned", confidence_threshold=0.5, info_threshold=0.5, marks_threshold=0.8, fix_orientation=True):
-    """Detect tables in an image and return bounding boxes with confidence scores"""
-    processor, model = load_model(model_path)
-    image, results = detect_tables(image_path, processor, model, confidence_threshold, info_threshold, marks_threshold, fix_orientation)
-    
+def detect_tables_batch(image_paths, processor, model, confidence_threshold=0.5, info_threshold=0.5, marks_threshold=0.8, fix_orientation=True, batch_size=8, max_side=None):
+    """
+    Detect tables in many images, batch_size images per forward pass.
+
+    Yields:
+        tuple: (image_path, image, results, error) per input in order; image and results
+        are None and error holds the message when the image could not be processed
+    """
+    batch_size = max(1, int(batch_size))
+    for start in range(0, len(image_paths), batch_size):
+        chunk = image_paths[start:start + batch_size]
+
+        loaded = []
+        for image_path in chunk:
+            try:
+                loaded.append((image_path, load_image(image_path, fix_orientation), None))
+            except Exception as e:
+                loaded.append((image_path, None, str(e)))
+
+        yield from detect_tables_loaded(
+            loaded, processor, model,
+            confidence_threshold=confidence_threshold,
+            info_threshold=info_threshold,
+            marks_threshold=marks_threshold,
+            max_side=max_side,
+        )
+
+def detect_tables_loaded(loaded, processor, model, confidence_threshold=0.5, info_threshold=0.5, marks_threshold=0.8, max_side=None):
+    """
+    One forward pass over already loaded images.
+
+    Args:
+        loaded: [(image_path, image, error), ...]; entries with an error are passed through
+
+    Yields:
+        tuple: (image_path, image, results, error) per entry, as detect_tables_batch
+    """
+    valid = [(path, image) for path, image, error in loaded if error is None]
+    try:
+        batch_results = detect_tables_in_images(
+            [image for _, image in valid], processor, model,
+            confidence_threshold=confidence_threshold,
+            info_threshold=info_threshold,
+            marks_threshold=marks_threshold,
+            max_side=max_side,
+        )
+        results_by_path = {path: results for (path, _), results in zip(valid, batch_results)}
+        batch_error = None
+    except Exception as e:
+        results_by_path = {}
+        batch_error = str(e)
+
+    for image_path, image, error in loaded:
+        if error is None and batch_error is not None:
+            error = batch_error
+        if error is not None:
+            yield image_path, None, None, error
+        else:
+            yield image_path, image, results_by_path[image_path], None
+
+def detect_tables_raw(image_path, processor, model, fix_orientation=True, max_side=None):
+    """
+    Run the table model on one image (path or ImageContext) and keep its raw, unthresholded output
+
+    Returns:
+        dict: {"logits": float32 [queries, classes + 1], "pred_boxes": float32 [queries, 4]
+        (normalized cx, cy, w, h), "size": (width, height) of the original image}
+    """
+    image = load_image(image_path, fix_orientation)
+    inputs = processor(images=[cap_resolution(image, max_side)], return_tensors="pt")
+    with get_registry().lock_for(model), torch.no_grad():
+        outputs = model(**inputs)
+    return {
+        "logits": outputs.logits[0].detach().float().numpy(),
+        "pred_boxes": outputs.pred_boxes[0].detach().float().numpy(),
+        "size": image.size,
+    }
+
+def tables_from_raw(raw, confidence_threshold=0.5, info_threshold=0.5, marks_threshold=0.8):
+    """
+    Threshold raw table model output (see detect_tables_raw) without running the model
+
+    Mirrors post_process_object_detection followed by apply_class_thresholds in numpy.
+
+    Returns:
+        list: [([x0, y0, x1, y1], label_id, confidence), ...] as results_to_boxes_and_scores
+    """
+    logits = raw["logits"]
+    # Softmax over classes; the last class is "no object"
+    exp = np.exp(logits - logits.max(axis=-1, keepdims=True))
+    probs = exp / exp.sum(axis=-1, keepdims=True)
+    labels = probs[:, :-1].argmax(axis=-1)
+    scores = probs[:, :-1].max(axis=-1)
+
+    decode_threshold = confidence_threshold
+    if info_threshold is not None:
+        decode_threshold = min(decode_threshold, info_threshold)
+    if marks_threshold is not None:
+        decode_threshold = min(decode_threshold, marks_threshold)
+    thresholds = np.full_like(scores, confidence_threshold)
+    if info_threshold is not None:
+        thresholds[labels == 0] = info_threshold
+    if marks_threshold is not None:
+        thresholds[labels == 1] = marks_threshold
+    keep = (scores > decode_threshold) & (scores >= thresholds)
+
+    width, height = raw["size"]
+    cx, cy, w, h = raw["pred_boxes"][keep].T
+    boxes = np.stack([(cx - 0.5 * w) * width, (cy - 0.5 * h) * height,
+                      (cx + 0.5 * w) * width, (cy + 0.5 * h) * height], axis=-1)
+    return [(box.tolist(), int(label), float(score))
+            for box, label, score in zip(boxes, labels[keep], scores[keep])]
+
+def results_to_boxes_and_scores(results):
+    """Convert a results dict into [([x0, y0, x1, y1], label_id, confidence), ...]"""
     boxes_with_labels_and_scores = []
-    for i, (score, label, box) in enumerate(zip(results["scores"], results["labels"], results["boxes"])):
+    for score, label, box in zip(results["scores"], results["labels"], results["boxes"]):
         x0, y0, x1, y1 = box.tolist()
-        label_id = label.item()
-        confidence_score = score.item()
-        boxes_with_labels_and_scores.append(([x0, y0, x1, y1], label_id, confidence_score))
-    
+        boxes_with_labels_and_scores.append(([x0, y0, x1, y1], label.item(), score.item()))
     return boxes_with_labels_and_scores
 
-def detect_tables_with_boxes(image_path, model_path="models\tt_finetuned", confidence_threshold=0.5, info_threshold=0.5, marks_threshold=0.8, fix_orientation=True):
+def detect_tables_with_boxes_and_scores(image_path, model_path="models\tt_finetuned", confidence_threshold=0.5, info_threshold=0.5, marks_threshold=0.8, fix_orientation=True, backend="torch", variant="fp32", max_side=None):
+    """Detect tables in an image and return bounding boxes (in original image coordinates) with confidence scores"""
+    processor, model = get_registry().table_detector(model_path, backend, variant)
+    image, results = detect_tables(image_path, processor, model, confidence_threshold, info_threshold, marks_threshold, fix_orientation, max_side)
+    
+    return results_to_boxes_and_scores(results)
+
+def detect_tables_batch_with_boxes_and_scores(image_paths, model_path=os.path.join("models", "tt_finetuned"), confidence_threshold=0.5, info_threshold=0.5, marks_threshold=0.8, fix_orientation=True, batch_size=8, backend="torch", variant="fp32", max_side=None):
+    """
+    Batched variant of detect_tables_with_boxes_and_scores
+
+    Returns:
+        dict: image_path -> [(box, label, confidence), ...], or None for images that failed
+    """
+    processor, model = get_registry().table_detector(model_path, backend, variant)
+    table_data = {}
+    for image_path, _, results, error in detect_tables_batch(
+        list(image_paths), processor, model,
+        confidence_threshold=confidence_threshold,
+        info_threshold=info_threshold,
+        marks_threshold=marks_threshold,
+        fix_orientation=fix_orientation,
+        batch_size=batch_size,
+        max_side=max_side,
+    ):
+        if error is not None:
+            print(f"Batched table detection failed for {image_path}: {error}")
+            table_data[image_path] = None
+        else:
+            table_data[image_path] = results_to_boxes_and_scores(results)
+    return table_data
+
+def detect_tables_with_boxes(image_path, model_path="models\tt_finetuned", confidence_threshold=0.5, info_threshold=0.5, marks_threshold=0.8, fix_orientation=True, backend="torch", variant="fp32", max_side=None):
     """Detect tables in an image and return bounding boxes"""
-    processor, model = load_model(model_path)
-    image, results = detect_tables(image_path, processor, model, confidence_threshold, info_threshold, marks_threshold, fix_orientation)
+    processor, model = get_registry().table_detector(model_path, backend, variant)
+    image, results = detect_tables(image_path, processor, model, confidence_threshold, info_threshold, marks_threshold, fix_orientation, max_side)
     
     boxes_with_labels = []
     for i, (score, label, box) in enumerate(zip(results["scores"], results["labels"], results["boxes"])):
@@ -112,7 +368,10 @@ def detect_tables_with_boxes(image_path, model_path="models\tt_finetuned", confi
 
 def visualize_results(image, results, save_path=None, show_plot=False):
     """Visualize detection results"""
-    fig, ax = plt.subplots(1, 1, figsize=(12, 8))
+    # Object-oriented Figure instead of pyplot: batch mode renders on the writer thread, where a GUI
+    # backend is not safe to use
+    fig = Figure(figsize=(12, 8))
+    ax = fig.subplots(1, 1)
     ax.imshow(image)
     ax.set_title("Table Detection Results", fontsize=16)
     
@@ -153,17 +412,17 @@ def visualize_results(image, results, save_path=None, show_plot=False):
     ax.axis("off")
     
     if save_path:
-        plt.savefig(save_path, dpi=300, bbox_inches='tight')
+        fig.savefig(save_path, dpi=300, bbox_inches='tight')
         print(f"Results saved to: {save_path}")
     
     # Removed plt.show() to prevent popup
     
     return fig
 
-def process_single_image(image_path, model_path="models\\tt_finetuned", confidence_threshold=0.5, info_threshold=0.5, marks_threshold=0.8, save_results=True, fix_orientation=True):
+def process_single_image(image_path, model_path="models\\tt_finetuned", confidence_threshold=0.5, info_threshold=0.5, marks_threshold=0.8, save_results=True, fix_orientation=True, backend="torch", variant="fp32", max_side=None):
     """Process a single image"""
     # Load model
-    processor, model = load_model(model_path)
+    processor, model = get_registry().table_detector(model_path, backend, variant)
     
     # Detect tables
     image, results = detect_tables(
@@ -172,6 +431,7 @@ def process_single_image(image_path, model_path="models\\tt_finetuned", confiden
         info_threshold=info_threshold,
         marks_threshold=marks_threshold,
         fix_orientation=fix_orientation,
+        max_side=max_side,
     )
     
     # Print results
@@ -201,10 +461,15 @@ def process_single_image(image_path, model_path="models\\tt_finetuned", confiden
     # Return 1 if tables found, 0 if none
     return 1 if len(results['scores']) > 0 else 0
 
-def process_batch_images(image_dir, model_path="models\tt_finetuned", confidence_threshold=0.5, info_threshold=0.5, marks_threshold=0.8, fix_orientation=True):
-    """Process all images in a directory"""
+def process_batch_images(image_dir, model_path="models\tt_finetuned", confidence_threshold=0.5, info_threshold=0.5, marks_threshold=0.8, fix_orientation=True, batch_size=8, backend="torch", variant="fp32", max_side=None, prefetch=4, write_queue=8):
+    """
+    Process all images in a directory, batch_size images per forward pass
+
+    Runs as a prefetch pipeline (prefetch.py): a decoder thread loads the next `prefetch` images
+    while the model runs, and a writer thread renders and saves the visualizations.
+    """
     # Load model
-    processor, model = load_model(model_path)
+    processor, model = get_registry().table_detector(model_path, backend, variant)
     
     # Get all image files
     image_extensions = ('.jpg', '.jpeg', '.png', '.bmp', '.tiff')
@@ -219,20 +484,25 @@ def process_batch_images(image_dir, model_path="models\tt_finetuned", confidence
     
     results_summary = []
     
-    for i, image_file in enumerate(image_files):
-        print(f"\n--- Processing {i+1}/{len(image_files)}: {image_file} ---")
-        
-        image_path = os.path.join(image_dir, image_file)
+    image_paths = [os.path.join(image_dir, image_file) for image_file in image_files]
+    
+    def infer(loaded):
+        return list(detect_tables_loaded(
+            loaded, processor, model,
+            confidence_threshold=confidence_threshold,
+            info_threshold=info_threshold,
+            marks_threshold=marks_threshold,
+            max_side=max_side,
+        ))
+    
+    def write(detection):
+        image_path, image, results, error = detection
+        image_file = os.path.basename(image_path)
+        print(f"\n--- Processing {len(results_summary)+1}/{len(image_files)}: {image_file} ---")
         
         try:
-            # Detect tables
-            image, results = detect_tables(
-                image_path, processor, model,
-                confidence_threshold=confidence_threshold,
-                info_threshold=info_threshold,
-                marks_threshold=marks_threshold,
-                fix_orientation=fix_orientation,
-            )
+            if error is not None:
+                raise RuntimeError(error)
             
             # Save results
             base_name = os.path.splitext(image_file)[0]
@@ -265,6 +535,10 @@ def process_batch_images(image_dir, model_path="models\tt_finetuned", confidence
                 'error': str(e)
             })
     
+    pipeline = PrefetchPipeline(lambda path: load_image(path, fix_orientation), infer, write,
+                                decode_depth=prefetch, write_depth=write_queue, batch_size=batch_size)
+    pipeline.run(image_paths)
+    
     # Print summary
     print("\n" + "="*60)
     print("BATCH PROCESSING SUMMARY")
@@ -284,6 +558,7 @@ def process_batch_images(image_dir, model_path="models\tt_finetuned", confidence
     print(f"  - Information Tables: {total_info_tables}")
     print(f"  - Marks Tables: {total_marks_tables}")
     print(f"Average tables per image: {total_tables/len(image_files):.2f}")
+    pipeline.print_report()
     
     # Return 1 if any tables found, 0 if none
     return 1 if total_tables > 0 else 0
@@ -300,6 +575,18 @@ def main():
                        help="Per-class threshold for Information Table (class 0) (default: 0.5)")
     parser.add_argument("--marks-thresh", type=float, default=0.8,
                        help="Per-class threshold for Marks Table (class 1) (default: 0.8)")
+    parser.add_argument("--batch-size", type=int, default=8,
+                       help="Images per forward pass in --dir mode (default: 8)")
+    parser.add_argument("--backend", type=str, default="torch", choices=["torch", "onnx", "auto"],
+                       help="Inference backend; onnx needs a graph from export_onnx.py (default: torch)")
+    parser.add_argument("--variant", type=str, default="fp32", choices=["fp32", "int8"],
+                       help="Model variant; int8 uses dynamic quantization (default: fp32)")
+    parser.add_argument("--max-side", type=int, default=0,
+                       help="Downscale images so the longer side is at most this before detection; 0 disables (default: 0)")
+    parser.add_argument("--prefetch", type=int, default=4,
+                       help="Images decoded ahead of inference in --dir mode (default: 4)")
+    parser.add_argument("--write-queue", type=int, default=8,
+                       help="Detections queued for the visualization writer in --dir mode (default: 8)")
     parser.add_argument("--no-fix-orientation", action="store_true",
                        help="Disable EXIF orientation fix for images")
     parser.add_argument("--no-save", action="store_true",
@@ -327,6 +614,9 @@ def main():
             marks_threshold=args.marks_thresh,
             save_results=not args.no_save,
             fix_orientation=not args.no_fix_orientation,
+            backend=args.backend,
+            variant=args.variant,
+            max_side=args.max_side or None,
         )
         exit(result)
     
@@ -340,6 +630,12 @@ def main():
             info_threshold=args.info_thresh,
             marks_threshold=args.marks_thresh,
             fix_orientation=not args.no_fix_orientation,
+            batch_size=args.batch_size,
+            backend=args.backend,
+            variant=args.variant,
+            max_side=args.max_side or None,
+            prefetch=args.prefetch,
+            write_queue=args.write_queue,
         )
         exit(result)
 
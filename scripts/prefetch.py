@@ -0,0 +1,164 @@
+"""
+Bounded-queue prefetch pipeline for batch runs.
+
+Three stages overlap instead of taking turns:
+
+    decoder thread --[decode queue]--> inference (calling thread) --[write queue]--> writer thread
+
+The decoder reads and decodes up to decode_depth items ahead of inference, so
+disk reads and image decodes happen while the models run; the writer persists
+outputs (and any writes handed to it with `defer`) while the next batch is
+inferred. A full queue blocks the stage feeding it, so memory stays bounded by
+the queue depths. Every stage records the time it spent working; `report()`
+gives busy time and utilization (busy / wall time) per stage after a run.
+
+    pipeline = PrefetchPipeline(decode, infer, write, decode_depth=4, write_depth=8, batch_size=8)
+    pipeline.run(paths)
+    pipeline.print_report()
+
+decode(item) returns the decoded value, or None to skip the item.
+infer(batch) gets a list of (item, decoded, error) tuples (error is the decode
+exception message, decoded is then None) and returns the outputs to write.
+write(output) persists one output; its exceptions are reported and the run goes on.
+"""
+
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Tuple
+
+_END = object()
+# How often a stage blocked on a full queue checks whether the run was stopped
+_POLL_SECONDS = 0.1
+
+
+class PrefetchPipeline:
+    """Decoder thread -> inference -> writer thread, connected by bounded queues"""
+
+    def __init__(self, decode: Callable[[Any], Any], infer: Callable[[List[Tuple[Any, Any, Any]]], Iterable],
+                 write: Callable[[Any], None], decode_depth: int = 4, write_depth: int = 8, batch_size: int = 1):
+        self.decode = decode
+        self.infer = infer
+        self.write = write
+        self.decode_depth = max(1, int(decode_depth))
+        self.write_depth = max(1, int(write_depth))
+        self.batch_size = max(1, int(batch_size))
+        self._write_queue = None
+        # Guards _write_queue, so no deferred write is queued behind the writer's end marker
+        self._defer_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self.wall_seconds = 0.0
+        self.stats = {stage: {"items": 0, "busy_seconds": 0.0} for stage in ("decode", "infer", "write")}
+
+    def _record(self, stage: str, seconds: float, items: int = 1):
+        with self._lock:
+            self.stats[stage]["items"] += items
+            self.stats[stage]["busy_seconds"] += seconds
+
+    @staticmethod
+    def _put(q: queue.Queue, entry, stop: threading.Event) -> bool:
+        """Blocking put that gives up once stop is set; returns whether the entry was queued"""
+        while not stop.is_set():
+            try:
+                q.put(entry, timeout=_POLL_SECONDS)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _decode_loop(self, items: Iterable, decoded: queue.Queue, stop: threading.Event):
+        try:
+            for item in items:
+                if stop.is_set():
+                    return
+                start = time.perf_counter()
+                try:
+                    value, error = self.decode(item), None
+                except Exception as e:
+                    value, error = None, str(e)
+                self._record("decode", time.perf_counter() - start)
+                if value is None and error is None:
+                    continue
+                if not self._put(decoded, (item, value, error), stop):
+                    return
+        finally:
+            self._put(decoded, _END, stop)
+
+    def _write_loop(self, outputs: queue.Queue):
+        while True:
+            entry = outputs.get()
+            if entry is _END:
+                return
+            fn, args = entry
+            start = time.perf_counter()
+            try:
+                fn(*args)
+            except Exception as e:
+                print(f"Warning: Write failed: {e}")
+            self._record("write", time.perf_counter() - start)
+
+    def defer(self, fn: Callable, *args):
+        """Run fn(*args) on the writer thread (inline when no run is in progress or the writer is stopping)"""
+        with self._defer_lock:
+            outputs = self._write_queue
+            if outputs is not None:
+                outputs.put((fn, args))
+                return
+        fn(*args)
+
+    def run(self, items: Iterable):
+        """Push items through decode, infer and write; returns once every output is written"""
+        start = time.perf_counter()
+        decoded = queue.Queue(maxsize=self.decode_depth)
+        outputs = queue.Queue(maxsize=self.write_depth)
+        stop = threading.Event()
+        decoder = threading.Thread(target=self._decode_loop, args=(items, decoded, stop),
+                                   name="prefetch-decode", daemon=True)
+        writer = threading.Thread(target=self._write_loop, args=(outputs,), name="prefetch-write", daemon=True)
+        self._write_queue = outputs
+        decoder.start()
+        writer.start()
+        try:
+            batch = []
+            finished = False
+            while not finished:
+                entry = decoded.get()
+                if entry is _END:
+                    finished = True
+                else:
+                    batch.append(entry)
+                if batch and (finished or len(batch) >= self.batch_size):
+                    infer_start = time.perf_counter()
+                    results = list(self.infer(batch))
+                    self._record("infer", time.perf_counter() - infer_start, len(batch))
+                    for result in results:
+                        outputs.put((self.write, (result,)))
+                    batch = []
+        finally:
+            # On an inference error the decoder stops at its next item; queued writes still finish
+            stop.set()
+            with self._defer_lock:
+                self._write_queue = None
+                outputs.put(_END)
+            writer.join()
+            decoder.join()
+            self.wall_seconds += time.perf_counter() - start
+
+    def report(self) -> Dict[str, Dict[str, float]]:
+        """Items, busy seconds and utilization (busy / wall time) per stage"""
+        wall = self.wall_seconds or 1e-9
+        return {
+            stage: {
+                "items": stats["items"],
+                "busy_seconds": round(stats["busy_seconds"], 3),
+                "utilization": round(stats["busy_seconds"] / wall, 3),
+            }
+            for stage, stats in self.stats.items()
+        }
+
+    def print_report(self):
+        print(f"\nPipeline stages (wall time {self.wall_seconds:.2f}s, "
+              f"decode queue {self.decode_depth}, write queue {self.write_depth}):")
+        for stage, stats in self.report().items():
+            print(f"  {stage:<7} {stats['items']:>6} items  {stats['busy_seconds']:>9.2f}s busy  "
+                  f"{stats['utilization'] * 100:>5.1f}% utilized")
@@ -0,0 +1,160 @@
+"""
+Accuracy / latency report for the int8 table detector.
+
+Each variant runs in its own process so peak memory is measured in isolation.
+For every sample marksheet the report prints latency of both variants and how far
+the int8 boxes and scores drift from fp32 (matched by label, best IoU).
+"""
+import os
+import sys
+import time
+import argparse
+import multiprocessing as mp
+import queue as queue_module
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def list_images(input_dir):
+    image_extensions = ('.jpg', '.jpeg', '.png', '.bmp', '.tiff')
+    return sorted(os.path.join(input_dir, f) for f in os.listdir(input_dir)
+                  if f.lower().endswith(image_extensions))
+
+
+def _peak_rss_mb():
+    try:
+        import resource
+        # ru_maxrss is KiB on Linux
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    except Exception:
+        return float("nan")
+
+
+def _run_variant(model_path, variant, images, repeats, threads, queue):
+    """Child process: load one variant, time every image, report detections and peak RSS"""
+    import torch
+    from scripts.predict_table import load_model, detect_tables, results_to_boxes_and_scores
+
+    if threads:
+        torch.set_num_threads(threads)
+    start = time.perf_counter()
+    processor, model = load_model(model_path, variant=variant)
+    model.eval()
+    load_seconds = time.perf_counter() - start
+
+    per_image = {}
+    for image_path in images:
+        best = float("inf")
+        detections = []
+        for _ in range(repeats):
+            t0 = time.perf_counter()
+            _, results = detect_tables(image_path, processor, model)
+            best = min(best, time.perf_counter() - t0)
+            detections = results_to_boxes_and_scores(results)
+        per_image[image_path] = {"latency": best, "detections": detections}
+
+    queue.put({"variant": variant, "load_seconds": load_seconds,
+               "peak_rss_mb": _peak_rss_mb(), "images": per_image})
+
+
+# How often the parent checks that the child process is still alive
+POLL_SECONDS = 1.0
+
+
+def run_variant(model_path, variant, images, repeats, threads, timeout=1800):
+    """Run one variant in a child process; a crashed or timed out child gives {"variant", "error"}"""
+    ctx = mp.get_context("spawn")
+    queue = ctx.Queue()
+    proc = ctx.Process(target=_run_variant, args=(model_path, variant, images, repeats, threads, queue))
+    proc.start()
+    deadline = time.monotonic() + timeout
+    report = None
+    while report is None:
+        try:
+            report = queue.get(timeout=POLL_SECONDS)
+        except queue_module.Empty:
+            if not proc.is_alive():
+                # Exited without a report (e.g. out of memory or the model failed to load)
+                proc.join()
+                report = {"variant": variant, "error": f"process exited with code {proc.exitcode}"}
+            elif time.monotonic() > deadline:
+                proc.terminate()
+                proc.join()
+                report = {"variant": variant, "error": f"timed out after {timeout:.0f}s"}
+    proc.join()
+    return report
+
+
+def box_iou(a, b):
+    x1, y1 = max(a[0], b[0]), max(a[1], b[1])
+    x2, y2 = min(a[2], b[2]), min(a[3], b[3])
+    inter = max(0.0, x2 - x1) * max(0.0, y2 - y1)
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter
+    return inter / union if union > 0 else 0.0
+
+
+def drift(reference, candidate):
+    """Match each fp32 detection to the int8 detection of the same label with best IoU"""
+    ious, score_diffs, missed = [], [], 0
+    for box_r, label_r, score_r in reference:
+        same_label = [(box_c, score_c) for box_c, label_c, score_c in candidate if label_c == label_r]
+        if not same_label:
+            missed += 1
+            continue
+        iou, score_c = max(((box_iou(box_r, box_c), score_c) for box_c, score_c in same_label), key=lambda x: x[0])
+        ious.append(iou)
+        score_diffs.append(abs(score_r - score_c))
+    extra = max(0, len(candidate) - (len(reference) - missed))
+    return ious, score_diffs, missed, extra
+
+
+def main():
+    parser = argparse.ArgumentParser(description="fp32 vs int8 table detector report")
+    parser.add_argument("--dir", type=str, default="data/input", help="Directory of sample marksheets")
+    parser.add_argument("--model", type=str, default="models/tt_finetuned", help="Path to table model")
+    parser.add_argument("--repeats", type=int, default=3, help="Timed runs per image (default: 3)")
+    parser.add_argument("--threads", type=int, default=0, help="torch intra-op threads (default: torch default)")
+    parser.add_argument("--timeout", type=float, default=1800, help="Seconds allowed per variant (default: 1800)")
+    args = parser.parse_args()
+
+    images = list_images(args.dir)
+    if not images:
+        print(f"No images found in {args.dir}")
+        return
+
+    fp32 = run_variant(args.model, "fp32", images, args.repeats, args.threads, args.timeout)
+    int8 = run_variant(args.model, "int8", images, args.repeats, args.threads, args.timeout)
+    failed = [report for report in (fp32, int8) if "error" in report]
+    for report in failed:
+        print(f"{report['variant']} variant failed: {report['error']}")
+    if failed:
+        return
+
+    print(f"{'Image':<20} | {'fp32':>8} | {'int8':>8} | {'Speedup':>7} | {'Tables':>7} | {'Min IoU':>7} | {'Max dScore':>10}")
+    print("-" * 85)
+    all_ious, all_diffs, total_missed, total_extra = [], [], 0, 0
+    for image_path in images:
+        ref = fp32["images"][image_path]
+        cand = int8["images"][image_path]
+        ious, diffs, missed, extra = drift(ref["detections"], cand["detections"])
+        all_ious += ious
+        all_diffs += diffs
+        total_missed += missed
+        total_extra += extra
+        print(f"{os.path.basename(image_path):<20} | {ref['latency']*1000:>6.0f}ms | {cand['latency']*1000:>6.0f}ms | "
+              f"{ref['latency']/cand['latency']:>6.2f}x | {len(ref['detections']):>3}/{len(cand['detections']):<3} | "
+              f"{(min(ious) if ious else float('nan')):>7.3f} | {(max(diffs) if diffs else 0.0):>10.4f}")
+
+    print("-" * 85)
+    for report in (fp32, int8):
+        latencies = [v["latency"] for v in report["images"].values()]
+        print(f"{report['variant']}: load {report['load_seconds']:.2f}s, "
+              f"mean latency {sum(latencies)/len(latencies)*1000:.0f}ms, peak RSS {report['peak_rss_mb']:.0f} MB")
+    if all_ious:
+        print(f"Box IoU vs fp32: mean {sum(all_ious)/len(all_ious):.3f}, min {min(all_ious):.3f}")
+        print(f"Score drift vs fp32: mean {sum(all_diffs)/len(all_diffs):.4f}, max {max(all_diffs):.4f}")
+    print(f"Tables missed by int8: {total_missed}, extra tables from int8: {total_extra}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+In-memory cache of whole-upload API responses.
+
+The backend keys each entry by the SHA-256 of the upload bytes (hashed while the
+upload is read), the request options and MarksheetProcessor.config_fingerprint(),
+so a re-submitted file returns its stored {board, data} without running the
+pipeline. Entries expire after ttl_seconds; past max_entries the least recently
+used entry is evicted. Only responses passing `cacheable_response` are stored, so
+a failed or unavailable OCR call is retried on the next upload instead of being
+served from the cache.
+"""
+
+import copy
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+
+# Texts process_ocr returns instead of raising when OCR could not run
+OCR_FAILURE_PREFIXES = ("OCR failed", "OCR not available")
+
+
+def ocr_text_failed(text: Optional[str]) -> bool:
+    """Whether an OCR text is missing or one of process_ocr's failure messages"""
+    return text is None or str(text).startswith(OCR_FAILURE_PREFIXES)
+
+
+def cacheable_response(payload: Dict[str, Any], ocr_ok: bool = True) -> bool:
+    """Whether a {board, data} response may be cached: subjects were extracted and OCR did not fail"""
+    return ocr_ok and bool((payload.get("data") or {}).get("subjects"))
+
+
+def result_cache_key(upload_sha256: str, **options) -> str:
+    """Cache key from the upload hash plus every option that changes the response"""
+    payload = json.dumps({"upload": upload_sha256, **options}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    """Thread-safe TTL + LRU cache of JSON-serializable responses"""
+
+    def __init__(self, max_entries: int = 256, ttl_seconds: float = 3600):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        """Copy of the stored value, or None when missing or expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.monotonic() - entry[0] > self.ttl_seconds:
+                if entry is not None:
+                    del self._entries[key]
+                    self.evictions += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            value = entry[1]
+        # Callers may mutate the response; the stored copy stays intact
+        return copy.deepcopy(value)
+
+    def put(self, key: str, value: Any):
+        if self.max_entries <= 0:
+            return
+        value = copy.deepcopy(value)
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "evictions": self.evictions,
+            }
@@ -0,0 +1,124 @@
+"""
+Append-only JSONL log of batch results.
+
+Batch runs write one JSON line per processed image as soon as its input
+finishes (PDF pages each get their own line), so nothing is kept in memory and a
+crash loses at most the inputs in flight. Every line carries the SHA-256 of the
+input file, and an input whose results contain no errors ends with a completion
+line. With resume=True the completed inputs are skipped, so an interrupted run
+continues where it stopped, a renamed but otherwise identical file is not
+processed twice, and inputs that failed or were cut short by a crash (their
+lines are dropped from the log) are retried.
+
+    log = ResultsLog("results/results.jsonl", resume=True)
+    if not log.is_done(digest):
+        log.append_input(results, digest)
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator
+
+CHUNK_SIZE = 1024 * 1024
+# Key of the line that marks an input as completed
+COMPLETE_KEY = "input_complete"
+
+
+def file_sha256(path) -> str:
+    """SHA-256 of a file, read in chunks"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ResultsLog:
+    """One JSON result per line; remembers input hashes of earlier runs when resuming"""
+
+    def __init__(self, path, resume: bool = False):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._done = set()
+        if resume:
+            for record in self._records():
+                if record.get(COMPLETE_KEY):
+                    self._done.add(record.get("input_sha256"))
+            self._drop_incomplete()
+        elif self.path.exists():
+            # A fresh run starts a fresh log
+            self.path.unlink()
+        self.resumed = len(self._done)
+        self._file = open(self.path, "a", encoding="utf-8")
+        if self._file.tell() and not self._ends_with_newline():
+            # Terminate a line cut short by a crash so the next record starts cleanly
+            self._file.write("\n")
+
+    def _ends_with_newline(self) -> bool:
+        with open(self.path, "rb") as f:
+            f.seek(-1, 2)
+            return f.read(1) == b"\n"
+
+    def _drop_incomplete(self):
+        """Rewrite the log without the lines of inputs that did not complete; they are processed again"""
+        if not self.path.exists():
+            return
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for record in self._records():
+                if record.get("input_sha256") in self._done:
+                    f.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+        os.replace(tmp_path, self.path)
+
+    def is_done(self, input_sha256: str) -> bool:
+        return input_sha256 in self._done
+
+    def _write(self, record: Dict[str, Any]):
+        self._file.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+        self._file.flush()
+
+    def append(self, result: Dict[str, Any], input_sha256: str):
+        """Write result as one line and flush it, so it survives a crash of this process"""
+        self._write({**result, "input_sha256": input_sha256})
+
+    def append_input(self, results: Iterable[Dict[str, Any]], input_sha256: str) -> bool:
+        """
+        Write every result of one input (one per PDF page), then mark the input completed unless a
+        result is an error; returns whether it was marked
+        """
+        ok = True
+        for result in results:
+            self.append(result, input_sha256)
+            ok = ok and result.get("overall_status") != "error"
+        if ok:
+            self._write({"input_sha256": input_sha256, COMPLETE_KEY: True})
+            self._done.add(input_sha256)
+        return ok
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        """Every result in the log, read lazily (completion lines are left out)"""
+        for record in self._records():
+            if not record.get(COMPLETE_KEY):
+                yield record
+
+    def _records(self) -> Iterator[Dict[str, Any]]:
+        """Every line of the log (a line cut short by a crash is skipped)"""
+        if not self.path.exists():
+            return
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
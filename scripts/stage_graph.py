@@ -0,0 +1,166 @@
+"""
+Small dependency-graph executor for pipeline stages.
+
+Stages are plain callables registered with the names of the stages they depend
+on. `run` submits every stage to an executor as soon as all of its dependencies
+have finished, passing their results as keyword arguments, and returns one
+Future per stage so the caller waits only for what it needs. OpenCV, torch and
+the OCR client release the GIL, so independent stages overlap on a thread pool.
+
+A stage whose dependency failed is not run; its future raises the dependency's
+exception (or is cancelled when the dependency was cancelled) as soon as that
+dependency finishes, without waiting for its other dependencies.
+
+    graph = StageGraph()
+    graph.add("tables", detect_tables)
+    graph.add("ocr", lambda tables: run_ocr(tables), deps=("tables",))
+    futures = graph.run(executor)
+    text = futures["ocr"].result()
+
+`StageGraph.abort(futures, error)` fails every unfinished stage at once (used for
+cancellation); stage functions already running keep going, and `wait_idle` waits
+until they have returned (e.g. before their artifacts must be on disk).
+"""
+
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, InvalidStateError
+from typing import Callable, Dict, Iterable, Optional
+
+
+def _fail(future: Future, error: BaseException):
+    """Set an exception unless the future was cancelled (or aborted) in the meantime"""
+    try:
+        future.set_exception(error)
+    except InvalidStateError:
+        pass
+
+
+def _succeed(future: Future, result):
+    try:
+        future.set_result(result)
+    except InvalidStateError:
+        # Aborted while running; the result is dropped
+        pass
+
+
+class StageGraph:
+    """Named stages with dependencies, executed concurrently on an executor"""
+
+    def __init__(self):
+        self._stages = OrderedDict()
+        # Stage tasks submitted by run and not yet returned
+        self._active = 0
+        self._idle = threading.Condition()
+
+    def add(self, name: str, fn: Callable, deps: Iterable[str] = ()) -> "StageGraph":
+        """Register fn as stage name; fn is called with the results of deps as keyword arguments"""
+        deps = tuple(deps)
+        if name in self._stages:
+            raise ValueError(f"Stage '{name}' already registered")
+        missing = [dep for dep in deps if dep not in self._stages]
+        if missing:
+            # Dependencies must be registered first, which also rules out cycles
+            raise ValueError(f"Stage '{name}' depends on unknown stages {missing}")
+        self._stages[name] = (fn, deps)
+        return self
+
+    def run(self, executor) -> Dict[str, Future]:
+        """Start every stage whose dependencies are met; returns {stage name: Future}"""
+        futures = {name: Future() for name in self._stages}
+        waiting = {name: set(deps) for name, (_, deps) in self._stages.items()}
+        dependents = {name: [] for name in self._stages}
+        for name, (_, deps) in self._stages.items():
+            for dep in deps:
+                dependents[dep].append(name)
+        lock = threading.Lock()
+
+        def launch(name):
+            fn, deps = self._stages[name]
+            future = futures[name]
+            if future.done():
+                # Cancelled by the caller before its dependencies finished
+                return
+            for dep in deps:
+                if not futures[dep].done():
+                    continue
+                if futures[dep].cancelled():
+                    future.cancel()
+                    return
+                error = futures[dep].exception()
+                if error is not None:
+                    _fail(future, error)
+                    return
+            if not all(futures[dep].done() for dep in deps):
+                # Called early for a failed dependency that another launch already handled
+                return
+
+            def task():
+                try:
+                    run_task()
+                finally:
+                    with self._idle:
+                        self._active -= 1
+                        self._idle.notify_all()
+
+            def run_task():
+                if future.done():
+                    # Aborted while queued behind other stages
+                    return
+                try:
+                    if not future.set_running_or_notify_cancel():
+                        return
+                except RuntimeError:
+                    # Aborted between the check above and here
+                    return
+                try:
+                    result = fn(**{dep: futures[dep].result() for dep in deps})
+                except BaseException as e:
+                    _fail(future, e)
+                else:
+                    _succeed(future, result)
+
+            with self._idle:
+                self._active += 1
+            try:
+                executor.submit(task)
+            except RuntimeError as e:
+                # Executor shut down
+                with self._idle:
+                    self._active -= 1
+                    self._idle.notify_all()
+                _fail(future, e)
+
+        def on_done(name):
+            failed = futures[name].cancelled() or futures[name].exception() is not None
+            ready = []
+            with lock:
+                for child in dependents[name]:
+                    waiting[child].discard(name)
+                    # A failed dependency settles its children right away
+                    if failed or not waiting[child]:
+                        ready.append(child)
+            for child in ready:
+                launch(child)
+
+        roots = [name for name, deps in waiting.items() if not deps]
+        for name, future in futures.items():
+            future.add_done_callback(lambda _, name=name: on_done(name))
+        for name in roots:
+            launch(name)
+        return futures
+
+    def wait_idle(self, timeout: Optional[float] = None) -> bool:
+        """Wait until no stage function of this graph is running or queued; returns False on timeout"""
+        with self._idle:
+            return self._idle.wait_for(lambda: self._active == 0, timeout)
+
+    @staticmethod
+    def abort(futures: Dict[str, Future], error: BaseException):
+        """
+        Fail every unfinished stage with error, so waiters return at once; stages not yet started
+        never run, running ones finish in the background and their results are dropped
+        """
+        for future in futures.values():
+            if not future.done():
+                _fail(future, error)
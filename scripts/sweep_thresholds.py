@@ -0,0 +1,74 @@
+"""
+Threshold sweep over the raw-detection cache.
+
+Re-thresholds every cached image (see scripts/detection_cache.py) for each
+combination of the given thresholds, without running any model, and reports how
+many images keep an information table, a marks table and a board logo.
+Populate the cache first with `python main.py --dir <corpus> --detection-cache data/cache/detections`.
+"""
+import os
+import sys
+import time
+import argparse
+import itertools
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.detection_cache import DetectionCache, rethreshold
+
+
+def parse_values(text):
+    return [float(v) for v in text.split(",") if v.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sweep detection thresholds over cached raw detections")
+    parser.add_argument("--cache-dir", type=str, default="data/cache/detections", help="Raw detection cache directory")
+    parser.add_argument("--marks", type=str, default="0.5,0.6,0.7,0.8,0.9", help="Marks table thresholds")
+    parser.add_argument("--info", type=str, default="0.5", help="Information table thresholds")
+    parser.add_argument("--confidence", type=str, default="0.5", help="Thresholds for other table classes")
+    parser.add_argument("--logo", type=str, default="0.25", help="Logo confidence thresholds")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    entries = list(DetectionCache(args.cache_dir))
+    load_seconds = time.perf_counter() - start
+    if not entries:
+        print(f"No cached detections in {args.cache_dir}")
+        return
+
+    setups = {str(sorted(raw.meta.get("setup", {}).items())) for raw in entries}
+    print(f"Loaded {len(entries)} cached images in {load_seconds:.2f}s")
+    if len(setups) > 1:
+        print(f"Warning: cache mixes {len(setups)} detector setups (model versions/backends)")
+
+    grid = list(itertools.product(parse_values(args.logo), parse_values(args.confidence),
+                                  parse_values(args.info), parse_values(args.marks)))
+    print(f"\n{'Logo':>5} | {'Conf':>5} | {'Info':>5} | {'Marks':>5} | {'Board':>6} | {'Info tbl':>8} | "
+          f"{'Marks tbl':>9} | {'Both':>6} | Boards")
+    print("-" * 100)
+    start = time.perf_counter()
+    for logo, confidence, info, marks in grid:
+        boards = {}
+        with_board = with_info = with_marks = with_both = 0
+        for raw in entries:
+            detections = rethreshold(raw, confidence, info, marks, logo)
+            labels = set(detections.table_labels)
+            has_info, has_marks = 0 in labels, 1 in labels
+            with_board += detections.board_id != -1
+            with_info += has_info
+            with_marks += has_marks
+            with_both += has_info and has_marks
+            boards[detections.board_name] = boards.get(detections.board_name, 0) + 1
+        n = len(entries)
+        board_summary = ", ".join(f"{name}: {count}" for name, count in sorted(boards.items()))
+        print(f"{logo:>5.2f} | {confidence:>5.2f} | {info:>5.2f} | {marks:>5.2f} | {with_board:>3}/{n:<2} | "
+              f"{with_info:>5}/{n:<2} | {with_marks:>6}/{n:<2} | {with_both:>3}/{n:<2} | {board_summary}")
+    elapsed = time.perf_counter() - start
+    print("-" * 100)
+    print(f"{len(grid)} threshold settings x {len(entries)} images in {elapsed*1000:.1f}ms "
+          f"({elapsed / (len(grid) * len(entries)) * 1e6:.1f}us per image)")
+
+
+if __name__ == "__main__":
+    main()
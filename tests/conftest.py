@@ -0,0 +1,7 @@
+import sys
+from pathlib import Path
+
+# Modules are imported as scripts.<name>, and some of them import their siblings by bare name
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "scripts"))
@@ -0,0 +1,34 @@
+import pytest
+
+pytest.importorskip("cv2")
+pytest.importorskip("torch")
+pytest.importorskip("transformers")
+pytest.importorskip("matplotlib")
+
+from PIL import Image
+
+from scripts.image_context import ImageContext
+from scripts.predict_table import load_image
+
+
+@pytest.fixture
+def rotated_jpeg(tmp_path):
+    """40x20 JPEG whose EXIF orientation (6) asks viewers to rotate it to 20x40"""
+    path = tmp_path / "rotated.jpg"
+    exif = Image.Exif()
+    exif[0x0112] = 6
+    Image.new("RGB", (40, 20), (200, 30, 30)).save(path, exif=exif)
+    return path
+
+
+def test_context_pixels_are_exif_oriented(rotated_jpeg):
+    ctx = ImageContext.from_path(rotated_jpeg)
+    assert ctx.size == (20, 40)
+    assert load_image(ctx).size == (20, 40)
+    assert load_image(rotated_jpeg).size == (20, 40)
+
+
+def test_fix_orientation_false_is_honored_for_file_contexts(rotated_jpeg):
+    assert load_image(rotated_jpeg, fix_orientation=False).size == (40, 20)
+    assert load_image(ImageContext.from_path(rotated_jpeg), fix_orientation=False).size == (40, 20)
+
@@ -0,0 +1,96 @@
+import threading
+
+import pytest
+
+from scripts.cancel import Cancelled
+from scripts.job_queue import JobQueue, QueueFull
+
+
+def blocking_job(release, cancel=None):
+    release.wait(5)
+    return "done"
+
+
+def test_submit_past_capacity_raises_queue_full():
+    release = threading.Event()
+    jobs = JobQueue(workers=1, max_pending=1)
+    try:
+        jobs.submit("process", blocking_job, release)
+        jobs.submit("process", blocking_job, release)
+        # The API maps QueueFull to 429
+        with pytest.raises(QueueFull):
+            jobs.submit("process", blocking_job, release)
+        assert jobs.stats()["rejected"] == 1
+    finally:
+        release.set()
+
+
+def test_cancelling_a_queued_job_frees_its_slot_at_once():
+    release = threading.Event()
+    jobs = JobQueue(workers=1, max_pending=1)
+    try:
+        running = jobs.submit("process", blocking_job, release)
+        queued = jobs.submit("process", blocking_job, release)
+        jobs.cancel(queued.id, "cancelled by client")
+        assert queued.status == "cancelled"
+        with pytest.raises(Cancelled):
+            queued.future.result(timeout=1)
+        # The freed slot takes a new job while the first one is still running
+        replacement = jobs.submit("process", blocking_job, release)
+        assert running.status == "running"
+    finally:
+        release.set()
+    assert replacement.future.result(timeout=5) == "done"
+    assert queued.status == "cancelled"
+
+
+def test_cancelling_a_running_job_signals_its_token():
+    started = threading.Event()
+
+    def cooperative(cancel=None):
+        started.set()
+        cancel.sleep(5)
+
+    jobs = JobQueue(workers=1)
+    job = jobs.submit("process", cooperative)
+    assert started.wait(5)
+    jobs.cancel(job.id)
+    with pytest.raises(Cancelled):
+        job.future.result(timeout=5)
+    assert job.status == "cancelled"
+    assert jobs.stats()["in_flight"] == 0
+
+
+def test_release_forgets_finished_and_running_jobs():
+    release = threading.Event()
+    jobs = JobQueue(workers=2)
+    finished = jobs.submit("process", lambda cancel=None: 1)
+    finished.future.result(timeout=5)
+    jobs.release(finished)
+    assert jobs.get(finished.id) is None
+
+    running = jobs.submit("process", blocking_job, release)
+    jobs.release(running)
+    # Still registered (and cancellable) until it finishes
+    assert jobs.get(running.id) is running
+    release.set()
+    running.future.result(timeout=5)
+    assert jobs.get(running.id) is None
+
+
+def test_registry_keeps_at_most_max_finished_jobs():
+    jobs = JobQueue(workers=1, max_finished=2)
+    submitted = [jobs.submit("process", lambda cancel=None: None) for _ in range(4)]
+    for job in submitted:
+        job.future.result(timeout=5)
+    assert [jobs.get(job.id) for job in submitted[:2]] == [None, None]
+    assert jobs.stats()["jobs"]["done"] == 2
+
+
+def test_render_shapes_finished_job_fields():
+    jobs = JobQueue(workers=1)
+    job = jobs.submit("process", lambda cancel=None: ({"board": "CBSE"}, "MISS"),
+                      render=lambda result: {"result": result[0], "cache": result[1]})
+    assert job.render(job.future.result(timeout=5)) == {"result": {"board": "CBSE"}, "cache": "MISS"}
+    plain = jobs.submit("process_document", lambda cancel=None: {"pages": {}})
+    assert plain.render(plain.future.result(timeout=5)) == {"result": {"pages": {}}}
@@ -0,0 +1,60 @@
+import threading
+
+import pytest
+
+np = pytest.importorskip("numpy")
+main = pytest.importorskip("main")
+
+from scripts.artifacts import NULL_SINK
+from scripts.image_context import ImageContext
+from scripts.pipeline_policy import PipelineAborted, PipelinePolicy
+
+
+def make_processor(monkeypatch, logo, policy=None):
+    processor = main.MarksheetProcessor(logo_model_path="missing.pt", table_model_path="missing",
+                                        policy=policy or PipelinePolicy())
+    calls = []
+    lock = threading.Lock()
+
+    def record(name, value):
+        def fn(*args, **kwargs):
+            with lock:
+                calls.append(name)
+            return value
+        return fn
+
+    monkeypatch.setattr(processor, "detect_logo", record("logo", logo))
+    monkeypatch.setattr(processor, "detect_face_rects", record("face", [(0, 0, 10, 10)]))
+    monkeypatch.setattr(processor, "detect_table_data", record("tables", []))
+    monkeypatch.setattr(main, "preprocess_marksheet", lambda ctx, **kwargs: (ctx.bgr, ctx.bgr, None))
+    return processor, calls
+
+
+def blank_page():
+    return ImageContext.from_array(np.full((400, 300, 3), 255, dtype=np.uint8), name="blank.jpg")
+
+
+def test_invalid_logo_never_runs_table_stage(monkeypatch):
+    processor, calls = make_processor(monkeypatch, (-1, [], []))
+    stages = processor.marksheet_stages(blank_page()).run(processor.stage_executor())
+    with pytest.raises(PipelineAborted):
+        stages["detections"].result(timeout=5)
+    with pytest.raises(PipelineAborted):
+        stages["tables"].result(timeout=5)
+    assert "tables" not in calls
+
+
+def test_aborted_marksheet_reports_status_without_tables(monkeypatch):
+    processor, calls = make_processor(monkeypatch, (-1, [], []))
+    result = processor.process_single_marksheet(blank_page(), sink=NULL_SINK)
+    assert result["overall_status"] == "invalid_logo"
+    assert result["aborted"]["stage"] == "logo"
+    assert "tables" not in calls
+
+
+def test_tables_run_when_a_missing_logo_does_not_abort(monkeypatch):
+    policy = PipelinePolicy(abort_on=(), skip_stages=("ocr", "annotate"))
+    processor, calls = make_processor(monkeypatch, (-1, [], []), policy)
+    stages = processor.marksheet_stages(blank_page()).run(processor.stage_executor())
+    assert stages["tables"].result(timeout=5) == []
+    assert "tables" in calls
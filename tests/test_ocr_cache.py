@@ -0,0 +1,64 @@
+import os
+import time
+
+from scripts import ocr_cache as ocr_cache_module
+from scripts.ocr_cache import OcrCache
+
+
+def test_put_get_and_key_depends_on_options(tmp_path):
+    cache = OcrCache(str(tmp_path))
+    key = OcrCache.key(b"crop", {"mode": "form"})
+    assert key != OcrCache.key(b"crop", {"mode": "high_quality"})
+    assert key != OcrCache.key(b"other crop", {"mode": "form"})
+    assert cache.get(key) is None
+    cache.put(key, "Name: A")
+    assert cache.get(key) == "Name: A"
+    assert (cache.hits, cache.misses, cache.writes) == (1, 1, 1)
+
+
+def test_entries_older_than_max_age_are_dropped_on_read(tmp_path, monkeypatch):
+    cache = OcrCache(str(tmp_path), max_age_seconds=60)
+    key = OcrCache.key(b"crop")
+    cache.put(key, "text")
+    now = time.time()
+    monkeypatch.setattr(ocr_cache_module.time, "time", lambda: now + 61)
+    assert cache.get(key) is None
+    assert cache.evictions == 1
+    assert cache.stats()["entries"] == 0
+
+
+def test_sweep_evicts_least_recently_used_past_max_bytes(tmp_path):
+    cache = OcrCache(str(tmp_path))
+    keys = [OcrCache.key(bytes([i])) for i in range(4)]
+    for age, key in zip((400, 300, 200, 100), keys):
+        cache.put(key, "x" * 100)
+        # Entries were used longest ago first
+        stamp = time.time() - age
+        os.utime(cache._path(key), (stamp, stamp))
+    entry_size = cache._path(keys[0]).stat().st_size
+    cache.max_bytes = entry_size * 3
+    # A hit makes the oldest entry the most recently used
+    assert cache.get(keys[0]) == "x" * 100
+    cache.sweep()
+    # Back under 90% of the limit: the two least recently used entries are gone
+    assert [cache.get(key) is not None for key in keys] == [True, False, False, True]
+
+
+def test_sweep_drops_expired_entries(tmp_path):
+    cache = OcrCache(str(tmp_path), max_age_seconds=60)
+    old, fresh = OcrCache.key(b"old"), OcrCache.key(b"fresh")
+    cache.put(old, "old")
+    cache.put(fresh, "fresh")
+    stamp = time.time() - 120
+    os.utime(cache._path(old), (stamp, stamp))
+    cache.sweep()
+    assert not cache._path(old).exists()
+    assert cache._path(fresh).exists()
+
+
+def test_disabled_cache_stores_nothing(tmp_path):
+    cache = OcrCache(str(tmp_path), enabled=False)
+    key = OcrCache.key(b"crop")
+    cache.put(key, "text")
+    assert cache.get(key) is None
+    assert not any(tmp_path.iterdir())
@@ -0,0 +1,51 @@
+import os
+
+import pytest
+
+pytest.importorskip("PIL")
+
+from scripts.pdf_ingest import _pdf_path, parse_page_selector
+
+
+@pytest.mark.parametrize("spec, page_count, expected", [
+    (None, None, [1]),
+    ("1", None, [1]),
+    ("2,4", None, [2, 4]),
+    ("1-3", None, [1, 2, 3]),
+    ("3,1-2,2", None, [1, 2, 3]),
+    (" 1 , 3 ", None, [1, 3]),
+    ("3-", 5, [3, 4, 5]),
+    ("-2", None, [1, 2]),
+    ("last", 4, [4]),
+    ("ALL", 3, [1, 2, 3]),
+    ("1,last", 1, [1]),
+    ("2-9", 4, [2, 3, 4]),
+    ("7", 4, []),
+])
+def test_parse_page_selector(spec, page_count, expected):
+    assert parse_page_selector(spec, page_count) == expected
+
+
+@pytest.mark.parametrize("spec", ["all", "last", "3-", "1,last"])
+def test_selectors_that_need_the_page_count(spec):
+    with pytest.raises(ValueError, match="page count"):
+        parse_page_selector(spec)
+
+
+@pytest.mark.parametrize("spec", ["0", "3-1", "0-2", "two"])
+def test_invalid_selectors(spec):
+    with pytest.raises(ValueError):
+        parse_page_selector(spec, 5)
+
+
+def test_pdf_bytes_are_spilled_to_one_temporary_file():
+    with _pdf_path(b"%PDF-1.4 test") as path:
+        with open(path, "rb") as f:
+            assert f.read() == b"%PDF-1.4 test"
+    assert not os.path.exists(path)
+
+
+def test_pdf_paths_are_used_as_is(tmp_path):
+    pdf = tmp_path / "scan.pdf"
+    with _pdf_path(pdf) as path:
+        assert path == str(pdf)
@@ -0,0 +1,45 @@
+import pytest
+
+from scripts.pipeline_policy import PipelineAborted, PipelinePolicy
+
+
+def test_default_policy_aborts_on_invalid_logo_only():
+    policy = PipelinePolicy()
+    with pytest.raises(PipelineAborted) as excinfo:
+        policy.check("invalid_logo", True, "logo", "No board logo detected")
+    assert (excinfo.value.status, excinfo.value.stage) == ("invalid_logo", "logo")
+    # Passed checks and statuses not configured to abort do nothing
+    policy.check("invalid_logo", False, "logo", "")
+    policy.check("no_tables", True, "tables", "")
+    policy.check("no_photo", True, "face", "")
+
+
+def test_from_spec_parses_comma_separated_lists():
+    policy = PipelinePolicy.from_spec("no_tables, no_photo", "annotate,")
+    assert policy.abort_on == {"no_tables", "no_photo"}
+    assert policy.skip_stages == {"annotate"}
+    with pytest.raises(PipelineAborted):
+        policy.check("no_photo", True, "face", "No candidate photo detected")
+    policy.check("invalid_logo", True, "logo", "")
+    assert PipelinePolicy.from_spec("", "").abort_on == set()
+
+
+def test_runs_honors_global_and_board_skips():
+    policy = PipelinePolicy(skip_stages=("annotate",))
+    assert not policy.runs("annotate")
+    assert not policy.runs("annotate", "CBSE")
+    assert policy.runs("ocr", "CBSE")
+    # Face detection is skipped for ICSE by default, where the photo is optional
+    assert not policy.runs("face", "ICSE")
+    assert policy.runs("face", "CBSE")
+    assert policy.runs("face")
+    assert PipelinePolicy(board_skip_stages={}).runs("face", "ICSE")
+
+
+def test_unknown_names_are_rejected():
+    with pytest.raises(ValueError):
+        PipelinePolicy(abort_on=("blurry",))
+    with pytest.raises(ValueError):
+        PipelinePolicy(skip_stages=("tables",))
+    with pytest.raises(ValueError):
+        PipelinePolicy(board_skip_stages={"CBSE": ("logo",)})
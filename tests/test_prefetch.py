@@ -0,0 +1,87 @@
+import threading
+
+import pytest
+
+from scripts.prefetch import PrefetchPipeline
+
+
+def run_pipeline(items, decode=lambda item: item * 10, infer=None, batch_size=2, **kwargs):
+    written = []
+    batches = []
+
+    def default_infer(batch):
+        batches.append([item for item, _, _ in batch])
+        return [(item, value, error) for item, value, error in batch]
+
+    pipeline = PrefetchPipeline(decode, infer or default_infer, written.append, batch_size=batch_size, **kwargs)
+    pipeline.run(items)
+    return pipeline, written, batches
+
+
+def test_outputs_keep_input_order_and_batch_size():
+    pipeline, written, batches = run_pipeline(range(5), decode_depth=1, write_depth=1)
+    assert written == [(i, i * 10, None) for i in range(5)]
+    assert batches == [[0, 1], [2, 3], [4]]
+    report = pipeline.report()
+    assert report["decode"]["items"] == 5
+    assert report["infer"]["items"] == 5
+    assert report["write"]["items"] == 5
+
+
+def test_decode_errors_reach_infer_and_skipped_items_do_not():
+    def decode(item):
+        if item == 1:
+            raise ValueError("corrupt")
+        if item == 2:
+            return None
+        return item
+
+    _, written, _ = run_pipeline(range(4), decode=decode)
+    assert written == [(0, 0, None), (1, None, "corrupt"), (3, 3, None)]
+
+
+def test_write_errors_do_not_stop_the_run():
+    written = []
+
+    def write(output):
+        if output == 1:
+            raise IOError("disk full")
+        written.append(output)
+
+    PrefetchPipeline(lambda item: item, lambda batch: [item for item, _, _ in batch], write).run(range(3))
+    assert written == [0, 2]
+
+
+def test_infer_error_stops_the_decoder_and_drains_writes():
+    decoded = []
+
+    def decode(item):
+        decoded.append(item)
+        return item
+
+    def infer(batch):
+        if batch[0][0] == 2:
+            raise RuntimeError("model crashed")
+        return [item for item, _, _ in batch]
+
+    written = []
+    pipeline = PrefetchPipeline(decode, infer, written.append, decode_depth=1, batch_size=1)
+    with pytest.raises(RuntimeError):
+        pipeline.run(range(100))
+    # Outputs of earlier batches were still written; the decoder stopped instead of reading everything
+    assert written == [0, 1]
+    assert len(decoded) < 100
+
+
+def test_defer_runs_on_writer_during_a_run_and_inline_after_it():
+    threads = []
+
+    def infer(batch):
+        pipeline.defer(lambda: threads.append(threading.current_thread().name))
+        return []
+
+    pipeline = PrefetchPipeline(lambda item: item, infer, lambda output: None)
+    pipeline.run([1])
+    assert threads == ["prefetch-write"]
+    pipeline.defer(lambda: threads.append(threading.current_thread().name))
+    assert threads == ["prefetch-write", threading.current_thread().name]
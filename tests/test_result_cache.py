@@ -0,0 +1,74 @@
+import pytest
+
+from scripts import result_cache as result_cache_module
+from scripts.extractor import extract_from_texts
+from scripts.result_cache import ResultCache, cacheable_response, ocr_text_failed, result_cache_key
+
+SUBJECTS = [{"subject": "MATHEMATICS", "marks": "95"}]
+
+
+@pytest.mark.parametrize("board", ["CBSE", "ICSE", "Uttarakhand"])
+@pytest.mark.parametrize("text", ["OCR failed: timed out", "OCR not available - no valid API key"])
+def test_failed_ocr_school_response_is_not_cached(board, text):
+    # /process and /process_batch build school responses the same way: {board, data}
+    data = extract_from_texts(text, text, board, "upload")
+    assert data is not None and data["subjects"] == []
+    assert not cacheable_response({"board": board, "data": data}, ocr_ok=not ocr_text_failed(text))
+
+
+def test_school_response_with_failed_table_ocr_is_not_cached():
+    # Subjects came through, but one table's OCR failed: the data is incomplete
+    payload = {"board": "CBSE", "data": {"board": "CBSE", "subjects": SUBJECTS}}
+    assert not cacheable_response(payload, ocr_ok=False)
+    assert cacheable_response(payload, ocr_ok=True)
+
+
+def test_college_response_needs_subjects():
+    assert not cacheable_response({"board": "COLLEGE_FIXED", "data": {"subjects": []}})
+    assert not cacheable_response({"board": "COLLEGE_FIXED", "data": None})
+    assert cacheable_response({"board": "COLLEGE_FIXED", "data": {"subjects": SUBJECTS}})
+
+
+def test_ocr_text_failed():
+    assert ocr_text_failed(None)
+    assert ocr_text_failed("OCR failed: whisper error: no details")
+    assert not ocr_text_failed("Name of Candidate: A")
+
+
+def test_result_cache_entries_expire_after_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(result_cache_module.time, "monotonic", lambda: now[0])
+    cache = ResultCache(max_entries=4, ttl_seconds=60)
+    cache.put("a", {"board": "CBSE"})
+    now[0] += 59
+    assert cache.get("a") == {"board": "CBSE"}
+    now[0] += 2
+    assert cache.get("a") is None
+    assert cache.stats()["evictions"] == 1
+
+
+def test_result_cache_evicts_least_recently_used():
+    cache = ResultCache(max_entries=2, ttl_seconds=60)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    # Reading "a" makes "b" the least recently used
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+
+
+def test_result_cache_returns_copies():
+    cache = ResultCache()
+    payload = {"data": {"subjects": []}}
+    cache.put("a", payload)
+    payload["data"]["subjects"].append("changed after put")
+    cached = cache.get("a")
+    cached["data"]["subjects"].append("changed by a caller")
+    assert cache.get("a") == {"data": {"subjects": []}}
+
+
+def test_result_cache_key_covers_options():
+    assert result_cache_key("sha", mode="school", page=None) == result_cache_key("sha", page=None, mode="school")
+    assert result_cache_key("sha", mode="school") != result_cache_key("sha", mode="college")
+    assert result_cache_key("sha", config={"t": 0.5}) != result_cache_key("sha", config={"t": 0.6})
@@ -0,0 +1,64 @@
+import hashlib
+import json
+
+from scripts.results_log import ResultsLog, file_sha256
+
+
+def records(path):
+    return [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+
+
+def test_resume_skips_completed_inputs_only(tmp_path):
+    path = tmp_path / "results.jsonl"
+    with ResultsLog(path) as log:
+        assert log.append_input([{"overall_status": "valid_marksheet"}], "good")
+        assert not log.append_input([{"overall_status": "error", "error": "boom"}], "failed")
+        # A PDF whose run crashed after its first page
+        log.append({"overall_status": "valid_marksheet", "page": 1}, "partial")
+
+    with ResultsLog(path, resume=True) as log:
+        assert log.resumed == 1
+        assert log.is_done("good")
+        assert not log.is_done("failed")
+        assert not log.is_done("partial")
+        # Lines of the inputs that will be retried are dropped
+        assert [r["input_sha256"] for r in log] == ["good"]
+        log.append_input([{"overall_status": "valid_marksheet", "page": p} for p in (1, 2)], "partial")
+
+    with ResultsLog(path, resume=True) as log:
+        assert log.is_done("partial")
+        assert [r.get("page") for r in log if r["input_sha256"] == "partial"] == [1, 2]
+
+
+def test_completion_lines_are_not_results(tmp_path):
+    path = tmp_path / "results.jsonl"
+    with ResultsLog(path) as log:
+        log.append_input([{"overall_status": "no_tables"}], "a")
+    assert len(records(path)) == 2
+    assert list(ResultsLog(path, resume=True)) == [{"overall_status": "no_tables", "input_sha256": "a"}]
+
+
+def test_truncated_last_line_is_skipped_and_terminated(tmp_path):
+    path = tmp_path / "results.jsonl"
+    with ResultsLog(path) as log:
+        log.append_input([{"overall_status": "valid_marksheet"}], "a")
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"overall_status": "val')
+    with ResultsLog(path, resume=True) as log:
+        log.append_input([{"overall_status": "valid_marksheet"}], "b")
+    assert [r["input_sha256"] for r in ResultsLog(path, resume=True)] == ["a", "b"]
+
+
+def test_fresh_run_starts_a_fresh_log(tmp_path):
+    path = tmp_path / "results.jsonl"
+    with ResultsLog(path) as log:
+        log.append_input([{"overall_status": "valid_marksheet"}], "a")
+    with ResultsLog(path) as log:
+        assert not log.is_done("a")
+    assert path.read_text(encoding="utf-8") == ""
+
+
+def test_file_sha256(tmp_path):
+    path = tmp_path / "scan.jpg"
+    path.write_bytes(b"x" * 10)
+    assert file_sha256(path) == hashlib.sha256(b"x" * 10).hexdigest()
@@ -0,0 +1,104 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from scripts.stage_graph import StageGraph
+
+
+def test_abort_while_stages_are_queued(caplog):
+    release = threading.Event()
+    ran = []
+    graph = StageGraph()
+    graph.add("busy", lambda: release.wait(5))
+    graph.add("queued_a", lambda: ran.append("a"))
+    graph.add("queued_b", lambda: ran.append("b"))
+    graph.add("child", lambda queued_a: ran.append("child"), deps=("queued_a",))
+
+    with caplog.at_level(logging.CRITICAL, logger="concurrent.futures"):
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            futures = graph.run(executor)
+            # The single worker is busy, so queued_a and queued_b wait in the executor queue
+            time.sleep(0.05)
+            error = RuntimeError("cancelled")
+            StageGraph.abort(futures, error)
+            release.set()
+
+    assert ran == []
+    for name in ("queued_a", "queued_b", "child"):
+        assert futures[name].exception() is error
+    assert futures["busy"].exception() is error
+    assert "unexpected state" not in caplog.text
+
+
+def test_stages_receive_dependency_results():
+    graph = StageGraph()
+    graph.add("a", lambda: 2)
+    graph.add("b", lambda: 3)
+    graph.add("product", lambda a, b: a * b, deps=("a", "b"))
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        futures = graph.run(executor)
+        assert futures["product"].result(timeout=5) == 6
+
+
+def test_independent_stages_overlap():
+    both_started = threading.Barrier(2, timeout=5)
+    graph = StageGraph()
+    graph.add("left", both_started.wait)
+    graph.add("right", both_started.wait)
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        futures = graph.run(executor)
+        # Each stage waits for the other: this only finishes when they run concurrently
+        futures["left"].result(timeout=5)
+        futures["right"].result(timeout=5)
+
+
+def test_failed_dependency_settles_children_without_waiting_for_other_deps():
+    release = threading.Event()
+    ran = []
+    graph = StageGraph()
+    graph.add("slow", lambda: release.wait(5))
+    graph.add("broken", lambda: 1 / 0)
+    graph.add("child", lambda slow, broken: ran.append("child"), deps=("slow", "broken"))
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        futures = graph.run(executor)
+        # Fails while "slow" is still running
+        assert isinstance(futures["child"].exception(timeout=5), ZeroDivisionError)
+        assert not futures["slow"].done()
+        release.set()
+    assert ran == []
+
+
+def test_add_rejects_unknown_and_duplicate_stages():
+    graph = StageGraph()
+    graph.add("a", lambda: None)
+    with pytest.raises(ValueError):
+        graph.add("a", lambda: None)
+    with pytest.raises(ValueError):
+        graph.add("b", lambda missing: None, deps=("missing",))
+
+
+def test_wait_idle_outlasts_aborted_running_stage():
+    started = threading.Event()
+    release = threading.Event()
+    finished = []
+    graph = StageGraph()
+
+    def running():
+        started.set()
+        release.wait(5)
+        finished.append("running")
+
+    graph.add("running", running)
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        futures = graph.run(executor)
+        started.wait(5)
+        StageGraph.abort(futures, RuntimeError("aborted"))
+        # The future is settled at once, but the stage function is still running
+        assert futures["running"].done()
+        assert not graph.wait_idle(timeout=0.05)
+        release.set()
+        assert graph.wait_idle(timeout=5)
+    assert finished == ["running"]
@@ -0,0 +1,52 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+torch = pytest.importorskip("torch")
+transformers = pytest.importorskip("transformers")
+pytest.importorskip("matplotlib")
+
+from types import SimpleNamespace
+
+from scripts.predict_table import apply_class_thresholds, results_to_boxes_and_scores, tables_from_raw
+
+THRESHOLDS = [
+    dict(confidence_threshold=0.5, info_threshold=0.5, marks_threshold=0.8),
+    dict(confidence_threshold=0.3, info_threshold=0.6, marks_threshold=0.4),
+    dict(confidence_threshold=0.5, info_threshold=None, marks_threshold=None),
+]
+
+
+def synthetic_raw(seed, queries=30, classes=2, size=(1240, 1754)):
+    rng = np.random.default_rng(seed)
+    # Spread logits wide enough that every threshold keeps some queries and drops others
+    logits = rng.normal(0, 3, size=(queries, classes + 1)).astype(np.float32)
+    centers = rng.uniform(0.2, 0.8, size=(queries, 2))
+    extents = rng.uniform(0.05, 0.3, size=(queries, 2))
+    pred_boxes = np.concatenate([centers, extents], axis=1).astype(np.float32)
+    return {"logits": logits, "pred_boxes": pred_boxes, "size": size}
+
+
+def reference(raw, confidence_threshold, info_threshold, marks_threshold):
+    """What detect_tables_in_images returns for the same model output"""
+    processor = transformers.DetrImageProcessor()
+    outputs = SimpleNamespace(logits=torch.from_numpy(raw["logits"])[None],
+                              pred_boxes=torch.from_numpy(raw["pred_boxes"])[None])
+    width, height = raw["size"]
+    decode_threshold = min(t for t in (confidence_threshold, info_threshold, marks_threshold) if t is not None)
+    results = processor.post_process_object_detection(outputs, target_sizes=torch.tensor([[height, width]]),
+                                                      threshold=decode_threshold)[0]
+    if info_threshold is not None or marks_threshold is not None:
+        results = apply_class_thresholds(results, confidence_threshold, info_threshold, marks_threshold)
+    return results_to_boxes_and_scores(results)
+
+
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize("thresholds", THRESHOLDS)
+def test_tables_from_raw_matches_post_processing(seed, thresholds):
+    raw = synthetic_raw(seed)
+    expected = sorted(reference(raw, **thresholds), key=lambda d: d[2])
+    actual = sorted(tables_from_raw(raw, **thresholds), key=lambda d: d[2])
+    assert expected, "synthetic logits should keep at least one table"
+    assert [label for _, label, _ in actual] == [label for _, label, _ in expected]
+    np.testing.assert_allclose([score for _, _, score in actual], [score for _, _, score in expected], rtol=1e-5)
+    np.testing.assert_allclose([box for box, _, _ in actual], [box for box, _, _ in expected], rtol=1e-4, atol=1e-2)